@@ -1,33 +1,197 @@
 import os
 import dotenv
 import logging
+import argparse
+from contextlib import ExitStack
 
+from .archive import PayloadArchive
 from .bot import Bot
 from .bot_jikan import BotJikan
+from .cache import ExistenceCache
+from .clock import Clock
+from .concurrency import AdaptiveLimiter
+from .daemon import Daemon
+from .deadletter import DeadLetterQueue
+from .frontier import Frontier
+from .notes import NoteWriter, configure_logging
+from .profiling import Profiler
+from .recrawl import RecrawlScheduler
+from .seenset import BloomSeenSet, SeenSet
+from .store import Store
+from .target import Target
+from .tracing import Tracer
+from .validation import Validators
 
-logging.basicConfig(level=logging.DEBUG)
+def create_bot(
+    prefix: str,
+    logger: logging.Logger,
+    note_writer: NoteWriter,
+    tracer: Tracer,
+    store: Store,
+    validators: Validators | None,
+    clock: Clock | None = None
+):
+    # The cache TTLs and the limiter run on the clock of the bot
+    clock = clock or Clock()
+
+    return Bot(
+        os.getenv(f'{prefix}BASE_COMICKING') or '',
+        oauth_issuer=os.getenv(f'{prefix}OAUTH_ISSUER') or '',
+        oauth_client_id=os.getenv(f'{prefix}OAUTH_CLIENT_ID') or '',
+        oauth_client_secret=os.getenv(f'{prefix}OAUTH_CLIENT_SECRET') or '',
+        oauth_audience=os.getenv(f'{prefix}OAUTH_AUDIENCE') or '',
+        logger=logger,
+        note_writer=note_writer,
+        tracer=tracer,
+        cache=ExistenceCache(float(os.getenv('COMICKING_SCRAP_CACHE_NEGATIVE_TTL') or 300), clock=clock),
+        writes=AdaptiveLimiter(maximum=float(os.getenv(f'{prefix}WRITE_CONCURRENCY_MAX') or 16), clock=clock),
+        clock=clock,
+        store=store,
+        validators=validators
+    )
+
+def create_seen(bot: Bot, store: Store):
+    if (os.getenv('COMICKING_SCRAP_SEEN_SET') or 'bitmap') == 'bloom':
+        return BloomSeenSet(
+            store,
+            key=bot.client.configuration.host,
+            capacity=int(os.getenv('COMICKING_SCRAP_SEEN_SET_CAPACITY') or 1000000),
+            error_rate=float(os.getenv('COMICKING_SCRAP_SEEN_SET_ERROR_RATE') or 0.001)
+        )
+
+    return SeenSet(store, key=bot.client.configuration.host)
 
 def main():
+    parser = argparse.ArgumentParser(prog='comicking-scrap')
+    parser.add_argument('command', nargs='?', choices=['run', 'daemon', 'replay', 'remap'], default='run')
+    args = parser.parse_args()
+
     dotenv.load_dotenv()
 
-    logger = logging.getLogger(__name__)
-    note_file = open('bot.txt', 'a', encoding='utf-8')
+    # Every resource is released on the way out, in reverse order, also when a later step fails
+    with ExitStack() as stack:
+        log_listener = configure_logging(os.getenv('COMICKING_SCRAP_LOG_LEVEL') or 'INFO')
+        stack.callback(log_listener.stop)
 
-    bot = Bot(
-        os.getenv('COMICKING_SCRAP_BASE_COMICKING') or '',
-        oauth_issuer=os.getenv('COMICKING_SCRAP_OAUTH_ISSUER') or '',
-        oauth_client_id=os.getenv('COMICKING_SCRAP_OAUTH_CLIENT_ID') or '',
-        oauth_client_secret=os.getenv('COMICKING_SCRAP_OAUTH_CLIENT_SECRET') or '',
-        oauth_audience=os.getenv('COMICKING_SCRAP_OAUTH_AUDIENCE') or '',
-        logger=logger,
-        note_file=note_file
-    )
-    bot.load(True)
+        logger = logging.getLogger(__name__)
 
-    bot_jikan = BotJikan(
-        bot,
-        logger=logger
-    )
-    bot_jikan.process(int(os.getenv('COMICKING_SCRAP_PROCESS_MAX_NEW_COMIC') or 1))
+        # One clock for the notes and every bot
+        clock = Clock()
+
+        note_writer = NoteWriter(
+            os.getenv('COMICKING_SCRAP_NOTE_FILE') or 'bot.jsonl',
+            max_bytes=int(os.getenv('COMICKING_SCRAP_NOTE_MAX_BYTES') or 10 * 1024 * 1024),
+            clock=clock
+        )
+        stack.callback(note_writer.close)
+
+        # The trace is only valid JSON once closed
+        tracer = Tracer(os.getenv('COMICKING_SCRAP_TRACE_FILE') or None)
+        stack.callback(tracer.close)
+
+        store = Store(os.getenv('COMICKING_SCRAP_STORE') or 'bot.db')
+        stack.callback(store.close)
+
+        profiler = Profiler(
+            tracer,
+            logger,
+            [v.strip() for v in (os.getenv('COMICKING_SCRAP_PROFILE') or '').split(',') if v.strip()],
+            directory=os.getenv('COMICKING_SCRAP_PROFILE_DIR') or 'profile',
+            memory_interval=float(os.getenv('COMICKING_SCRAP_PROFILE_MEMORY_INTERVAL') or 60)
+        )
+        profiler.start()
+        stack.callback(profiler.stop)
+
+        validators = None
+        validate = os.getenv('COMICKING_SCRAP_VALIDATE')
+        if (validate or 'true').lower() in ('1', 'true', 'yes'):
+            try:
+                validators = Validators.load()
+            except FileNotFoundError as e:
+                # Explicitly enabled, a missing spec is a broken deployment
+                if validate:
+                    raise e
+
+                logger.warning('Request validation disabled: %s', e)
+
+        bot = create_bot('COMICKING_SCRAP_', logger, note_writer, tracer, store, validators, clock)
+        stack.callback(bot.close)
+
+        # Extra ComicKing instances fed by the same crawl, each with its own store
+        targets: list[Target] = []
+        for name in [v.strip() for v in (os.getenv('COMICKING_SCRAP_TARGETS') or '').split(',') if v.strip()]:
+            prefix = 'COMICKING_SCRAP_TARGET_%s_' % name.upper().replace('-', '_')
+
+            target_store = Store(os.getenv(f'{prefix}STORE') or f'bot-{name}.db')
+            stack.callback(target_store.close)
+
+            target_bot = create_bot(prefix, logger, note_writer, tracer, target_store, validators, clock)
+            stack.callback(target_bot.close)
+
+            targets.append(Target(
+                name,
+                target_bot,
+                seen=create_seen(target_bot, target_store),
+                dead_letters=DeadLetterQueue(target_store, clock=target_bot.clock)
+            ))
+
+        bot.load(True)
+
+        for target in targets:
+            target.bot.load(True)
+
+        max_new_comic = int(os.getenv('COMICKING_SCRAP_PROCESS_MAX_NEW_COMIC') or 1)
+        recrawl_budget = int(os.getenv('COMICKING_SCRAP_RECRAWL_BUDGET') or 25)
+        discover_max_new_comic = int(os.getenv('COMICKING_SCRAP_DISCOVER_MAX_NEW_COMIC') or 0)
+
+        seen = create_seen(bot, store)
+
+        bot_jikan = BotJikan(
+            bot,
+            logger=logger,
+            cover_pictures=(os.getenv('COMICKING_SCRAP_COVER_PICTURES') or '').lower() in ('1', 'true', 'yes'),
+            characters=(os.getenv('COMICKING_SCRAP_CHARACTERS') or '').lower() in ('1', 'true', 'yes'),
+            base_jikan=os.getenv('COMICKING_SCRAP_BASE_JIKAN') or None,
+            scheduler=RecrawlScheduler(store, clock=bot.clock),
+            frontier=Frontier(
+                seen,
+                max_depth=int(os.getenv('COMICKING_SCRAP_DISCOVER_MAX_DEPTH') or 3)
+            ) if discover_max_new_comic > 0 else None,
+            recommendations=(os.getenv('COMICKING_SCRAP_DISCOVER_RECOMMENDATIONS') or '').lower() in ('1', 'true', 'yes'),
+            seen=seen,
+            dead_letters=DeadLetterQueue(store, clock=bot.clock),
+            targets=targets,
+            archive=PayloadArchive(
+                store,
+                clock=bot.clock
+            ) if (os.getenv('COMICKING_SCRAP_ARCHIVE') or 'true').lower() in ('1', 'true', 'yes') else None
+        )
+
+        if args.command == 'daemon':
+            health = os.getenv('COMICKING_SCRAP_DAEMON_HEALTH', '127.0.0.1:8090')
+            health_host, _, health_port = health.rpartition(':')
+
+            bot_jikan.load(True)
+
+            Daemon(
+                bot,
+                bot_jikan,
+                logger=logger,
+                interval=float(os.getenv('COMICKING_SCRAP_DAEMON_INTERVAL') or 3600),
+                max_new_comic=max_new_comic,
+                recrawl_budget=recrawl_budget,
+                discover_max_new_comic=discover_max_new_comic,
+                health_address=(health_host or '127.0.0.1', int(health_port)) if health else None
+            ).run()
+        elif args.command == 'remap':
+            bot_jikan.load(True)
+
+            for _ in bot_jikan.remap(int(os.getenv('COMICKING_SCRAP_REMAP_MAX_COMIC') or 0) or None):
+                pass
+        elif args.command == 'replay':
+            bot_jikan.load(True)
 
-    note_file.close()
+            for _ in bot_jikan.replay(int(os.getenv('COMICKING_SCRAP_REPLAY_MAX_ATTEMPTS') or 0) or None):
+                pass
+        else:
+            bot_jikan.process(max_new_comic, recrawl_budget, discover_max_new_comic)
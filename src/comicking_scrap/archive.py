@@ -0,0 +1,76 @@
+import json
+import zlib
+import hashlib
+from typing import Any
+
+from .clock import Clock
+from .store import Store
+
+class PayloadArchive:
+    def __init__(self, store: Store, clock: Clock | None = None, level: int = 6):
+        self.store = store
+        self.clock = clock or Clock()
+        self.level = level
+
+    @staticmethod
+    def encode(payload: Any):
+        # Canonical JSON, the same payload fetched twice is stored once
+        data = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str, ensure_ascii=False).encode()
+
+        return hashlib.sha256(data).hexdigest(), data
+
+    def put(self, mal_id: int, endpoint: str, payload: Any):
+        digest, data = self.encode(payload)
+
+        with self.store.lock:
+            rows = self.store.query(
+                'SELECT digest FROM payload_ref WHERE mal_id = ? AND endpoint = ?',
+                (mal_id, endpoint)
+            )
+            previous = rows[0]['digest'] if rows else None
+
+            if previous != digest:
+                self.store.execute(
+                    'INSERT OR IGNORE INTO payload (digest, value) VALUES (?, ?)',
+                    (digest, zlib.compress(data, self.level))
+                )
+
+            self.store.execute(
+                '''
+                INSERT INTO payload_ref (mal_id, endpoint, digest, fetched) VALUES (?, ?, ?, ?)
+                ON CONFLICT (mal_id, endpoint) DO UPDATE SET digest = excluded.digest, fetched = excluded.fetched
+                ''',
+                (mal_id, endpoint, digest, self.clock.time())
+            )
+
+            # A replaced payload is dropped unless another entry still points to it
+            if previous and previous != digest:
+                self.store.execute(
+                    'DELETE FROM payload WHERE digest = ? AND NOT EXISTS (SELECT 1 FROM payload_ref WHERE digest = ?)',
+                    (previous, previous)
+                )
+
+        return digest
+
+    def get(self, mal_id: int, endpoint: str) -> Any | None:
+        rows = self.store.query(
+            '''
+            SELECT payload.value FROM payload_ref
+            JOIN payload ON payload.digest = payload_ref.digest
+            WHERE payload_ref.mal_id = ? AND payload_ref.endpoint = ?
+            ''',
+            (mal_id, endpoint)
+        )
+        if not rows:
+            return None
+
+        return json.loads(zlib.decompress(rows[0]['value']))
+
+    def mal_ids(self, endpoint: str = 'manga') -> list[int]:
+        return [
+            row['mal_id']
+            for row in self.store.query('SELECT mal_id FROM payload_ref WHERE endpoint = ? ORDER BY mal_id', (endpoint,))
+        ]
+
+    def __len__(self):
+        return self.store.query('SELECT COUNT(*) AS count FROM payload')[0]['count']
@@ -0,0 +1,334 @@
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import resource
+import platform
+import multiprocessing
+from datetime import datetime, timezone
+from typing import Any
+
+from .bot import Bot
+from .bot_jikan import BotJikan
+from .clock import Clock, VirtualClock
+from .standin import ComicKingStandIn, JikanDataset, JikanStandIn
+
+datasets = {
+    'small': (25, 3),
+    '1k': (1000, 3),
+    '10k': (10000, 3),
+    'franchise': (200, 20)
+}
+
+scenarios = ('load', 'scrap', 'get')
+
+# Metric name -> True when lower is better
+metrics = {
+    'wall_time': True,
+    'simulated_time': True,
+    'cpu_time': True,
+    'peak_rss_kb': True,
+    'http_calls_per_comic': True,
+    'new_comics_per_minute': False
+}
+
+genres = [
+    'Action', 'Adventure', 'Comedy', 'Drama', 'Fantasy', 'Romance', 'Sci-Fi',
+    'Slice of Life', 'Sports', 'Supernatural', 'Mystery', 'Award Winning', 'Unknown Genre'
+]
+themes = ['School', 'Super Power', 'Isekai', 'CGDCT', 'Historical', 'Idols (Female)', 'Unknown Theme']
+demographics = ['Shounen', 'Seinen', 'Shoujo', 'Josei']
+types = ['Manga'] * 12 + ['Manhwa'] * 3 + ['Manhua'] * 2 + ['One-shot', 'Novel', 'Light Novel']
+statuses = ['Finished', 'Publishing', 'On Hiatus', 'Discontinued', 'Not yet published']
+externals = ['https://www.example-publisher.com', 'https://en.wikipedia.org', 'https://ja.wikipedia.org', 'https://twitter.com']
+
+def synthetic_dataset(count: int, franchise_size: int = 3, seed: int = 0):
+    rnd = random.Random(seed)
+
+    dataset = JikanDataset()
+
+    for mal_id in range(1, count + 1):
+        manga_type = rnd.choice(types)
+        franchise = (mal_id - 1) // franchise_size
+        year = 1970 + rnd.randrange(55)
+
+        titles = [{'type': 'Default', 'title': f'Synthetic Manga {mal_id}'}]
+        if rnd.random() < 0.8:
+            titles.append({'type': 'Japanese', 'title': f'合成漫画 {mal_id}'})
+        if rnd.random() < 0.6:
+            titles.append({'type': 'English', 'title': f'Synthetic Comic {mal_id}'})
+        if rnd.random() < 0.3:
+            titles.append({'type': 'Synonym', 'title': f'SM{mal_id}'})
+
+        manga = {
+            'mal_id': mal_id,
+            'url': f'https://myanimelist.net/manga/{mal_id}',
+            'images': {'jpg': {'image_url': f'https://cdn.myanimelist.net/images/manga/{franchise}/{mal_id}.jpg'}},
+            'approved': True,
+            'titles': titles,
+            'title': titles[0]['title'],
+            'type': manga_type,
+            'chapters': rnd.choice([None, rnd.randrange(1, 400)]),
+            'volumes': rnd.choice([None, rnd.randrange(1, 40)]),
+            'status': rnd.choice(statuses),
+            'publishing': False,
+            'published': {
+                'from': f'{year}-0{rnd.randrange(1, 10)}-1{rnd.randrange(0, 10)}T00:00:00+00:00',
+                'to': rnd.choice([None, f'{year + rnd.randrange(1, 10)}-01-01T00:00:00+00:00'])
+            },
+            'popularity': mal_id,
+            'synopsis': f'Synthetic synopsis for manga {mal_id}. ' * rnd.randrange(1, 8),
+            'authors': [
+                {'mal_id': 10000 + franchise, 'type': 'people', 'name': f'Author {franchise}', 'url': ''}
+            ],
+            'serializations': [
+                {'mal_id': 100 + franchise % 10, 'type': 'manga', 'name': f'Magazine {franchise % 10}', 'url': ''}
+            ],
+            'genres': [{'mal_id': i, 'type': 'manga', 'name': v, 'url': ''} for i, v in enumerate(rnd.sample(genres, 3))],
+            'explicit_genres': [],
+            'themes': [{'mal_id': i, 'type': 'manga', 'name': v, 'url': ''} for i, v in enumerate(rnd.sample(themes, 2))],
+            'demographics': [{'mal_id': 0, 'type': 'manga', 'name': rnd.choice(demographics), 'url': ''}]
+        }
+
+        members = range(franchise * franchise_size + 1, min((franchise + 1) * franchise_size, count) + 1)
+        relations = []
+        if mal_id - 1 in members:
+            relations.append({'relation': 'Prequel', 'entry': [
+                {'mal_id': mal_id - 1, 'type': 'manga', 'name': f'Synthetic Manga {mal_id - 1}', 'url': ''}
+            ]})
+        if mal_id + 1 in members:
+            relations.append({'relation': 'Sequel', 'entry': [
+                {'mal_id': mal_id + 1, 'type': 'manga', 'name': f'Synthetic Manga {mal_id + 1}', 'url': ''}
+            ]})
+        others = [v for v in members if abs(v - mal_id) > 1]
+        if others:
+            relations.append({'relation': 'Side Story', 'entry': [
+                {'mal_id': v, 'type': 'manga', 'name': f'Synthetic Manga {v}', 'url': ''} for v in others
+            ]})
+        relations.append({'relation': 'Adaptation', 'entry': [
+            {'mal_id': mal_id, 'type': 'anime', 'name': f'Synthetic Anime {mal_id}', 'url': ''}
+        ]})
+
+        dataset.add(
+            manga,
+            external=[
+                {'name': 'Official Site' if i == 0 else 'Wikipedia', 'url': f'{v}/manga/{mal_id}?ref=mal'}
+                for i, v in enumerate(rnd.sample(externals, rnd.randrange(0, 3)))
+            ],
+            relations=relations,
+            pictures=[
+                {'jpg': {'image_url': f'https://cdn.myanimelist.net/images/manga/{franchise}/{mal_id}{v}.jpg'}}
+                for v in ('', 'l', 'a')[:rnd.randrange(1, 4)]
+            ],
+            characters=[
+                {
+                    'role': 'Main' if i < 2 else 'Supporting',
+                    'character': {
+                        'mal_id': 100000 + franchise * 10 + i,
+                        'name': f'Character {franchise}-{i}',
+                        'url': '',
+                        'images': {}
+                    }
+                }
+                for i in range(rnd.randrange(0, 8))
+            ],
+            recommendations=[]
+        )
+
+    return dataset
+
+def run_scenario(
+    scenario: str,
+    base_comicking: str,
+    oauth_issuer: str,
+    base_jikan: str,
+    count: int,
+    virtual_time: bool,
+    conn: Any
+):
+    logging.basicConfig(level=logging.WARNING)
+    logger = logging.getLogger('comicking_scrap.benchmark')
+
+    clock = VirtualClock() if virtual_time else Clock()
+
+    result: dict[str, Any] = {'comics': 0, 'error': None}
+
+    wall, cpu = time.perf_counter(), time.process_time()
+
+    try:
+        bot = Bot(
+            base_comicking,
+            oauth_issuer=oauth_issuer,
+            oauth_client_id='benchmark',
+            oauth_client_secret='benchmark',
+            oauth_audience='comicking',
+            logger=logger,
+            clock=clock
+        )
+        bot.load(True)
+
+        if scenario != 'load':
+            bot_jikan = BotJikan(bot, logger=logger, base_jikan=base_jikan)
+            bot_jikan.load(True)
+
+            if scenario == 'scrap':
+                result['comics'] = len(bot_jikan.scrap_comics_complete(count))
+            else:
+                for mal_id in range(1, count + 1):
+                    if bot_jikan.get_or_add_comic_complete(mal_id):
+                        result['comics'] += 1
+    except Exception as e:
+        result['error'] = repr(e)
+
+    result['wall_time'] = time.perf_counter() - wall
+    result['simulated_time'] = clock.elapsed() if isinstance(clock, VirtualClock) else result['wall_time']
+    result['cpu_time'] = time.process_time() - cpu
+    result['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    conn.send(result)
+    conn.close()
+
+def benchmark(
+    scenario: str,
+    dataset_name: str,
+    count: int,
+    jikan_rate_limits: list[tuple[int, float]] | None = None,
+    latency: float = 0.0,
+    seed: int = 0,
+    virtual_time: bool = True
+):
+    size, franchise_size = datasets[dataset_name]
+
+    dataset = synthetic_dataset(size, franchise_size, seed)
+
+    context = multiprocessing.get_context('spawn')
+
+    with ComicKingStandIn(latency=latency, seed=seed) as comicking, \
+            JikanStandIn(dataset, rate_limits=jikan_rate_limits, latency=latency, seed=seed) as jikan:
+        receiver, sender = context.Pipe(duplex=False)
+
+        process = context.Process(
+            target=run_scenario,
+            args=(
+                scenario,
+                comicking.base_comicking,
+                comicking.oauth_issuer,
+                jikan.base_jikan,
+                count,
+                virtual_time,
+                sender
+            )
+        )
+        process.start()
+        sender.close()
+
+        result = receiver.recv()
+        process.join()
+
+        http_calls = {
+            'comicking': dict(comicking.stats),
+            'jikan': dict(jikan.stats)
+        }
+
+    comics = max(result['comics'], 1)
+    new_comics = http_calls['comicking'].get('addComic', 0)
+    total_calls = sum(sum(v.values()) for v in http_calls.values())
+
+    result.update({
+        'scenario': scenario,
+        'dataset': dataset_name,
+        'count': count,
+        'new_comics': new_comics,
+        'new_comics_per_minute': new_comics / result['simulated_time'] * 60 if result['simulated_time'] else 0,
+        'http_calls': http_calls,
+        'http_calls_per_comic': total_calls / comics,
+        'http_calls_per_comic_by_endpoint': {
+            f'{service}.{k}': v / comics
+            for service, calls in http_calls.items() for k, v in sorted(calls.items())
+        }
+    })
+
+    return result
+
+def compare(results: list[dict[str, Any]], baseline: list[dict[str, Any]], threshold: float):
+    regressions = []
+
+    baseline_results = {(v['scenario'], v['dataset']): v for v in baseline}
+
+    for result in results:
+        base = baseline_results.get((result['scenario'], result['dataset']))
+        if not base:
+            continue
+
+        for metric, lower_is_better in metrics.items():
+            current, previous = result.get(metric), base.get(metric)
+            if not current or not previous:
+                continue
+
+            change = (current - previous) / previous
+            regressed = change > threshold if lower_is_better else change < -threshold
+
+            print('%-6s %-10s %-22s %14.3f -> %14.3f %+7.1f%%%s' % (
+                result['scenario'], result['dataset'], metric,
+                previous, current, change * 100, '  REGRESSION' if regressed else ''
+            ))
+
+            if regressed:
+                regressions.append((result['scenario'], result['dataset'], metric, change))
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scrape pipeline against local stand-ins')
+    parser.add_argument('--scenario', action='append', choices=scenarios)
+    parser.add_argument('--dataset', action='append', choices=list(datasets))
+    parser.add_argument('--count', type=int, default=5, help='comics to process per scenario')
+    parser.add_argument('--latency', type=float, default=0.0, help='stand-in latency per request')
+    parser.add_argument('--no-jikan-rate-limit', action='store_true')
+    parser.add_argument('--real-time', action='store_true', help='sleep for real instead of on a virtual clock')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_output.json')
+    parser.add_argument('--baseline', default=None)
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative change counted as regression')
+    args = parser.parse_args()
+
+    results = []
+    for dataset_name in args.dataset or ['small']:
+        for scenario in args.scenario or list(scenarios):
+            result = benchmark(
+                scenario,
+                dataset_name,
+                args.count,
+                # The stand-in cannot see the bot's virtual clock, so it only rate limits in real time
+                jikan_rate_limits=[] if args.no_jikan_rate_limit or not args.real_time else None,
+                latency=args.latency,
+                seed=args.seed,
+                virtual_time=not args.real_time
+            )
+            results.append(result)
+
+            print('%-6s %-10s wall=%.2fs simulated=%.2fs cpu=%.2fs rss=%dKB comics=%d new/min=%.1f calls/comic=%.1f%s' % (
+                scenario, dataset_name, result['wall_time'], result['simulated_time'], result['cpu_time'],
+                result['peak_rss_kb'], result['comics'], result['new_comics_per_minute'],
+                result['http_calls_per_comic'],
+                ' error=%s' % result['error'] if result['error'] else ''
+            ))
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'results': results
+        }, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,22 @@
-import time
 import requests
 import logging
 import comicking_openapi
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from io import TextIOWrapper
-from typing import Iterable
+from typing import Any, Callable, Iterable
+from urllib.parse import quote
+
+from . import seeds
+from .cache import ExistenceCache
+from .clock import Clock
+from .concurrency import AdaptiveLimiter, wait_all
+from .entities import EntityIndex
+from .notes import NoteWriter
+from .pagination import header, paginate
+from .singleflight import SingleFlight
+from .store import Store
+from .tracing import Tracer
+from .validation import Validators
 
 class Bot:
     language_english_lang = 'en'
@@ -20,6 +32,27 @@ class Bot:
     tagtype_comic_code = 'comic'
     tagtype_comicstatus_code = 'comic-status'
 
+    comicauthorposition_author_code = 'author'
+
+    # Creates keyed by the request body, safe to send again on a 503, titles, synopses and images get a server ULID
+    keyed_creates = (
+        (r'/rest/comics$', ('code',)),
+        (r'/rest/(comic-author-positions|comic-relation-types|category-types|tag-types)$', ('code',)),
+        (r'/rest/(characters|people|magazines)$', ('code',)),
+        (r'/rest/(categories|tags)$', ('typeCode', 'code')),
+        (r'/rest/languages$', ('lang',)),
+        (r'/rest/websites$', ('host',)),
+        (r'/rest/links$', ('websiteHost',)),
+        (r'/rest/comics/[^/]+/covers$', ('imageULID',)),
+        (r'/rest/comics/[^/]+/characters$', ('characterCode',)),
+        (r'/rest/comics/[^/]+/authors$', ('positionCode', 'personCode')),
+        (r'/rest/comics/[^/]+/serializations$', ('magazineCode',)),
+        (r'/rest/comics/[^/]+/externals$', ('linkWebsiteHost',)),
+        (r'/rest/comics/[^/]+/categories$', ('categoryTypeCode', 'categoryCode')),
+        (r'/rest/comics/[^/]+/tags$', ('tagTypeCode', 'tagCode')),
+        (r'/rest/comics/[^/]+/relations$', ('typeCode', 'childCode'))
+    )
+
     def __init__(
         self,
         base_comicking: str,
@@ -28,7 +61,13 @@ class Bot:
         oauth_client_secret: str,
         oauth_audience: str,
         logger: logging.Logger,
-        note_file: TextIOWrapper | None = None
+        note_writer: NoteWriter | None = None,
+        tracer: Tracer | None = None,
+        cache: ExistenceCache | None = None,
+        clock: Clock | None = None,
+        writes: AdaptiveLimiter | None = None,
+        store: Store | None = None,
+        validators: Validators | None = None
     ):
         self.client = comicking_openapi.ApiClient(
             configuration=comicking_openapi.Configuration(
@@ -40,7 +79,9 @@ class Bot:
         self.oauth_client_id = oauth_client_id
         self.oauth_client_secret = oauth_client_secret
         self.oauth_audience = oauth_audience
-        self.oauth_token_expires = time.time()
+
+        self.clock = clock or Clock()
+        self.oauth_token_expires = self.clock.time()
 
         self.languages: list[str] = []
         self.websites: list[str] = []
@@ -49,11 +90,37 @@ class Bot:
         self.tagtypes: list[str] = []
         self.tags: list[str] = []
         self.comicrelationtypes: list[str] = []
+        self.comicauthorpositions: list[str] = []
 
         self.logger = logger
-        self.note_file = note_file
+        self.note_writer = note_writer
+        self.store = store
+        self.validators = validators
+
+        self.tracer = tracer or Tracer()
+        self.tracer.instrument(self.client)
+
+        self.cache = cache or ExistenceCache(clock=self.clock)
+        self.flight = SingleFlight()
+
+        # MAL person/magazine/character ID -> ComicKing code, shared by every comic
+        self.persons = EntityIndex(f'person:{base_comicking}', store=store)
+        self.magazines = EntityIndex(f'magazine:{base_comicking}', store=store)
+        self.characters = EntityIndex(f'character:{base_comicking}', store=store)
+
+        self.writes = writes or AdaptiveLimiter(clock=self.clock)
+        self.writes.instrument(self.client, self.keyed_creates)
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(self.writes.maximum),
+            thread_name_prefix='comicking-write'
+        )
+        self.reader = ThreadPoolExecutor(
+            max_workers=4,
+            thread_name_prefix='comicking-read'
+        )
 
-    def load(self, seeding: bool = True):
+    def load(self, seeding: bool = True, incremental: bool = False):
         if seeding:
             self.authenticate()
 
@@ -63,46 +130,21 @@ class Bot:
 
         api0 = comicking_openapi.LanguageApi(self.client)
 
-        language_page = 1
-        while True:
-            response = api0.list_language_with_http_info(page=language_page, limit=15)
-
-            if not response.data:
-                break
-
-            for language in response.data:
+        for language in self.list_catalog(api0.list_language_with_http_info, self.languages, incremental):
+            if language.lang not in self.languages:
                 self.languages.append(language.lang)
 
-            language_total_count = 0
+        #
+        # Website
+        #
 
-            if response.headers:
-                for k, v in response.headers.items():
-                    if k.lower() == 'x-total-count':
-                        language_total_count = int(v)
-                        break
+        api4 = comicking_openapi.WebsiteApi(self.client)
 
-            if len(self.languages) >= language_total_count:
-                break
+        for website in self.list_catalog(api4.list_website_with_http_info, self.websites, incremental):
+            if website.host not in self.websites:
+                self.websites.append(website.host)
 
-            time.sleep(1)
-            language_page += 1
-
-        if seeding:
-            languages = {
-                self.language_english_lang: 'English',
-                self.language_japanese_lang: 'Japanese',
-                self.language_korean_lang: 'Korean',
-                self.language_chinese_lang: 'Chinese'
-            }
-            for k, v in languages.items():
-                if k in self.languages:
-                    continue
-
-                result = self.add_language(k, v)
-                if not result:
-                    continue
-
-                time.sleep(2)
+            self.cache.set(f'website:{website.host}')
 
         #
         # Category
@@ -110,350 +152,165 @@ class Bot:
 
         api1 = comicking_openapi.CategoryApi(self.client)
 
-        categorytype_page = 1
-        while True:
-            response = api1.list_category_type_with_http_info(page=categorytype_page, limit=15)
-
-            if not response.data:
-                break
-
-            for categorytype in response.data:
+        for categorytype in self.list_catalog(api1.list_category_type_with_http_info, self.categorytypes, incremental):
+            if categorytype.code not in self.categorytypes:
                 self.categorytypes.append(categorytype.code)
 
-            categorytype_total_count = 0
-
-            if response.headers:
-                for k, v in response.headers.items():
-                    if k.lower() == 'x-total-count':
-                        categorytype_total_count = int(v)
-                        break
-
-            if len(self.categorytypes) >= categorytype_total_count:
-                break
-
-            time.sleep(1)
-            categorytype_page += 1
-
-        if seeding:
-            categorytypes = {
-                self.categorytype_comictype_code: 'Comic Type',
-                self.categorytype_genre_code: 'Genre'
-            }
-            for k, v in categorytypes.items():
-                if k in self.categorytypes:
-                    continue
-
-                result = self.add_categorytype(k, v)
-                if not result:
-                    continue
-
-                time.sleep(2)
-
         # = = = = =
 
-        category_page = 1
-        while True:
-            response = api1.list_category_with_http_info(page=category_page, limit=15)
-
-            if not response.data:
-                break
-
-            for category in response.data:
+        for category in self.list_catalog(api1.list_category_with_http_info, self.categories, incremental):
+            if f'{category.type_code}:{category.code}' not in self.categories:
                 self.categories.append(f'{category.type_code}:{category.code}')
 
-            category_total_count = 0
-
-            if response.headers:
-                for k, v in response.headers.items():
-                    if k.lower() == 'x-total-count':
-                        category_total_count = int(v)
-                        break
-
-            if len(self.categories) >= category_total_count:
-                break
-
-            time.sleep(1)
-            category_page += 1
-
-        if seeding and self.categorytype_comictype_code in self.categorytypes:
-            category_comictypes = {
-                'manga': 'Manga',
-                'one-shot': 'One-shot',
-                'doujinshi': 'Doujinshi',
-                self.category_comictype_manhua_code: 'Manhua',
-                self.category_comictype_manhwa_code: 'Manhwa'
-            }
-            for k, v in category_comictypes.items():
-                if f'{self.categorytype_comictype_code}:{k}' in self.categories:
-                    continue
-
-                result = self.add_category(self.categorytype_comictype_code, k, v)
-                if not result:
-                    continue
-
-                time.sleep(2)
-
-        if seeding and self.categorytype_genre_code in self.categorytypes:
-            category_genres = {
-                'action': 'Action',
-                'adventure': 'Adventure',
-                'avant-garde': 'Avant-garde',
-                'boys-love': 'Boys Love',
-                'comedy': 'Comedy',
-                'drama': 'Drama',
-                'fantasy': 'Fantasy',
-                'girls-love': 'Girls Love',
-                'gourmet': 'Gourmet',
-                'horror': 'Horror',
-                'mystery': 'Mystery',
-                'romance': 'Romance',
-                'sci-fi': 'Sci-Fi',
-                'slice-of-life': 'Slice of Life',
-                'sports': 'Sports',
-                'supernatural': 'Supernatural',
-                'suspense': 'Suspense',
-
-                'ecchi': 'Ecchi',
-                'erotica': 'Erotica',
-                'hentai': 'Hentai',
-
-                'adult-cast': 'Adult Cast',
-                'anthropomorphism': 'Anthropomorphism',
-                'cute-girls-doing-cute-things': 'Cute Girls Doing Cute Things',
-                'childcare': 'Childcare',
-                'combat-sports': 'Combat Sports',
-                'cross-dressing': 'Cross-dressing',
-                'delinquents': 'Delinquents',
-                'detective': 'Detective',
-                'educational': 'Educational',
-                'female-idol': 'Female Idol',
-                'gag-humor': 'Gag Humor',
-                'gore': 'Gore',
-                'harem': 'Harem',
-                'high-stakes-game': 'High Stakes Game',
-                'historical': 'Historical',
-                'isekai': 'Isekai',
-                'iyashikei': 'Iyashikei',
-                'love-polygon': 'Love Polygon',
-                'magical-sex-shift': 'Magical Sex Shift',
-                'mahou-shoujo': 'Mahou Shoujo',
-                'male-idol': 'Male Idol',
-                'martial-arts': 'Martial Arts',
-                'mecha': 'Mecha',
-                'medical': 'Medical',
-                'memoir': 'Memoir',
-                'military': 'Military',
-                'music': 'Music',
-                'mythology': 'Mythology',
-                'organized-crime': 'Organized Crime',
-                'otaku-culture': 'Otaku Culture',
-                'parody': 'Parody',
-                'performing-arts': 'Performing Arts',
-                'pets': 'Pets',
-                'psychological': 'Psychological',
-                'racing': 'Racing',
-                'reincarnation': 'Reincarnation',
-                'reverse-harem': 'Reverse Harem',
-                'romantic-subtext': 'Romantic Subtext',
-                'samurai': 'Samurai',
-                'school': 'School',
-                'showbiz': 'Showbiz',
-                'space': 'Space',
-                'strategy-game': 'Strategy Game',
-                'superpower': 'Superpower',
-                'survival': 'Survival',
-                'team-sports': 'Team Sports',
-                'time-travel': 'Time Travel',
-                'vampire': 'Vampire',
-                'video-game': 'Video Game',
-                'villainess': 'Villainess',
-                'visual-arts': 'Visual Arts',
-                'workplace': 'Workplace',
-
-                'josei': 'Josei',
-                'kids': 'Kids',
-                'seinen': 'Seinen',
-                'shoujo': 'Shoujo',
-                'shounen': 'Shounen'
-            }
-            for k, v in category_genres.items():
-                if f'{self.categorytype_genre_code}:{k}' in self.categories:
-                    continue
-
-                result = self.add_category(self.categorytype_genre_code, k, v)
-                if not result:
-                    continue
-
-                time.sleep(2)
-
         #
         # Tag
         #
 
         api2 = comicking_openapi.TagApi(self.client)
 
-        tagtype_page = 1
-        while True:
-            response = api2.list_tag_type_with_http_info(page=tagtype_page, limit=15)
+        for tagtype in self.list_catalog(api2.list_tag_type_with_http_info, self.tagtypes, incremental):
+            if tagtype.code not in self.tagtypes:
+                self.tagtypes.append(tagtype.code)
 
-            if not response.data:
-                break
+        for tag in self.list_catalog(api2.list_tag_with_http_info, self.tags, incremental):
+            if f'{tag.type_code}:{tag.code}' not in self.tags:
+                self.tags.append(f'{tag.type_code}:{tag.code}')
 
-            for tagtype in response.data:
-                self.tagtypes.append(tagtype.code)
+        #
+        # Comic
+        #
 
-            tagtype_total_count = 0
+        api3 = comicking_openapi.ComicApi(self.client)
 
-            if response.headers:
-                for k, v in response.headers.items():
-                    if k.lower() == 'x-total-count':
-                        tagtype_total_count = int(v)
-                        break
+        for comicrelationtype in self.list_catalog(api3.list_comic_relation_type_with_http_info, self.comicrelationtypes, incremental):
+            if comicrelationtype.code not in self.comicrelationtypes:
+                self.comicrelationtypes.append(comicrelationtype.code)
 
-            if len(self.categorytypes) >= tagtype_total_count:
-                break
+        for comicauthorposition in self.list_catalog(api3.list_comic_author_position_with_http_info, self.comicauthorpositions, incremental):
+            if comicauthorposition.code not in self.comicauthorpositions:
+                self.comicauthorpositions.append(comicauthorposition.code)
 
-            time.sleep(1)
-            tagtype_page += 1
+        # Persons, magazines and characters are not read here, resolve_entity fills their index on
+        # first use, characters only when they are imported at all
 
         if seeding:
-            tagtypes = {
-                self.tagtype_comic_code: 'Comic',
-                self.tagtype_comicstatus_code: 'Comic Status'
-            }
-            for k, v in tagtypes.items():
-                if k in self.tagtypes:
-                    continue
+            self.seed()
 
-                result = self.add_tagtype(k, v)
-                if not result:
-                    continue
+    def seed(self):
+        fingerprint = seeds.fingerprint()
+        fingerprint_key = f'seed:{self.client.configuration.host}'
 
-                time.sleep(2)
+        if self.store and self.store.get(fingerprint_key) == fingerprint:
+            self.logger.info('ComicKing Bot seed %s already applied', fingerprint[:12])
+            return
 
-        tag_page = 1
-        while True:
-            response = api2.list_tag_with_http_info(page=tag_page, limit=15)
+        catalogs = {
+            'languages': self.languages,
+            'categorytypes': self.categorytypes,
+            'categories': self.categories,
+            'tagtypes': self.tagtypes,
+            'tags': self.tags,
+            'comicrelationtypes': self.comicrelationtypes,
+            'comicauthorpositions': self.comicauthorpositions
+        }
 
-            if not response.data:
-                break
+        # Categories and tags wait for their types, everything else goes out at once
+        for stage in seeds.diff(catalogs):
+            wait_all([self.submit(getattr(self, method), *args) for method, args in stage])
 
-            for tag in response.data:
-                self.tags.append(f'{tag.type_code}:{tag.code}')
+        if self.store:
+            self.store.set(fingerprint_key, fingerprint)
 
-            tag_total_count = 0
+        self.logger.info('ComicKing Bot seed %s applied', fingerprint[:12])
 
-            if response.headers:
-                for k, v in response.headers.items():
-                    if k.lower() == 'x-total-count':
-                        tag_total_count = int(v)
-                        break
+    def list_catalog(self, fetch: Callable[..., Any], catalog: list[str], incremental: bool = False):
+        if incremental:
+            # A one item page is enough to compare the server total with what is loaded
+            response = fetch(page=1, limit=1)
 
-            if len(self.tags) >= tag_total_count:
-                break
+            total_count = header(response.headers, 'X-Total-Count')
+            if total_count is not None and int(total_count) == len(catalog):
+                return iter(())
 
-            time.sleep(1)
-            tag_page += 1
+        return self.paginate(fetch)
 
-        if seeding and self.tagtype_comic_code in self.tagtypes:
-            tag_comics = {
-                'award-winning': 'Award Winning'
-            }
-            for k, v in tag_comics.items():
-                if f'{self.tagtype_comic_code}:{k}' in self.tags:
-                    continue
+    def resolve_entity(
+        self,
+        index: EntityIndex,
+        external_id: int,
+        name: str,
+        add: Callable[[str, str], Any]
+    ) -> str:
+        code = index.get(external_id)
+        if code:
+            return code
 
-                result = self.add_tag(self.tagtype_comic_code, k, v)
-                if not result:
-                    continue
+        # Codes are derived from the external ID, an entity ComicKing already has answers 409 and is indexed
+        def create():
+            code = index.code(external_id)
 
-                time.sleep(2)
+            try:
+                add(code, name)
+            except comicking_openapi.ApiException as e:
+                # Created by an earlier run the index does not know about
+                if e.status != 409:
+                    raise e
 
-        if seeding and self.tagtype_comicstatus_code in self.tagtypes:
-            tag_comicstatuses = {
-                'announced': 'Announced',
-                'ongoing': 'Ongoing',
-                'finished': 'Finished',
-                'hiatus': 'Hiatus',
-                'cancelled': 'Cancelled'
-            }
-            for k, v in tag_comicstatuses.items():
-                if f'{self.tagtype_comicstatus_code}:{k}' in self.tags:
-                    continue
+            index.set(external_id, code)
 
-                result = self.add_tag(self.tagtype_comicstatus_code, k, v)
-                if not result:
-                    continue
+            return code
 
-                time.sleep(2)
+        return self.flight.do((index.kind, external_id), create)
 
-        #
-        # Comic
-        #
+    def resolve_person(self, mal_id: int, name: str):
+        return self.resolve_entity(self.persons, mal_id, name, self.add_person)
 
-        api3 = comicking_openapi.ComicApi(self.client)
+    def resolve_magazine(self, mal_id: int, name: str):
+        return self.resolve_entity(self.magazines, mal_id, name, self.add_magazine)
 
-        comicrelationtype_page = 1
-        while True:
-            response = api3.list_comic_relation_type_with_http_info(page=comicrelationtype_page, limit=15)
+    def resolve_characters(self, names: dict[int, str]) -> dict[int, str]:
+        codes: dict[int, str] = {}
+        missing: dict[int, Future] = {}
 
-            if not response.data:
-                break
+        for mal_id, name in names.items():
+            code = self.characters.get(mal_id)
+            if code:
+                codes[mal_id] = code
+            else:
+                missing[mal_id] = self.submit(self.resolve_entity, self.characters, mal_id, name, self.add_character)
 
-            for comicrelationtype in response.data:
-                self.comicrelationtypes.append(comicrelationtype.code)
+        # Whatever is not indexed yet is created as one concurrent batch
+        wait_all(missing.values())
 
-            comicrelationtype_total_count = 0
+        for mal_id, future in missing.items():
+            codes[mal_id] = future.result()
 
-            if response.headers:
-                for k, v in response.headers.items():
-                    if k.lower() == 'x-total-count':
-                        comicrelationtype_total_count = int(v)
-                        break
+        return codes
 
-            if len(self.comicrelationtypes) >= comicrelationtype_total_count:
-                break
+    def paginate(self, fetch: Callable[..., Any], *args: Any, **kwargs: Any):
+        return paginate(self.tracer.bind(fetch), *args, executor=self.reader, **kwargs)
 
-            time.sleep(1)
-            comicrelationtype_page += 1
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        return self.executor.submit(self.tracer.bind(fn), *args, **kwargs)
 
-        if seeding:
-            comicrelationtypes = {
-                'alternative-setting': 'Alternative Setting',
-                'alternative-version': 'Alternative Version',
-                'character': 'Character',
-                'full-story': 'Full Story',
-                'other': 'Other',
-                'parent-story': 'Parent Story',
-                'prequel': 'Prequel',
-                'sequel': 'Sequel',
-                'side-story': 'Side Story',
-                'spin-off': 'Spin-off',
-                'summary': 'Summary'
-            }
-            for k, v in comicrelationtypes.items():
-                if k in self.comicrelationtypes:
-                    continue
-
-                result = self.add_comicrelationtype(k, v)
-                if not result:
-                    continue
-
-                time.sleep(2)
+    def close(self):
+        self.executor.shutdown()
+        self.reader.shutdown()
 
     def authenticate(self):
-        if self.oauth_token_expires > time.time() + 300:
+        if self.oauth_token_expires > self.clock.time() + 300:
             return
 
-        response = requests.post(
-            f'{self.oauth_issuer}oauth/token',
-            data={
-                'grant_type': 'client_credentials',
-                'client_id': self.oauth_client_id,
-                'client_secret': self.oauth_client_secret,
-                'audience': self.oauth_audience
-            }
-        )
+        with self.tracer.span('POST /oauth/token', 'http'):
+            response = requests.post(
+                f'{self.oauth_issuer}oauth/token',
+                data={
+                    'grant_type': 'client_credentials',
+                    'client_id': self.oauth_client_id,
+                    'client_secret': self.oauth_client_secret,
+                    'audience': self.oauth_audience
+                }
+            )
 
         if not response.ok:
             raise RuntimeError('Bot authentication failed')
@@ -462,16 +319,154 @@ class Bot:
 
         config = self.client.configuration
         config.access_token = token['access_token']
-        self.oauth_token_expires = time.time() + float(token['expires_in'])
+        self.oauth_token_expires = self.clock.time() + float(token['expires_in'])
 
         self.logger.info('ComicKing Bot authenticated')
 
-    def note(self, __lines: Iterable[str] | None = None):
-        if __lines:
-            self.logger.info(__lines)
-            if self.note_file: self.note_file.writelines(__lines)
+    def note(self, __message: str, event: str = 'note', **fields: Any):
+        self.logger.info(__message)
+        if self.note_writer: self.note_writer.write(event, message=__message, **fields)
+
+    def model(self, schema: str, /, **values: Any):
+        # Invalid payloads fail here instead of after a round trip
+        if self.validators:
+            values = self.validators.validate(schema, values)
+
+        return getattr(comicking_openapi, schema)(**values)
+
+    def has_website(self, host: str):
+        hit, value = self.cache.get(f'website:{host}')
+        if hit:
+            return value is not None
+
+        api = comicking_openapi.WebsiteApi(self.client)
+
+        try:
+            self.flight.do(('getWebsite', host), api.get_website, host)
+        except comicking_openapi.ApiException as e:
+            if e.status == 404:
+                self.cache.set_absent(f'website:{host}')
+
+                return False
+            else:
+                raise e
+
+        if host not in self.websites:
+            self.websites.append(host)
+
+        self.cache.set(f'website:{host}')
+
+        return True
+
+    def has_link(
+        self,
+        website_host: str,
+        relative_reference: str | None = None
+    ):
+        href = f'{website_host}{relative_reference or ""}'
+
+        hit, value = self.cache.get(f'link:{href}')
+        if hit:
+            return value is not None
+
+        api = comicking_openapi.LinkApi(self.client)
+
+        try:
+            self.flight.do(('getLink', href), api.get_link, href)
+        except comicking_openapi.ApiException as e:
+            if e.status == 404:
+                self.cache.set_absent(f'link:{href}')
+
+                return False
+            else:
+                raise e
+
+        self.cache.set(f'link:{href}')
 
-        if self.note_file: self.note_file.writelines("\n")
+        return True
+
+    def ensure_website(self, host: str, name: str):
+        if self.has_website(host):
+            return
+
+        # Checked again inside the flight, a finished add may have raced this one
+        self.flight.do(('addWebsite', host), lambda: self.has_website(host) or self.add_website(host, name))
+
+    def ensure_link(
+        self,
+        website_host: str,
+        relative_reference: str | None = None
+    ):
+        if self.has_link(website_host, relative_reference):
+            return
+
+        self.flight.do(
+            ('addLink', f'{website_host}{relative_reference or ""}'),
+            lambda: self.has_link(website_host, relative_reference) or self.add_link(website_host, relative_reference)
+        )
+
+    def list_comic_by_external_link(self, href: str) -> list[Any]:
+        api = comicking_openapi.ComicApi(self.client)
+
+        return self.flight.do(('listComic', href), api.list_comic, external_link_href=[quote(href)])
+
+    def get_image_ulid(
+        self,
+        link_website_host: str,
+        link_relative_reference: str | None = None
+    ) -> str | None:
+        href = f'{link_website_host}{link_relative_reference or ""}'
+
+        return self.get_image_ulids([(link_website_host, link_relative_reference)])[href]
+
+    def get_image_ulids(
+        self,
+        links: Iterable[tuple[str, str | None]]
+    ) -> dict[str, str | None]:
+        result: dict[str, str | None] = {}
+        missing: list[str] = []
+
+        for link_website_host, link_relative_reference in links:
+            href = f'{link_website_host}{link_relative_reference or ""}'
+
+            hit, value = self.cache.get(f'image:{href}')
+            if hit:
+                result[href] = value
+            elif href not in missing:
+                missing.append(href)
+
+        api = comicking_openapi.ImageApi(self.client)
+
+        for i in range(0, len(missing), 15):
+            hrefs = missing[i:i + 15]
+
+            response = api.list_image(link_href=[quote(v) for v in hrefs], limit=len(hrefs))
+            for image in response:
+                href = f'{image.link_website_host}{image.link_relative_reference or ""}'
+
+                self.cache.set(f'link:{href}')
+                self.cache.set(f'image:{href}', image.ulid)
+
+                if href in hrefs and not result.get(href):
+                    result[href] = image.ulid
+
+            for href in hrefs:
+                if href not in result:
+                    self.cache.set_absent(f'image:{href}')
+
+                    result[href] = None
+
+        return result
+
+    def list_comic_cover_ulids(self, comic_code: str):
+        api = comicking_openapi.ComicApi(self.client)
+
+        comic_covers: list[str] = []
+
+        for comic_cover in self.paginate(api.list_comic_cover_with_http_info, comic_code):
+            comic_covers.append(comic_cover.image_ulid)
+
+        return comic_covers
 
     def add_language(
         self,
@@ -481,7 +476,8 @@ class Bot:
         api = comicking_openapi.LanguageApi(self.client)
 
         result = api.add_language(
-            new_language=comicking_openapi.NewLanguage(
+            new_language=self.model(
+                'NewLanguage',
                 lang=lang,
                 name=name
             )
@@ -502,7 +498,8 @@ class Bot:
         api = comicking_openapi.WebsiteApi(self.client)
 
         result = api.add_website(
-            new_website=comicking_openapi.NewWebsite(
+            new_website=self.model(
+                'NewWebsite',
                 host=host,
                 name=name
             )
@@ -511,6 +508,8 @@ class Bot:
         if host not in self.websites:
             self.websites.append(host)
 
+        self.cache.set(f'website:{host}')
+
         self.logger.info('Website "%s" added', host)
 
         return result
@@ -523,12 +522,15 @@ class Bot:
         api = comicking_openapi.LinkApi(self.client)
 
         result = api.add_link(
-            new_link=comicking_openapi.NewLink(
+            new_link=self.model(
+                'NewLink',
                 websiteHost=website_host,
                 relativeReference=relative_reference
             )
         )
 
+        self.cache.set(f'link:{website_host}{relative_reference or ""}')
+
         self.logger.info('Link "%s" added', f'{website_host}{relative_reference}')
 
         return result
@@ -541,12 +543,18 @@ class Bot:
         api = comicking_openapi.ImageApi(self.client)
 
         result = api.add_image(
-            new_image=comicking_openapi.NewImage(
+            new_image=self.model(
+                'NewImage',
                 linkWebsiteHost=link_website_host,
                 linkRelativeReference=link_relative_reference
             )
         )
 
+        self.cache.set(
+            f'image:{link_website_host}{link_relative_reference or ""}',
+            result.ulid
+        )
+
         self.logger.info('Image "%s" added', f'{link_website_host}{link_relative_reference}')
 
         return result
@@ -559,7 +567,8 @@ class Bot:
         api = comicking_openapi.CategoryApi(self.client)
 
         result = api.add_category_type(
-            new_generic_type=comicking_openapi.NewGenericType(
+            new_generic_type=self.model(
+                'NewGenericType',
                 code=code,
                 name=name
             )
@@ -581,7 +590,8 @@ class Bot:
         api = comicking_openapi.CategoryApi(self.client)
 
         result = api.add_category(
-            new_category=comicking_openapi.NewCategory(
+            new_category=self.model(
+                'NewCategory',
                 typeCode=type_code,
                 code=code,
                 name=name
@@ -603,7 +613,8 @@ class Bot:
         api = comicking_openapi.TagApi(self.client)
 
         result = api.add_tag_type(
-            new_generic_type=comicking_openapi.NewGenericType(
+            new_generic_type=self.model(
+                'NewGenericType',
                 code=code,
                 name=name
             )
@@ -625,7 +636,8 @@ class Bot:
         api = comicking_openapi.TagApi(self.client)
 
         result = api.add_tag(
-            new_tag=comicking_openapi.NewTag(
+            new_tag=self.model(
+                'NewTag',
                 typeCode=type_code,
                 code=code,
                 name=name
@@ -652,7 +664,8 @@ class Bot:
         api = comicking_openapi.ComicApi(self.client)
 
         result = api.add_comic(
-            new_comic=comicking_openapi.NewComic(
+            new_comic=self.model(
+                'NewComic',
                 code=code,
                 publishedFrom=published_from,
                 publishedTo=published_to,
@@ -667,6 +680,40 @@ class Bot:
 
         return result
 
+    def update_comic(
+        self,
+        code: str,
+        published_from: datetime | None = None,
+        published_to: datetime | None = None,
+        total_chapter: int | None = None,
+        total_volume: int | None = None
+    ):
+        api = comicking_openapi.ComicApi(self.client)
+
+        # Only send what is known, an explicit null would clear the field
+        values = {
+            'publishedFrom': published_from,
+            'publishedTo': published_to,
+            'totalChapter': total_chapter,
+            'totalVolume': total_volume
+        }
+
+        result = api.update_comic(
+            code,
+            set_comic=self.model('SetComic', **{k: v for k, v in values.items() if v is not None})
+        )
+
+        self.logger.info('Comic "%s" updated', code)
+
+        return result
+
+    def delete_comic(self, code: str):
+        api = comicking_openapi.ComicApi(self.client)
+
+        api.delete_comic(code)
+
+        self.logger.info('Comic "%s" deleted', code)
+
     def add_comic_title(
         self,
         comic_code: str,
@@ -679,7 +726,8 @@ class Bot:
 
         result = api.add_comic_title(
             comic_code,
-            new_comic_title=comicking_openapi.NewComicTitle(
+            new_comic_title=self.model(
+                'NewComicTitle',
                 languageLang=language_lang,
                 content=content,
                 isSynonym=is_synonym,
@@ -694,6 +742,25 @@ class Bot:
 
         return result
 
+    def list_comic_titles(self, comic_code: str) -> list[Any]:
+        api = comicking_openapi.ComicApi(self.client)
+
+        return list(self.paginate(api.list_comic_title_with_http_info, comic_code))
+
+    def delete_comic_title(
+        self,
+        comic_code: str,
+        ulid: str
+    ):
+        api = comicking_openapi.ComicApi(self.client)
+
+        api.delete_comic_title(comic_code, ulid)
+
+        self.logger.info(
+            'Comic "%s" Title "%s" deleted',
+            comic_code, ulid
+        )
+
     def add_comic_cover(
         self,
         comic_code: str,
@@ -703,7 +770,8 @@ class Bot:
 
         result = api.add_comic_cover(
             comic_code,
-            new_comic_cover=comicking_openapi.NewComicCover(
+            new_comic_cover=self.model(
+                'NewComicCover',
                 imageULID=image_ulid
             )
         )
@@ -723,7 +791,8 @@ class Bot:
 
         result = api.add_comic_synopsis(
             comic_code,
-            new_comic_synopsis=comicking_openapi.NewComicSynopsis(
+            new_comic_synopsis=self.model(
+                'NewComicSynopsis',
                 languageLang=language_lang,
                 content=content,
                 source=source
@@ -737,6 +806,35 @@ class Bot:
 
         return result
 
+    def list_comic_synopses(self, comic_code: str) -> list[Any]:
+        api = comicking_openapi.ComicApi(self.client)
+
+        return list(self.paginate(api.list_comic_synopsis_with_http_info, comic_code))
+
+    def update_comic_synopsis(
+        self,
+        comic_code: str,
+        ulid: str,
+        content: str
+    ):
+        api = comicking_openapi.ComicApi(self.client)
+
+        result = api.update_comic_synopsis(
+            comic_code,
+            ulid,
+            set_comic_synopsis=self.model(
+                'SetComicSynopsis',
+                content=content
+            )
+        )
+
+        self.logger.info(
+            'Comic "%s" Synopsis "%s" updated',
+            comic_code, content.replace('\r', '').replace('\n', ' ')[:61] + '...'
+        )
+
+        return result
+
     def add_comic_external(
         self,
         comic_code: str,
@@ -749,7 +847,8 @@ class Bot:
 
         result = api.add_comic_external(
             comic_code,
-            new_comic_external=comicking_openapi.NewComicExternal(
+            new_comic_external=self.model(
+                'NewComicExternal',
                 linkWebsiteHost=link_website_host,
                 linkRelativeReference=link_relative_reference,
                 isOfficial=is_official,
@@ -774,7 +873,8 @@ class Bot:
 
         result = api.add_comic_category(
             comic_code,
-            new_comic_category=comicking_openapi.NewComicCategory(
+            new_comic_category=self.model(
+                'NewComicCategory',
                 categoryTypeCode=type_code,
                 categoryCode=code
             )
@@ -797,7 +897,8 @@ class Bot:
 
         result = api.add_comic_tag(
             comic_code,
-            new_comic_tag=comicking_openapi.NewComicTag(
+            new_comic_tag=self.model(
+                'NewComicTag',
                 tagTypeCode=type_code,
                 tagCode=code
             )
@@ -810,6 +911,52 @@ class Bot:
 
         return result
 
+    def list_comic_category_codes(self, comic_code: str, type_code: str):
+        api = comicking_openapi.ComicApi(self.client)
+
+        return [
+            v.category_code
+            for v in self.paginate(api.list_comic_category_with_http_info, comic_code, category_type_code=[type_code])
+        ]
+
+    def delete_comic_category(
+        self,
+        comic_code: str,
+        type_code: str,
+        code: str
+    ):
+        api = comicking_openapi.ComicApi(self.client)
+
+        api.delete_comic_category(comic_code, type_code, code)
+
+        self.logger.info(
+            'Comic "%s" Category "%s" deleted',
+            comic_code, f'{type_code}:{code}'
+        )
+
+    def list_comic_tag_codes(self, comic_code: str, type_code: str):
+        api = comicking_openapi.ComicApi(self.client)
+
+        return [
+            v.tag_code
+            for v in self.paginate(api.list_comic_tag_with_http_info, comic_code, tag_type_code=[type_code])
+        ]
+
+    def delete_comic_tag(
+        self,
+        comic_code: str,
+        type_code: str,
+        code: str
+    ):
+        api = comicking_openapi.ComicApi(self.client)
+
+        api.delete_comic_tag(comic_code, type_code, code)
+
+        self.logger.info(
+            'Comic "%s" Tag "%s" deleted',
+            comic_code, f'{type_code}:{code}'
+        )
+
     def add_comicrelationtype(
         self,
         code: str,
@@ -818,7 +965,8 @@ class Bot:
         api = comicking_openapi.ComicApi(self.client)
 
         result = api.add_comic_relation_type(
-            new_generic_type=comicking_openapi.NewGenericType(
+            new_generic_type=self.model(
+                'NewGenericType',
                 code=code,
                 name=name
             )
@@ -831,6 +979,149 @@ class Bot:
 
         return result
 
+    def add_comicauthorposition(
+        self,
+        code: str,
+        name: str
+    ):
+        api = comicking_openapi.ComicApi(self.client)
+
+        result = api.add_comic_author_position(
+            new_generic_type=self.model(
+                'NewGenericType',
+                code=code,
+                name=name
+            )
+        )
+
+        if code not in self.comicauthorpositions:
+            self.comicauthorpositions.append(code)
+
+        self.logger.info('Comic Author Position "%s" added', code)
+
+        return result
+
+    def add_person(
+        self,
+        code: str | None,
+        name: str
+    ):
+        api = comicking_openapi.PersonApi(self.client)
+
+        result = api.add_person(
+            new_person=self.model(
+                'NewPerson',
+                code=code,
+                name=name
+            )
+        )
+
+        self.logger.info('Person "%s" added', result.code)
+
+        return result
+
+    def add_magazine(
+        self,
+        code: str | None,
+        name: str
+    ):
+        api = comicking_openapi.MagazineApi(self.client)
+
+        result = api.add_magazine(
+            new_magazine=self.model(
+                'NewMagazine',
+                code=code,
+                name=name
+            )
+        )
+
+        self.logger.info('Magazine "%s" added', result.code)
+
+        return result
+
+    def add_character(
+        self,
+        code: str | None,
+        name: str
+    ):
+        api = comicking_openapi.CharacterApi(self.client)
+
+        result = api.add_character(
+            new_character=self.model(
+                'NewCharacter',
+                code=code,
+                name=name
+            )
+        )
+
+        self.logger.info('Character "%s" added', result.code)
+
+        return result
+
+    def add_comic_character(
+        self,
+        comic_code: str,
+        character_code: str,
+        is_main: bool | None = None
+    ):
+        api = comicking_openapi.ComicApi(self.client)
+
+        result = api.add_comic_character(
+            comic_code,
+            new_comic_character=self.model(
+                'NewComicCharacter',
+                characterCode=character_code,
+                isMain=is_main
+            )
+        )
+
+        self.logger.info('Comic "%s" Character "%s" added', comic_code, character_code)
+
+        return result
+
+    def add_comic_author(
+        self,
+        comic_code: str,
+        position_code: str,
+        person_code: str
+    ):
+        api = comicking_openapi.ComicApi(self.client)
+
+        result = api.add_comic_author(
+            comic_code,
+            new_comic_author=self.model(
+                'NewComicAuthor',
+                positionCode=position_code,
+                personCode=person_code
+            )
+        )
+
+        self.logger.info(
+            'Comic "%s" Author "%s:%s" added',
+            comic_code, position_code, person_code
+        )
+
+        return result
+
+    def add_comic_serialization(
+        self,
+        comic_code: str,
+        magazine_code: str
+    ):
+        api = comicking_openapi.ComicApi(self.client)
+
+        result = api.add_comic_serialization(
+            comic_code,
+            new_comic_serialization=self.model(
+                'NewComicSerialization',
+                magazineCode=magazine_code
+            )
+        )
+
+        self.logger.info('Comic "%s" Serialization "%s" added', comic_code, magazine_code)
+
+        return result
+
     def add_comic_relation(
         self,
         comic_code: str,
@@ -841,7 +1132,8 @@ class Bot:
 
         result = api.add_comic_relation(
             comic_code,
-            new_comic_relation=comicking_openapi.NewComicRelation(
+            new_comic_relation=self.model(
+                'NewComicRelation',
                 typeCode=type_code,
                 childCode=child_code
             )
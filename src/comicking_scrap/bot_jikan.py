@@ -1,94 +1,153 @@
-import time
+import asyncio
 import logging
-import comicking_openapi
+import threading
 import jikan_openapi
 from datetime import datetime
-from typing import Iterable
-from urllib.parse import quote, urlparse
+from typing import Any, AsyncIterator, Iterator
+from urllib.parse import urlparse
 
 from .bot import Bot
+from .archive import PayloadArchive
+from .concurrency import Pacer
+from .deadletter import DeadLetterQueue
+from .frontier import Frontier
+from .pagination import header
+from .pipeline import ComicRecord, External, Relation, Term, Title
+from .recrawl import RecrawlScheduler
+from .seenset import SeenSet
+from .target import Target
+from .tracing import Span
+
+class MangaResult:
+    def __init__(
+        self,
+        mal_id: int,
+        comic_code: str | None,
+        created: bool,
+        requests: int,
+        duration: float,
+        error: str | None = None,
+        target: str | None = None
+    ):
+        self.mal_id = mal_id
+        self.comic_code = comic_code
+        self.created = created
+        self.requests = requests
+        self.duration = duration
+        self.error = error
+        self.target = target
+
+        # Results of the same manga on the other targets
+        self.fanout: list[MangaResult] = []
+
+    def __repr__(self):
+        return (
+            f'MangaResult(mal_id={self.mal_id}, comic_code={self.comic_code!r}, created={self.created}, '
+            f'requests={self.requests}, duration={self.duration:.3f}, error={self.error!r}, target={self.target!r})'
+        )
 
 class BotJikan:
     website_myanimelist_host = 'myanimelist.net'
     website_myanimelist_cdn_host = 'cdn.myanimelist.net'
 
+    # Jikan allows 3 requests per second and 60 per minute
+    jikan_interval = 1.0
+
+    # Failing manga in a row before the failure is taken as systemic and raised
+    max_consecutive_failures = 10
+
     def __init__(
         self,
         bot: Bot,
-        logger: logging.Logger
+        logger: logging.Logger,
+        cover_pictures: bool = False,
+        characters: bool = False,
+        base_jikan: str | None = None,
+        scheduler: RecrawlScheduler | None = None,
+        frontier: Frontier | None = None,
+        recommendations: bool = False,
+        seen: SeenSet | None = None,
+        dead_letters: DeadLetterQueue | None = None,
+        targets: list[Target] | None = None,
+        archive: PayloadArchive | None = None
     ):
         self.bot = bot
-        self.client = jikan_openapi.ApiClient()
+        self.client = jikan_openapi.ApiClient(
+            configuration=jikan_openapi.Configuration(
+                host=base_jikan
+            ) if base_jikan else None
+        )
 
         self.logger = logger
 
-    def load(self, seeding: bool = True):
-        if seeding:
-            self.bot.authenticate()
-
-        #
-        # Website
-        #
+        self.cover_pictures = cover_pictures
+        self.characters = characters
 
-        api0 = comicking_openapi.WebsiteApi(self.bot.client)
+        self.clock = bot.clock
 
-        websites = {
-            self.website_myanimelist_host: 'MyAnimeList',
-            self.website_myanimelist_cdn_host: 'MyAnimeList CDN'
-        }
-        for k, v in websites.items():
-            if k in self.bot.websites:
-                continue
+        self.tracer = bot.tracer
+        self.tracer.instrument(self.client)
 
-            try:
-                api0.get_website(k)
+        self.pacer = Pacer(self.jikan_interval, clock=self.clock)
+        self.pacer.instrument(self.client)
 
-                self.bot.websites.append(k)
-            except comicking_openapi.ApiException as e:
-                if seeding and e.status == 404:
-                    self.bot.add_website(k, v)
+        self.flight = bot.flight
 
-                    time.sleep(2)
-                else:
-                    raise e
+        self.scheduler = scheduler
 
-    def note(self, __lines: Iterable[str] | None = None):
-        if __lines:
-            self.logger.info(__lines)
-            if self.bot.note_file: self.bot.note_file.writelines(__lines)
+        # MAL IDs already in ComicKing (or rejected), shared with the frontier
+        if seen is None:
+            seen = frontier.seen if frontier is not None else SeenSet()
 
-        if self.bot.note_file: self.bot.note_file.writelines("\n")
+        self.seen = seen
 
-    def process(self, max_new_comic: int | None = None):
-        self.note('#')
-        self.note('# Started time %s' % time.ctime())
-        self.note('#')
-        self.note()
+        self.frontier = frontier
+        if frontier is not None:
+            frontier.seen = seen
 
-        self.load(True)
+        self.recommendations = recommendations
 
-        self.scrap_comics_complete(max_new_comic)
+        self.dead_letters = dead_letters
 
-        self.note()
-        self.note('# Stopped time %s' % time.ctime())
-        self.note()
+        # Every Jikan payload fetched, mapping fixes are replayed from it without a crawl
+        self.archive = archive
 
-    def __manga_complete(self, manga: jikan_openapi.Manga):
-        comic_code, comic_exist = None, False
+        # One crawl feeds every ComicKing instance, the first one drives the search and discovery
+        self.targets = [Target('default', bot, seen, dead_letters)] + (targets or [])
+        for target in self.targets:
+            target.pipeline.on_relation = self.__manga_relation_handler(target)
 
-        if not manga.mal_id:
-            return comic_code, comic_exist
+    def load(self, seeding: bool = True):
+        for target in self.targets:
+            if seeding:
+                target.bot.authenticate()
+
+            #
+            # Website
+            #
+
+            websites = {
+                self.website_myanimelist_host: 'MyAnimeList',
+                self.website_myanimelist_cdn_host: 'MyAnimeList CDN'
+            }
+            for k, v in websites.items():
+                if target.bot.has_website(k):
+                    continue
 
-        api0 = comicking_openapi.ComicApi(self.bot.client)
+                if not seeding:
+                    raise RuntimeError('Website "%s" not found on target "%s"' % (k, target.name))
 
-        response0 = api0.list_comic(
-            external_link_href=[quote(f'{self.website_myanimelist_host}/manga/{manga.mal_id}')]
-        )
+                target.bot.add_website(k, v)
 
-        self.bot.authenticate()
+    def flush(self):
+        for target in self.targets:
+            target.flush()
 
-        # Comic
+    def note(self, __message: str, event: str = 'note', **fields: Any):
+        self.bot.note(__message, event, **fields)
 
+    @staticmethod
+    def manga_published(manga: jikan_openapi.Manga):
         comic_published_from, comic_published_to = None, None
 
         if manga.published:
@@ -100,584 +159,920 @@ class BotJikan:
             if manga_published.to:
                 comic_published_to = datetime.fromisoformat(manga_published.to)
 
-        api1 = comicking_openapi.LinkApi(self.bot.client)
+        return comic_published_from, comic_published_to
+
+    @staticmethod
+    def comic_status_name(manga_status: str):
+        match manga_status:
+            case 'Discontinued':
+                return 'Cancelled'
+            case 'Not yet published':
+                return 'Announced'
+            case 'On Hiatus':
+                return 'Hiatus'
+            case 'Publishing':
+                return 'Ongoing'
+            case _:
+                return manga_status
+
+    def archived(self, mal_id: int, endpoint: str, payload: Any):
+        if self.archive is not None and payload is not None:
+            self.archive.put(mal_id, endpoint, payload.to_dict())
+
+        return payload
+
+    def get_manga_relations(self, mal_id: int):
+        api = jikan_openapi.MangaApi(self.client)
 
-        if len(response0) < 1:
-            response0Z = self.bot.add_comic(
-                published_from=comic_published_from,
-                published_to=comic_published_to,
-                total_chapter=manga.chapters,
-                total_volume=manga.volumes
-            )
+        return self.flight.do(
+            ('getMangaRelations', mal_id),
+            lambda: self.archived(mal_id, 'relations', api.get_manga_relations(mal_id))
+        )
 
-            # Comic External (MyAnimeList)
+    def get_manga_characters(self, mal_id: int):
+        api = jikan_openapi.MangaApi(self.client)
 
-            comic_link = quote(f'{self.website_myanimelist_host}/manga/{manga.mal_id}')
+        return self.flight.do(
+            ('getMangaCharacters', mal_id),
+            lambda: self.archived(mal_id, 'characters', api.get_manga_characters(mal_id))
+        )
 
-            try:
-                api1.get_link(comic_link)
-            except comicking_openapi.ApiException as e:
-                if e.status == 404:
-                    self.bot.add_link(self.website_myanimelist_host, f'/manga/{manga.mal_id}')
-
-                    time.sleep(2)
-                else:
-                    raise e
-
-            self.bot.add_comic_external(
-                response0Z.code,
-                self.website_myanimelist_host,
-                f'/manga/{manga.mal_id}',
-                is_community=True
+    def get_manga_external(self, mal_id: int):
+        api = jikan_openapi.MangaApi(self.client)
+
+        return self.archived(mal_id, 'external', api.get_manga_external(mal_id))
+
+    def get_manga_pictures(self, mal_id: int):
+        api = jikan_openapi.MangaApi(self.client)
+
+        return self.archived(mal_id, 'pictures', api.get_manga_pictures(mal_id))
+
+    def get_manga_recommendations(self, mal_id: int):
+        api = jikan_openapi.MangaApi(self.client)
+
+        return self.archived(mal_id, 'recommendations', api.get_manga_recommendations(mal_id))
+
+    def get_manga(self, mal_id: int):
+        api = jikan_openapi.MangaApi(self.client)
+
+        try:
+            response = api.get_manga_by_id(mal_id)
+        except jikan_openapi.ApiException as e:
+            if e.status == 404:
+                return None
+            else:
+                raise e
+
+        return self.archived(mal_id, 'manga', response.data)
+
+    def manga_accepted(self, manga: jikan_openapi.Manga):
+        if not manga.mal_id or not manga.type:
+            return False
+
+        if self.bot.categorytype_comictype_code in self.bot.categorytypes:
+            comic_category_code = self.bot.categorytype_comictype_code
+            comic_category_code += ':' + manga.type.lower().replace(' ', '-')
+
+            return comic_category_code in self.bot.categories
+
+        return manga.type not in ['Novel', 'Light Novel']
+
+    def process(
+        self,
+        max_new_comic: int | None = None,
+        recrawl_budget: int = 0,
+        discover_max_new_comic: int = 0
+    ):
+        self.note('Started time %s' % self.clock.ctime(), 'process-started')
+
+        self.load(True)
+
+        self.scrap_comics_complete(max_new_comic)
+
+        for _ in self.iter_discover_complete(discover_max_new_comic):
+            pass
+
+        for _ in self.recrawl(recrawl_budget):
+            pass
+
+        self.note('Stopped time %s' % self.clock.ctime(), 'process-stopped')
+
+    def manga_record(self, manga: jikan_openapi.Manga, depth: int = 0):
+        mal_id = manga.mal_id
+
+        record = ComicRecord(
+            self.website_myanimelist_host,
+            f'/manga/{mal_id}',
+            mal_id,
+            label='Manga',
+            depth=depth,
+            context={'mal_id': mal_id}
+        )
+
+        record.published_from, record.published_to = self.manga_published(manga)
+        record.total_chapter = manga.chapters
+        record.total_volume = manga.volumes
+
+        if manga.status:
+            manga_status = self.comic_status_name(manga.status)
+
+            record.status = Term(
+                self.bot.tagtype_comicstatus_code,
+                manga_status.lower().replace(' ', '-'),
+                manga_status,
+                'status'
             )
 
-            comic_code = response0Z.code
-        else:
-            if len(response0) > 1:
-                self.note('Detected multiple comic with same MyAnimeList ID %s' % manga.mal_id)
+        # Comic Cover
+
+        if manga.images and manga.images.jpg and manga.images.jpg.image_url:
+            record.covers.append((self.website_myanimelist_cdn_host, urlparse(manga.images.jpg.image_url).path))
+
+        # Kept up to date on refresh too, seen comics are not searched again
+        if self.cover_pictures:
+            def load_covers():
+                covers: list[tuple[str, str]] = []
+
+                response1 = self.get_manga_pictures(mal_id)
+                for picture in response1.data or []:
+                    if not picture.jpg or not picture.jpg.image_url:
+                        continue
+
+                    cover = (self.website_myanimelist_cdn_host, urlparse(picture.jpg.image_url).path)
+                    if cover not in record.covers and cover not in covers:
+                        covers.append(cover)
+
+                return covers
+
+            record.deferred['covers'] = load_covers
 
-            comic_code, comic_exist = response0[0].code, True
+        return record
+
+    def manga_record_complete(self, manga: jikan_openapi.Manga, depth: int = 0):
+        record = self.manga_record(manga, depth)
+
+        mal_id = manga.mal_id
+
+        # Comic Category (Comic Type)
 
         comic_type = None
 
         if manga.type:
             comic_type = manga.type.lower().replace(' ', '-')
 
-        # Comic Category (Comic Type)
-
-        if not comic_exist and comic_type:
-            if f'{self.bot.categorytype_comictype_code}:{comic_type}' in self.bot.categories:
-                self.bot.add_comic_category(
-                    comic_code,
-                    self.bot.categorytype_comictype_code,
-                    comic_type
-                )
-            else:
-                self.note('Manga Type "%s" is skipped' % manga.type)
+            record.comic_type = Term(self.bot.categorytype_comictype_code, comic_type, manga.type, 'type')
 
         # Comic Title
 
-        if not comic_exist and manga.titles:
-            if comic_type and comic_type in [
-                self.bot.category_comictype_manhua_code,
-                self.bot.category_comictype_manhwa_code
-            ]:
-                has_correct_title_language = False
-                for title in manga.titles:
-                    match comic_type:
-                        case self.bot.category_comictype_manhua_code:
-                            if title.type == 'Chinese':
-                                has_correct_title_language = True
-                        case self.bot.category_comictype_manhwa_code:
-                            if title.type == 'Korean':
-                                has_correct_title_language = True
-                        case _:
-                            pass
-
-                if not has_correct_title_language:
-                    for title in manga.titles:
-                        if title.type == 'Japanese':
-                            match comic_type:
-                                case self.bot.category_comictype_manhua_code:
-                                    title.type = 'Chinese'
-                                case self.bot.category_comictype_manhwa_code:
-                                    title.type = 'Korean'
-                                case _:
-                                    pass
-
-                            self.note('Manga Title "%s" fix type to "%s"' % (title.title, title.type))
+        if manga.titles:
+            title_types = {title.type for title in manga.titles}
+
+            # MyAnimeList files the native title of manhua and manhwa as Japanese
+            native_type = None
+            match comic_type:
+                case self.bot.category_comictype_manhua_code:
+                    native_type = 'Chinese'
+                case self.bot.category_comictype_manhwa_code:
+                    native_type = 'Korean'
+                case _:
+                    pass
+
+            languages = {
+                'English': self.bot.language_english_lang,
+                'Japanese': self.bot.language_japanese_lang,
+                'Korean': self.bot.language_korean_lang,
+                'Chinese': self.bot.language_chinese_lang
+            }
 
             for title in manga.titles:
                 if not title.title:
                     continue
 
-                languageLang = None
-                match title.type:
-                    case 'English':
-                        languageLang = self.bot.language_english_lang
-                    case 'Japanese':
-                        languageLang = self.bot.language_japanese_lang
-                    case 'Korean':
-                        languageLang = self.bot.language_korean_lang
-                    case 'Chinese':
-                        languageLang = self.bot.language_chinese_lang
-                    case _:
-                        pass
-
-                if languageLang not in self.bot.languages:
-                    self.note('Manga Title "%s" Type "%s" is skipped' % (title.title, title.type))
-                    continue
+                title_type = title.type
 
-                self.bot.add_comic_title(
-                    comic_code,
-                    languageLang,
-                    title.title
-                )
+                if native_type and native_type not in title_types and title_type == 'Japanese':
+                    title_type = native_type
 
-                time.sleep(2)
-
-        api2 = comicking_openapi.WebsiteApi(self.bot.client)
-        api3 = comicking_openapi.ImageApi(self.bot.client)
-
-        # Comic Cover
+                    self.note(
+                        'Manga Title "%s" fix type to "%s"' % (title.title, title_type),
+                        'title-type-fixed',
+                        mal_id=mal_id,
+                        reason=title_type
+                    )
 
-        if manga.images:
-            if manga.images.jpg and manga.images.jpg.image_url:
-                image = urlparse(manga.images.jpg.image_url)
+                record.titles.append(Title(languages.get(title_type), title.title, title_type))
 
-                try:
-                    api1.get_link(f'{self.website_myanimelist_cdn_host}{image.path}')
-                except comicking_openapi.ApiException as e:
-                    if e.status == 404:
-                        self.bot.add_link(self.website_myanimelist_cdn_host, image.path)
-                    else:
-                        raise e
+        # Comic Synopsis
 
-                response1Y = api3.list_image(
-                    link_href=[quote(f'{self.website_myanimelist_cdn_host}{image.path}')]
-                )
-                if len(response1Y) > 0:
-                    try:
-                        api0.get_comic_cover(comic_code, response1Y[0].ulid)
-                    except comicking_openapi.ApiException as e:
-                        if e.status == 404:
-                            self.bot.add_comic_cover(
-                                comic_code,
-                                response1Y[0].ulid
-                            )
-                        else:
-                            raise e
-                else:
-                    response1Z = self.bot.add_image(
-                        self.website_myanimelist_cdn_host,
-                        image.path
-                    )
+        if manga.synopsis:
+            record.synopses.append((self.bot.language_english_lang, manga.synopsis, 'MyAnimeList'))
 
-                    self.bot.add_comic_cover(
-                        comic_code,
-                        response1Z.ulid
-                    )
+        # Comic Author / Serialization
 
+        # MyAnimeList does not tell the role, everyone is an author
+        for author in manga.authors or []:
+            if author.mal_id and author.name:
+                record.authors.append((author.mal_id, author.name, self.bot.comicauthorposition_author_code))
 
-        # Comic Synopsis
+        for serialization in manga.serializations or []:
+            if serialization.mal_id and serialization.name:
+                record.serializations.append((serialization.mal_id, serialization.name))
 
-        if not comic_exist and manga.synopsis:
-            self.bot.add_comic_synopsis(
-                comic_code,
-                self.bot.language_english_lang,
-                manga.synopsis,
-                source='MyAnimeList'
-            )
+        # Comic Category (Genre) / Tag (Comic)
 
-        # Comic Author
+        comic_tags = ['Award Winning']
 
-        """ api3 = comicking_openapi.PersonApi(self.client)
+        for genre in manga.genres or []:
+            if not genre.name:
+                continue
 
-        if not comic_exist and manga.authors:
-            for author in manga.authors:
-                pass """
+            code = genre.name.lower().replace(' ', '-')
 
-        # Comic Serialization
+            if genre.name in comic_tags:
+                record.tags.append(Term(self.bot.tagtype_comic_code, code, genre.name, 'genre'))
+            else:
+                record.categories.append(Term(self.bot.categorytype_genre_code, code, genre.name, 'genre'))
 
-        """ if not comic_exist and manga.serializations:
-            for serialization in manga.serializations:
-                pass """
+        for explicit_genre in manga.explicit_genres or []:
+            if not explicit_genre.name:
+                continue
 
-        # Comic Tag (Comic Status)
+            record.categories.append(Term(
+                self.bot.categorytype_genre_code,
+                explicit_genre.name.lower().replace(' ', '-'),
+                explicit_genre.name,
+                'explicit-genre'
+            ))
 
-        if not comic_exist and manga.status:
-            manga_status = manga.status
+        for theme in manga.themes or []:
+            if not theme.name:
+                continue
 
-            match manga_status:
-                case 'Discontinued':
-                    manga_status = 'Cancelled'
-                case 'Not yet published':
-                    manga_status = 'Announced'
-                case 'On Hiatus':
-                    manga_status = 'Hiatus'
-                case 'Publishing':
-                    manga_status = 'Ongoing'
+            manga_theme_name = theme.name
+
+            match manga_theme_name:
+                case 'Anthropomorphic':
+                    manga_theme_name = 'Anthropomorphism'
+                case 'CGDCT':
+                    manga_theme_name = 'Cute Girls Doing Cute Things'
+                case 'Crossdressing':
+                    manga_theme_name = 'Cross-dressing'
+                case 'Idols (Female)':
+                    manga_theme_name = 'Female Idol'
+                case 'Idols (Male)':
+                    manga_theme_name = 'Male Idol'
+                case 'Super Power':
+                    manga_theme_name = 'Superpower'
                 case _:
                     pass
 
-            comic_status = manga_status.lower().replace(' ', '-')
+            record.categories.append(Term(
+                self.bot.categorytype_genre_code,
+                manga_theme_name.lower().replace(' ', '-'),
+                manga_theme_name,
+                'theme'
+            ))
+
+        for demographic in manga.demographics or []:
+            if not demographic.name:
+                continue
+
+            record.categories.append(Term(
+                self.bot.categorytype_genre_code,
+                demographic.name.lower().replace(' ', '-'),
+                demographic.name,
+                'demographic'
+            ))
+
+        # Comic External
+
+        def load_externals():
+            response2 = self.get_manga_external(mal_id)
 
-            if f'{self.bot.tagtype_comicstatus_code}:{comic_status}' in self.bot.tags:
-                self.bot.add_comic_tag(
-                    comic_code,
-                    self.bot.tagtype_comicstatus_code,
-                    comic_status
+            return [
+                External(
+                    external.url,
+                    external.name,
+                    is_official=True if external.name == 'Official Site' else None
                 )
-            else:
-                self.note('Manga Status "%s" is skipped' % manga_status)
+                for external in response2.data or []
+                if external.url
+            ]
 
-        # Comic Category (Genre) / Tag (Comic)
+        record.deferred['externals'] = load_externals
 
-        if not comic_exist and manga.genres:
-            comic_tags = ('Award Winning')
+        # Comic Character
 
-            for genre in manga.genres:
-                if not genre.name:
-                    continue
+        if self.characters:
+            def load_characters():
+                characters: dict[int, tuple[int, str, bool]] = {}
 
-                comic_tag_or_genre = genre.name.lower().replace(' ', '-')
+                response3 = self.get_manga_characters(mal_id)
+                for character in response3.data or []:
+                    if not character.character or not character.character.mal_id or not character.character.name:
+                        continue
 
-                if genre.name in comic_tags:
-                    if f'{self.bot.tagtype_comic_code}:{comic_tag_or_genre}' not in self.bot.tags:
-                        self.bot.add_comic_tag(
-                            comic_code,
-                            self.bot.tagtype_comic_code,
-                            comic_tag_or_genre
-                        )
-                    else:
-                        self.note('Manga Genre "%s" is skipped' % genre.name)
+                    character_id = character.character.mal_id
+                    is_main = character.role == 'Main' or (character_id in characters and characters[character_id][2])
 
-                    continue
+                    characters[character_id] = (character_id, character.character.name, is_main)
 
-                if f'{self.bot.categorytype_genre_code}:{comic_tag_or_genre}' not in self.bot.categories:
-                    self.note('Manga Genre "%s" is skipped' % genre.name)
+                return list(characters.values())
 
-                    continue
+            record.deferred['characters'] = load_characters
 
-                self.bot.add_comic_category(
-                    comic_code,
-                    self.bot.categorytype_genre_code,
-                    comic_tag_or_genre
-                )
+        # Comic Relation
 
-                time.sleep(2)
+        def load_relations():
+            response4 = self.get_manga_relations(mal_id)
+            if not response4.data:
+                return []
 
-        if not comic_exist and manga.explicit_genres:
-            for explicit_genre in manga.explicit_genres:
-                if not explicit_genre.name:
+            manga_relations = [(1, v) for v in response4.data]
+
+            for relation in response4.data:
+                if not relation.entry or not relation.relation:
                     continue
 
-                comic_genre = explicit_genre.name.lower().replace(' ', '-')
+                if relation.relation.lower().replace(' ', '-') not in self.bot.comicrelationtypes:
+                    continue
 
-                if f'{self.bot.categorytype_genre_code}:{comic_genre}' not in self.bot.categories:
-                    self.note('Manga Explicit Genre "%s" is skipped' % explicit_genre.name)
+                # Relations of the related manga are taken in as well, one step further
+                for mangaY in relation.entry:
+                    if not mangaY.mal_id:
+                        continue
 
-                    continue
+                    response4Y = self.get_manga_relations(mangaY.mal_id)
+                    if response4Y.data:
+                        manga_relations += [(2, v) for v in response4Y.data]
 
-                self.bot.add_comic_category(
-                    comic_code,
-                    self.bot.categorytype_genre_code,
-                    comic_genre
-                )
+                    self.clock.sleep(2)
 
-                time.sleep(2)
+            relations: list[Relation] = []
 
-        if not comic_exist and manga.themes:
-            for theme in manga.themes:
-                if not theme.name:
+            for distance, relation in manga_relations:
+                if not relation.relation or not relation.entry:
                     continue
 
-                manga_theme_name = theme.name
-
-                match manga_theme_name:
-                    case 'Anthropomorphic':
-                        manga_theme_name = 'Anthropomorphism'
-                    case 'CGDCT':
-                        manga_theme_name = 'Cute Girls Doing Cute Things'
-                    case 'Crossdressing':
-                        manga_theme_name = 'Cross-dressing'
-                    case 'Idols (Female)':
-                        manga_theme_name = 'Female Idol'
-                    case 'Idols (Male)':
-                        manga_theme_name = 'Male Idol'
-                    case 'Super Power':
-                        manga_theme_name = 'Superpower'
-                    case _:
-                        pass
-
-                comic_genre = manga_theme_name.lower().replace(' ', '-')
-
-                if f'{self.bot.categorytype_genre_code}:{comic_genre}' not in self.bot.categories:
-                    self.note('Manga Theme "%s" is skipped' % manga_theme_name)
+                for mangaZ in relation.entry:
+                    # Anime adaptations have no MyAnimeList manga page
+                    if not mangaZ.mal_id or mangaZ.type not in (None, 'manga'):
+                        continue
 
-                    continue
+                    relations.append(Relation(
+                        relation.relation.lower().replace(' ', '-'),
+                        self.website_myanimelist_host,
+                        f'/manga/{mangaZ.mal_id}',
+                        mangaZ.mal_id,
+                        distance
+                    ))
 
-                self.bot.add_comic_category(
-                    comic_code,
-                    self.bot.categorytype_genre_code,
-                    comic_genre
-                )
+            return relations
 
-                time.sleep(2)
+        record.deferred['relations'] = load_relations
 
-        if not comic_exist and manga.demographics:
-            for demographic in manga.demographics:
-                if not demographic.name:
-                    continue
+        return record
 
-                comic_genre = demographic.name.lower().replace(' ', '-')
+    def __manga_relation_handler(self, target: Target):
+        def on_relation(record: ComicRecord, relation: Relation, child_code: str | None):
+            if child_code:
+                target.seen.add(relation.external_id)
+            elif self.frontier is not None:
+                # Not in ComicKing yet, a lead for discovery
+                self.frontier.push_relation(relation.external_id, relation.type_code, record.depth + relation.distance)
 
-                if f'{self.bot.categorytype_genre_code}:{comic_genre}' not in self.bot.categories:
-                    self.note('Manga Demographic "%s" is skipped' % demographic.name)
+        return on_relation
 
-                    continue
+    def __manga_complete(
+        self,
+        target: Target,
+        manga: jikan_openapi.Manga,
+        records: list[ComicRecord],
+        result: MangaResult,
+        depth: int = 0,
+        stale: bool = False
+    ):
+        if not manga.mal_id:
+            return None, False
 
-                self.bot.add_comic_category(
-                    comic_code,
-                    self.bot.categorytype_genre_code,
-                    comic_genre
-                )
+        # Mapped once, the Jikan requests behind it are shared by every target
+        if not records:
+            records.append(self.manga_record_complete(manga, depth))
 
-                time.sleep(2)
+        record = records[0]
 
-        api4 = jikan_openapi.MangaApi(self.client)
+        try:
+            comic_code, comic_exist = target.pipeline.run(record)
+        finally:
+            result.comic_code, result.created = record.comic_code, record.created
+
+        # The pipeline leaves existing comics alone but their covers, changes since the last sync are written here
+        if comic_exist and stale:
+            with self.tracer.span('refresh'):
+                target.pipeline.refresh(record, comic_code, covers=False)
+
+        # Comic Recommendation
+
+        with self.tracer.span('recommendations'):
+            if not comic_exist and target is self.targets[0] and self.frontier is not None and self.recommendations:
+                response5 = self.get_manga_recommendations(manga.mal_id)
+                if response5.data:
+                    for rank, recommendation in enumerate(response5.data):
+                        entry = getattr(recommendation.entry, 'actual_instance', None) or recommendation.entry
+                        if not entry or not entry.mal_id:
+                            continue
 
-        # Comic External
+                        self.frontier.push_recommendation(entry.mal_id, rank, depth + 1)
 
-        if not comic_exist:
-            response2 = api4.get_manga_external(manga.mal_id)
-            if response2.data:
-                for external in response2.data:
-                    url = urlparse(external.url)
+        return comic_code, comic_exist
 
-                    if url.port:
-                        self.note('Manga External "%s" skipped' % external.url)
-                        continue
+    def __manga_failed(
+        self,
+        target: Target,
+        manga: jikan_openapi.Manga,
+        result: MangaResult,
+        source: str,
+        depth: int,
+        e: Exception
+    ):
+        target.consecutive_failures += 1
 
-                    website_host = url.hostname
-                    if not website_host:
-                        continue
+        # A half imported comic would be taken as complete on the next attempt, roll it back
+        if result.created and result.comic_code:
+            try:
+                target.bot.delete_comic(result.comic_code)
+            except Exception as e2:
+                self.logger.warning('Comic "%s" rollback failed: %r', result.comic_code, e2)
+            else:
+                result.comic_code, result.created = None, False
+
+        result.error = repr(e)
+
+        self.logger.exception('Jikan (MyAnimeList) manga ID %s failed on target "%s"', manga.mal_id, target.name)
+        self.note(
+            'Jikan (MyAnimeList) manga ID %s failed' % manga.mal_id,
+            'manga-failed',
+            mal_id=manga.mal_id,
+            comic_code=result.comic_code,
+            source=source,
+            target=target.name,
+            error=result.error
+        )
 
-                    website_host = str(website_host)
+        if target.dead_letters is None:
+            raise e
 
-                    if website_host.endswith('wikipedia.org'):
-                        if website_host != 'en.wikipedia.org':
-                            self.note('Manga External non-english Wikipedia "%s" skipped' % external.url)
+        target.dead_letters.record(
+            manga.mal_id,
+            source,
+            depth,
+            manga.to_dict() if hasattr(manga, 'to_dict') else None,
+            e
+        )
 
-                            continue
+        if target.consecutive_failures >= self.max_consecutive_failures:
+            raise e
 
-                        website_host = 'wikipedia.org'
+    def __manga_target(
+        self,
+        target: Target,
+        manga: jikan_openapi.Manga,
+        records: list[ComicRecord],
+        span: Span,
+        depth: int,
+        source: str,
+        stale: bool = False
+    ):
+        started, requests = self.clock.monotonic(), span.requests
 
-                    if website_host not in self.bot.websites:
-                        try:
-                            api2.get_website(website_host)
+        result = MangaResult(manga.mal_id, None, False, 0, 0.0, target=target.name)
 
-                            self.bot.websites.append(website_host)
-                        except comicking_openapi.ApiException as e:
-                            if e.status == 404:
-                                website_name = external.name
+        try:
+            comic_code, comic_exist = self.__manga_complete(target, manga, records, result, depth, stale)
+        except Exception as e:
+            result.requests = span.requests - requests
+            result.duration = self.clock.monotonic() - started
 
-                                if not website_name or website_name == 'Official Site':
-                                    website_name = website_host
+            self.__manga_failed(target, manga, result, source, depth, e)
 
-                                self.bot.add_website(website_host, website_name)
-                            else:
-                                raise e
+            return result
 
-                        self.bot.websites.append(website_host)
+        target.consecutive_failures = 0
 
-                    relativeReference = str(url.path)
+        result.comic_code = comic_code
+        result.created = bool(comic_code) and not comic_exist
+        result.requests = span.requests - requests
+        result.duration = self.clock.monotonic() - started
 
-                    if url.query:
-                        relativeReference += "?" + str(url.query)
+        if target.dead_letters is not None and source == 'replay':
+            target.dead_letters.remove(manga.mal_id)
 
-                    try:
-                        api1.get_link(f'{website_host}{relativeReference}')
-                    except comicking_openapi.ApiException as e:
-                        if e.status == 404:
-                            self.bot.add_link(
-                                website_host,
-                                relativeReference if relativeReference else None
-                            )
-                        else:
-                            raise e
+        # Recrawls follow the first target, the others are refreshed through it
+        if self.scheduler and comic_code and target is self.targets[0]:
+            self.scheduler.record(manga.mal_id, comic_code, manga)
 
-                    self.bot.add_comic_external(
-                        comic_code,
-                        website_host,
-                        relativeReference if relativeReference else None,
-                        is_official=True if external.name == 'Official Site' else None
-                    )
+        if comic_code:
+            target.seen.add(manga.mal_id)
 
-                    time.sleep(2)
+        self.note(
+            'Jikan (MyAnimeList) manga ID %s check complete' % manga.mal_id,
+            'manga-completed',
+            mal_id=manga.mal_id,
+            comic_code=comic_code,
+            comic_exist=comic_exist,
+            target=target.name,
+            requests=result.requests,
+            duration=result.duration
+        )
 
-        # Comic Character
+        return result
 
-        """ if not comic_exist:
-            response3 = api4.get_manga_characters(manga.mal_id)
-            if response3.data:
-                for character in response3.data:
-                    pass """
+    def __manga_result(
+        self,
+        manga: jikan_openapi.Manga,
+        depth: int = 0,
+        source: str = 'search',
+        targets: list[Target] | None = None
+    ):
+        self.note(
+            'Check Jikan (MyAnimeList) manga ID %s' % manga.mal_id,
+            'manga-started',
+            mal_id=manga.mal_id
+        )
 
-        # Comic Relation
+        records: list[ComicRecord] = []
+        results: list[MangaResult] = []
 
-        if not comic_exist:
-            response4 = api4.get_manga_relations(manga.mal_id)
-            if response4.data:
-                manga_relations = response4.data.copy()
+        # Decided before any target records the new fingerprint, every target gets the same answer
+        row = self.scheduler.get(manga.mal_id) if self.scheduler else None
+        stale = self.scheduler is not None and (not row or row['fingerprint'] != self.scheduler.fingerprint(manga))
 
-                for relation in response4.data:
-                    if not relation.entry or not relation.relation:
-                        continue
+        with self.tracer.span(
+            f'manga {manga.mal_id}', 'manga',
+            mal_id=manga.mal_id
+        ) as span:
+            for target in self.targets if targets is None else targets:
+                results.append(self.__manga_target(target, manga, records, span, depth, source, stale))
 
-                    manga_relation_type_code = relation.relation.lower().replace(" ", "-")
+            span.args['comic_code'] = results[0].comic_code
+            span.args['created'] = results[0].created
+            span.args['requests'] = span.requests
 
-                    if manga_relation_type_code not in self.bot.comicrelationtypes:
-                        self.note('Manga Relation "%s" is skipped' % manga_relation_type_code)
+            errors = [v.error for v in results if v.error]
+            if errors:
+                span.args['error'] = errors[0]
 
-                        continue
+        result = results[0]
+        result.fanout = results[1:]
 
-                    for mangaY in relation.entry:
-                        if not mangaY.mal_id:
-                            continue
+        return result
 
-                        response4Y = api4.get_manga_relations(mangaY.mal_id)
-                        if response4Y.data:
-                            manga_relations += response4Y.data
+    def __manga_refresh(self, manga: jikan_openapi.Manga, comic_code: str):
+        # Titles and synopses are refreshed too, the deferred Jikan parts are not loaded
+        record = self.manga_record_complete(manga)
 
-                        time.sleep(2)
+        for target in self.targets:
+            target_code = comic_code
 
-                for relation in manga_relations:
-                    if not relation.relation or not relation.entry:
-                        continue
+            if target is not self.targets[0]:
+                response = target.bot.list_comic_by_external_link(record.href)
+                if not response:
+                    continue
 
-                    for mangaZ in relation.entry:
-                        if not mangaZ.mal_id:
-                            continue
+                target_code = response[0].code
 
-                        manga_relation_type_code = relation.relation.lower().replace(" ", "-")
+            target.bot.authenticate()
 
-                        if manga_relation_type_code not in self.bot.comicrelationtypes:
-                            self.note('Manga Relation "%s" is skipped' % manga_relation_type_code)
+            target.pipeline.refresh(record, target_code)
 
-                            continue
+    def __manga_recrawl(
+        self,
+        scheduler: RecrawlScheduler,
+        mal_id: int,
+        comic_code: str,
+        etag: str | None,
+        modified: str | None
+    ):
+        api = jikan_openapi.MangaApi(self.client)
 
-                        response4Z = api0.list_comic(
-                            external_link_href=[
-                                quote(f'{self.website_myanimelist_host}/manga/{mangaZ.mal_id}')
-                            ]
-                        )
-                        if len(response4Z) < 1:
-                            continue
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if modified:
+            headers['If-Modified-Since'] = modified
 
-                        try:
-                            api0.get_comic_relation(
-                                comic_code,
-                                manga_relation_type_code,
-                                response4Z[0].code
-                            )
-                        except comicking_openapi.ApiException as e:
-                            if e.status == 404:
-                                self.bot.add_comic_relation(
-                                    comic_code,
-                                    manga_relation_type_code,
-                                    response4Z[0].code
-                                )
-                            else:
-                                raise e
-
-                        time.sleep(2)
+        try:
+            response = api.get_manga_by_id_with_http_info(mal_id, _headers=headers)
+        except jikan_openapi.ApiException as e:
+            if e.status in (304, 404):
+                scheduler.record(mal_id, comic_code)
 
-        return comic_code, comic_exist
+                return False
+            else:
+                raise e
+
+        manga = self.archived(mal_id, 'manga', response.data.data)
+        if not manga:
+            return False
+
+        row = scheduler.get(mal_id)
+
+        changed = not row or row['fingerprint'] != scheduler.fingerprint(manga)
+        if changed:
+            self.__manga_refresh(manga, comic_code)
+
+        scheduler.record(
+            mal_id,
+            comic_code,
+            manga,
+            etag=header(response.headers, 'ETag'),
+            modified=header(response.headers, 'Last-Modified')
+        )
+
+        return changed
+
+    def recrawl(self, budget: int) -> Iterator[MangaResult]:
+        if not self.scheduler or budget < 1:
+            return
+
+        for row in self.scheduler.due(budget):
+            mal_id, comic_code = row['mal_id'], row['comic_code']
+
+            started = self.clock.monotonic()
+
+            with self.tracer.span(
+                f'recrawl {mal_id}', 'manga',
+                mal_id=mal_id,
+                comic_code=comic_code
+            ) as span:
+                changed = self.__manga_recrawl(self.scheduler, mal_id, comic_code, row['etag'], row['modified'])
+
+                span.args['changed'] = changed
+                span.args['requests'] = span.requests
+
+            self.note(
+                'Jikan (MyAnimeList) manga ID %s recrawled' % mal_id,
+                'manga-recrawled',
+                mal_id=mal_id,
+                comic_code=comic_code,
+                changed=changed
+            )
+
+            yield MangaResult(mal_id, comic_code, False, span.requests, self.clock.monotonic() - started)
 
     def scrap_comics_complete(
         self,
         max_new_comic: int | None = None
     ):
+        return [v.comic_code for v in self.iter_comics_complete(max_new_comic) if v.comic_code]
+
+    async def aiter_comics_complete(
+        self,
+        max_new_comic: int | None = None
+    ) -> AsyncIterator[MangaResult]:
+        loop = asyncio.get_running_loop()
+        iterator = self.iter_comics_complete(max_new_comic)
+
+        # A cancelled step keeps running in its thread, the close waits for it
+        lock = threading.Lock()
+
+        def step():
+            with lock:
+                return next(iterator, done)
+
+        def close():
+            with lock:
+                iterator.close()
+
+        # The scrape is blocking, every step runs in the default executor
+        done = object()
+        try:
+            while True:
+                result = await loop.run_in_executor(None, step)
+                if result is done:
+                    break
+
+                yield result
+        finally:
+            # Closed here on an early break or cancel, its flush and seen-set persistence run now
+            await loop.run_in_executor(None, close)
+
+    def iter_comics_complete(
+        self,
+        max_new_comic: int | None = None
+    ) -> Iterator[MangaResult]:
         api = jikan_openapi.MangaApi(self.client)
 
-        comics_code: list[str] = []
         total_new_comic = 0
 
-        page = 1
-        while True:
-            if max_new_comic and total_new_comic > max_new_comic - 1:
-                break
+        try:
+            page = 1
+            while True:
+                if max_new_comic and total_new_comic > max_new_comic - 1:
+                    break
 
-            response = api.get_manga_search(
-                page=page,
-                order_by=jikan_openapi.MangaSearchQueryOrderby.POPULARITY,
-                sort=jikan_openapi.SearchQuerySort.DESC
-            )
-            if not response.data:
-                break
+                response = api.get_manga_search(
+                    page=page,
+                    order_by=jikan_openapi.MangaSearchQueryOrderby.POPULARITY,
+                    sort=jikan_openapi.SearchQuerySort.DESC
+                )
+                if not response.data:
+                    break
 
-            for manga in response.data:
-                if max_new_comic and total_new_comic > max_new_comic - 1:
+                for manga in response.data:
+                    if max_new_comic and total_new_comic > max_new_comic - 1:
+                        break
+
+                    if not manga.mal_id:
+                        continue
+
+                    self.archived(manga.mal_id, 'manga', manga)
+
+                    # Popularity shifts between pages, repeats are skipped before any ComicKing call
+                    targets = [v for v in self.targets if manga.mal_id not in v.seen]
+                    if not targets:
+                        continue
+
+                    if not self.manga_accepted(manga):
+                        continue
+
+                    result = self.__manga_result(manga, targets=targets)
+
+                    yield result
+
+                    if result.created:
+                        total_new_comic += 1
+                        self.clock.sleep(5)
+
+                page += 1
+                self.clock.sleep(3)
+        finally:
+            self.flush()
+
+    def iter_discover_complete(
+        self,
+        max_new_comic: int = 0
+    ) -> Iterator[MangaResult]:
+        if self.frontier is None or max_new_comic < 1:
+            return
+
+        total_new_comic = 0
+
+        try:
+            while total_new_comic < max_new_comic:
+                item = self.frontier.pop()
+                if not item:
                     break
 
-                if not manga.mal_id:
-                    continue
+                mal_id, depth = item
 
-                if manga.type:
-                    if self.bot.categorytype_comictype_code in self.bot.categorytypes:
-                        comic_category_code = self.bot.categorytype_comictype_code
-                        comic_category_code += ':' + manga.type.lower().replace(' ', '-')
+                # Duplicate leads, or imported by search since they were pushed
+                targets = [v for v in self.targets if mal_id not in v.seen]
+                if not targets:
+                    continue
 
-                        if comic_category_code not in self.bot.categories:
-                            continue
-                    else:
-                        if manga.type in ['Novel', 'Light Novel']:
-                            continue
-                else:
+                manga = self.get_manga(mal_id)
+                if not manga:
                     continue
 
-                self.note()
-                self.note('Check Jikan (MyAnimeList) manga ID %s' % manga.mal_id)
+                # Rejected leads are not worth another request, failed ones are left to search and replay
+                if not self.manga_accepted(manga):
+                    self.seen.add(mal_id)
 
-                comic_code, comic_exist = self.__manga_complete(manga)
+                    continue
 
-                if comic_code:
-                    comics_code.append(comic_code)
+                result = self.__manga_result(manga, depth, 'discover', targets)
 
-                self.note("Jikan (MyAnimeList) manga ID %s check complete" % manga.mal_id)
-                self.note()
+                self.note(
+                    'Jikan (MyAnimeList) manga ID %s discovered' % mal_id,
+                    'manga-discovered',
+                    mal_id=mal_id,
+                    comic_code=result.comic_code,
+                    depth=depth,
+                    frontier=len(self.frontier)
+                )
 
-                if comic_code and not comic_exist:
-                    total_new_comic += 1
-                    time.sleep(5)
+                yield result
 
-            page += 1
-            time.sleep(3)
+                if result.created:
+                    total_new_comic += 1
+                    self.clock.sleep(5)
+        finally:
+            self.flush()
 
-        return comics_code
+    def replay(self, max_attempts: int | None = None) -> Iterator[MangaResult]:
+        # A manga failing on several targets is fetched once and retried on those only
+        rows: dict[int, tuple[int, list[Target]]] = {}
 
-    def get_or_add_comic_complete(
-        self,
-        id: int
-    ):
-        api = jikan_openapi.MangaApi(self.client)
+        for target in self.targets:
+            if target.dead_letters is None:
+                continue
 
-        manga = None
+            for row in target.dead_letters.entries(max_attempts):
+                rows.setdefault(row['mal_id'], (row['depth'], []))[1].append(target)
 
         try:
-            response = api.get_manga_by_id(id)
+            for mal_id, (depth, targets) in rows.items():
+                # Fetched again, the poison may have been fixed on MyAnimeList meanwhile
+                manga = self.get_manga(mal_id)
+
+                if not manga or not self.manga_accepted(manga):
+                    for target in targets:
+                        target.dead_letters.remove(mal_id)
+
+                    self.note(
+                        'Jikan (MyAnimeList) manga ID %s dropped from dead letters' % mal_id,
+                        'manga-dropped',
+                        mal_id=mal_id,
+                        target=[v.name for v in targets]
+                    )
 
-            if not response.data:
-                return None
+                    continue
 
-            manga = response.data
-        except jikan_openapi.ApiException as e:
-            if e.status == 404:
-                return None
-            else:
-                raise e
+                yield self.__manga_result(manga, depth, 'replay', targets)
+        finally:
+            self.flush()
 
-        if not manga.mal_id:
-            return None
+    def remap(self, max_comic: int | None = None) -> Iterator[MangaResult]:
+        if self.archive is None:
+            return
 
-        if manga.type:
-            if self.bot.categorytype_comictype_code in self.bot.categorytypes:
-                comic_category_code = self.bot.categorytype_comictype_code
-                comic_category_code += ':' + manga.type.lower().replace(' ', '-')
+        total_comic = 0
 
-                if comic_category_code not in self.bot.categories:
-                    return None
-            else:
-                if manga.type in ['Novel', 'Light Novel']:
-                    return None
-        else:
-            return None
+        for mal_id in self.archive.mal_ids():
+            if max_comic and total_comic > max_comic - 1:
+                break
+
+            payload = self.archive.get(mal_id, 'manga')
+            if payload is None:
+                continue
+
+            manga = jikan_openapi.Manga.from_dict(payload)
+
+            if not manga or not self.manga_accepted(manga):
+                continue
+
+            started = self.clock.monotonic()
+
+            with self.tracer.span(
+                f'remap {mal_id}', 'manga',
+                mal_id=mal_id
+            ) as span:
+                # Mapped by the current rules, the deferred Jikan parts are not needed for the diff
+                record = self.manga_record_complete(manga)
+
+                results: list[MangaResult] = []
+
+                for target in self.targets:
+                    response = target.bot.list_comic_by_external_link(record.href)
+                    if not response:
+                        continue
+
+                    comic_code = response[0].code
+
+                    target.bot.authenticate()
 
-        self.note('Check Jikan (MyAnimeList) manga ID %s' % manga.mal_id)
+                    changes = target.pipeline.remap(record, comic_code)
+
+                    self.note(
+                        'Jikan (MyAnimeList) manga ID %s remapped' % mal_id,
+                        'manga-remapped',
+                        mal_id=mal_id,
+                        comic_code=comic_code,
+                        target=target.name,
+                        changes=changes
+                    )
+
+                    results.append(MangaResult(mal_id, comic_code, False, 0, 0.0, target=target.name))
+
+                span.args['requests'] = span.requests
+
+            if not results:
+                continue
+
+            for result in results:
+                result.requests = span.requests
+                result.duration = self.clock.monotonic() - started
+
+            result = results[0]
+            result.fanout = results[1:]
+
+            # Only remapped comics count, skipped archive entries do not
+            total_comic += 1
+
+            yield result
+
+    def get_or_add_comic_complete(
+        self,
+        id: int
+    ):
+        manga = self.get_manga(id)
+
+        if not manga or not self.manga_accepted(manga):
+            return None
 
-        comic_code = self.__manga_complete(manga)[0]
+        comic_code = self.__manga_result(manga, source='id').comic_code
 
-        self.note("Jikan (MyAnimeList) manga ID %s check complete" % manga.mal_id)
+        self.flush()
 
         return comic_code
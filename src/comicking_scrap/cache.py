@@ -0,0 +1,47 @@
+from typing import Any
+
+from .clock import Clock
+
+class ExistenceCache:
+    def __init__(self, negative_ttl: float = 300.0, clock: Clock | None = None):
+        self.negative_ttl = negative_ttl
+        self.clock = clock or Clock()
+
+        self.present: dict[str, Any] = {}
+        self.absent: dict[str, float] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        if key in self.present:
+            self.hits += 1
+
+            return True, self.present[key]
+
+        expires = self.absent.get(key)
+        if expires is not None:
+            if expires > self.clock.monotonic():
+                self.hits += 1
+
+                return True, None
+
+            self.absent.pop(key, None)
+
+        self.misses += 1
+
+        return False, None
+
+    def set(self, key: str, value: Any = True):
+        self.absent.pop(key, None)
+        self.present[key] = value
+
+    def set_absent(self, key: str):
+        self.present.pop(key, None)
+
+        if self.negative_ttl > 0:
+            self.absent[key] = self.clock.monotonic() + self.negative_ttl
+
+    def discard(self, key: str):
+        self.present.pop(key, None)
+        self.absent.pop(key, None)
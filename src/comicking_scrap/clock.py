@@ -0,0 +1,71 @@
+import time
+import threading
+
+class Clock:
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def ctime(self):
+        return time.ctime(self.time())
+
+class VirtualClock(Clock):
+    def __init__(self, start: float | None = None, frozen: bool = False):
+        self.start = time.time() if start is None else start
+        self.frozen = frozen
+
+        self.lock = threading.Lock()
+        self.real_started = time.monotonic()
+
+        # Skipped sleep seconds per thread, so parallel sleeps overlap instead of adding up
+        self.offsets: dict[int, float] = {}
+        self.latest = 0.0
+        self.slept = 0.0
+
+    def real_elapsed(self):
+        if self.frozen:
+            return 0.0
+
+        return time.monotonic() - self.real_started
+
+    def offset(self):
+        ident = threading.get_ident()
+        if ident not in self.offsets:
+            self.offsets[ident] = self.latest
+
+        return self.offsets[ident]
+
+    def elapsed(self):
+        with self.lock:
+            return self.real_elapsed() + self.latest
+
+    def monotonic(self) -> float:
+        with self.lock:
+            return self.real_elapsed() + self.offset()
+
+    def time(self) -> float:
+        return self.start + self.monotonic()
+
+    def sleep(self, seconds: float):
+        if seconds <= 0:
+            return
+
+        with self.lock:
+            offset = self.offset() + seconds
+
+            self.offsets[threading.get_ident()] = offset
+            self.latest = max(self.latest, offset)
+            self.slept += seconds
+
+    def advance(self, seconds: float):
+        with self.lock:
+            for k in self.offsets:
+                self.offsets[k] += seconds
+
+            self.latest += seconds
@@ -0,0 +1,224 @@
+import re
+import threading
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Any, Iterable
+from urllib.parse import urlparse
+
+from .clock import Clock
+
+class AdaptiveLimiter:
+    write_methods = ('POST', 'PUT', 'PATCH', 'DELETE')
+    overload_statuses = (429, 503)
+
+    def __init__(
+        self,
+        clock: Clock | None = None,
+        initial: float = 1.0,
+        minimum: float = 1.0,
+        maximum: float = 16.0,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_window: int = 64,
+        latency_tolerance: float = 2.0,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0
+    ):
+        self.clock = clock or Clock()
+
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+
+        self.latencies: deque[float] = deque(maxlen=latency_window)
+        self.latency_tolerance = latency_tolerance
+        self.baseline: float | None = None
+
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.decreased = float('-inf')
+        self.stats: Counter[str] = Counter()
+
+    def p95(self):
+        if len(self.latencies) < max(self.latencies.maxlen // 4, 1):
+            return None
+
+        latencies = sorted(self.latencies)
+
+        return latencies[int(len(latencies) * 0.95) - 1]
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+
+            self.in_flight += 1
+
+        return self.clock.monotonic()
+
+    def release(self, started: float, status: int):
+        now = self.clock.monotonic()
+
+        with self.condition:
+            self.in_flight -= 1
+            self.stats['requests'] += 1
+
+            overloaded = status in self.overload_statuses
+            failed = overloaded or status >= 500
+
+            if not failed:
+                self.latencies.append(now - started)
+
+            p95 = self.p95()
+            if p95 is not None and (self.baseline is None or p95 < self.baseline):
+                self.baseline = p95
+
+            slow = p95 is not None and self.baseline is not None and p95 > self.baseline * self.latency_tolerance
+
+            if overloaded:
+                self.stats['overloaded'] += 1
+            elif failed:
+                self.stats['errors'] += 1
+            elif slow:
+                self.stats['slow'] += 1
+
+            if failed or slow:
+                # Only react once per window, i.e. to requests started after the previous cut
+                if started >= self.decreased:
+                    if slow and self.limit <= self.minimum:
+                        # Nothing left to cut, the service is just slower now
+                        self.baseline = p95
+                    else:
+                        self.limit = max(self.minimum, self.limit * self.decrease)
+                        self.stats['decreases'] += 1
+
+                    self.decreased = now
+                    self.latencies.clear()
+            else:
+                self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+
+            self.condition.notify_all()
+
+    @staticmethod
+    def retry_after(response: Any):
+        if hasattr(response, 'getheader'):
+            return response.getheader('Retry-After')
+
+        return None
+
+    def retryable(
+        self,
+        method: str,
+        url: str,
+        body: Any,
+        response: Any,
+        keyed_creates: list[tuple[re.Pattern, tuple[str, ...]]]
+    ):
+        if response.status not in self.overload_statuses:
+            return False
+
+        if response.status == 429 or method.upper() != 'POST' or self.retry_after(response):
+            return True
+
+        # A blind 503 may come after the create was committed, only a client keyed create is safe to send again
+        path = urlparse(url).path
+
+        return isinstance(body, dict) and any(
+            pattern.search(path) and all(body.get(v) is not None for v in fields)
+            for pattern, fields in keyed_creates
+        )
+
+    def retry_delay(self, response: Any, retries: int):
+        retry_after = self.retry_after(response)
+
+        try:
+            delay = float(retry_after) if retry_after else self.backoff * 2 ** retries
+        except ValueError:
+            delay = self.backoff * 2 ** retries
+
+        return min(delay, self.max_backoff)
+
+    def instrument(self, client: Any, keyed_creates: Iterable[tuple[str, tuple[str, ...]]] = ()):
+        call_api = client.call_api
+
+        # POST paths (pattern, key fields) whose key the client chooses, created twice it is a 409
+        keyed = [(re.compile(k), v) for k, v in keyed_creates]
+
+        def wrapper(method: str, url: str, *args: Any, **kwargs: Any):
+            if method.upper() not in self.write_methods:
+                return call_api(method, url, *args, **kwargs)
+
+            retries = 0
+            while True:
+                started = self.acquire()
+
+                status = 599
+                try:
+                    response = call_api(method, url, *args, **kwargs)
+                    status = response.status
+                finally:
+                    self.release(started, status)
+
+                body = kwargs.get('body', args[1] if len(args) > 1 else None)
+
+                if retries >= self.max_retries or not self.retryable(method, url, body, response, keyed):
+                    return response
+
+                self.clock.sleep(self.retry_delay(response, retries))
+                self.stats['retries'] += 1
+                retries += 1
+
+        client.call_api = wrapper
+
+        return client
+
+class Pacer:
+    def __init__(self, interval: float, clock: Clock | None = None):
+        self.interval = interval
+        self.clock = clock or Clock()
+
+        self.lock = threading.Lock()
+        self.next = float('-inf')
+
+    def wait(self):
+        with self.lock:
+            now = self.clock.monotonic()
+            delay = self.next - now
+
+            self.next = max(now, self.next) + self.interval
+
+        self.clock.sleep(delay)
+
+    def instrument(self, client: Any):
+        call_api = client.call_api
+
+        def wrapper(*args: Any, **kwargs: Any):
+            self.wait()
+
+            return call_api(*args, **kwargs)
+
+        client.call_api = wrapper
+
+        return client
+
+def wait_all(futures: Iterable[Future]):
+    results = []
+    error = None
+
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            error = error or e
+
+    if error:
+        raise error
+
+    return results
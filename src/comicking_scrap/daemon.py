@@ -0,0 +1,224 @@
+import json
+import signal
+import logging
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from .bot import Bot
+from .bot_jikan import BotJikan
+
+class Daemon:
+    def __init__(
+        self,
+        bot: Bot,
+        bot_jikan: BotJikan,
+        logger: logging.Logger,
+        interval: float = 3600.0,
+        max_new_comic: int | None = None,
+        recrawl_budget: int = 0,
+        discover_max_new_comic: int = 0,
+        health_address: tuple[str, int] | None = None
+    ):
+        self.bot = bot
+        self.bot_jikan = bot_jikan
+        self.logger = logger
+        self.interval = interval
+        self.max_new_comic = max_new_comic
+        self.recrawl_budget = recrawl_budget
+        self.discover_max_new_comic = discover_max_new_comic
+
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+
+        self.cycles = 0
+        self.totals: Counter[str] = Counter()
+        self.cycle: dict[str, Any] = {}
+        self.last_success: float | None = None
+        self.started = bot.clock.time()
+
+        self.httpd: ThreadingHTTPServer | None = None
+        if health_address:
+            self.httpd = ThreadingHTTPServer(health_address, self.handler_class())
+            self.httpd.daemon_threads = True
+
+    def stop(self, *args: Any):
+        self.stopped.set()
+
+    def run(self):
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+
+        if self.httpd:
+            threading.Thread(target=self.httpd.serve_forever, name='daemon-health', daemon=True).start()
+
+            self.logger.info('Daemon health on http://%s:%s/health', *self.httpd.server_address[:2])
+
+        try:
+            while not self.stopped.is_set():
+                self.run_cycle()
+
+                self.stopped.wait(self.interval)
+        finally:
+            if self.httpd:
+                self.httpd.shutdown()
+                self.httpd.server_close()
+
+        self.logger.info('Daemon stopped after %s cycles', self.cycles)
+
+    def run_cycle(self):
+        clock = self.bot.clock
+
+        cycle: dict[str, Any] = {
+            'number': self.cycles + 1,
+            'started': clock.time(),
+            'processed': 0,
+            'created': 0,
+            'discovered': 0,
+            'failed': 0,
+            'recrawled': 0,
+            'requests': 0,
+            'error': None
+        }
+
+        with self.lock:
+            self.cycle = cycle
+
+        try:
+            for target in self.bot_jikan.targets:
+                target.bot.authenticate()
+                target.bot.load(False, incremental=True)
+
+            for result in self.bot_jikan.iter_comics_complete(self.max_new_comic):
+                with self.lock:
+                    cycle['processed'] += 1
+                    cycle['created'] += int(result.created)
+                    cycle['failed'] += sum(int(v.error is not None) for v in [result, *result.fanout])
+                    cycle['requests'] += result.requests
+
+                if self.stopped.is_set():
+                    break
+
+            for result in self.bot_jikan.iter_discover_complete(self.discover_max_new_comic):
+                with self.lock:
+                    cycle['discovered'] += int(result.created)
+                    cycle['failed'] += sum(int(v.error is not None) for v in [result, *result.fanout])
+                    cycle['requests'] += result.requests
+
+                if self.stopped.is_set():
+                    break
+
+            for result in self.bot_jikan.recrawl(self.recrawl_budget):
+                with self.lock:
+                    cycle['recrawled'] += 1
+                    cycle['requests'] += result.requests
+
+                if self.stopped.is_set():
+                    break
+
+            self.last_success = clock.time()
+        except Exception as e:
+            cycle['error'] = repr(e)
+
+            self.logger.exception('Daemon cycle %s failed', cycle['number'])
+
+        cycle['stopped'] = clock.time()
+        cycle['duration'] = cycle['stopped'] - cycle['started']
+
+        with self.lock:
+            self.cycles += 1
+            self.totals.update({k: cycle[k] for k in ('processed', 'created', 'discovered', 'failed', 'recrawled', 'requests')})
+            self.totals['errors'] += int(cycle['error'] is not None)
+
+        self.logger.info(
+            'Daemon cycle %s done in %.1fs, %s processed, %s created, %s discovered, %s failed, %s recrawled',
+            cycle['number'], cycle['duration'], cycle['processed'], cycle['created'], cycle['discovered'],
+            cycle['failed'], cycle['recrawled']
+        )
+
+    def healthy(self):
+        if self.cycles == 0:
+            return True
+
+        # Stale when no cycle succeeded within the last three intervals
+        return self.last_success is not None and \
+            self.bot.clock.time() - self.last_success < self.interval * 3 + (self.cycle.get('duration') or 0)
+
+    def stats(self):
+        bot = self.bot
+
+        with self.lock:
+            return {
+                'uptime': bot.clock.time() - self.started,
+                'cycles': self.cycles,
+                'cycle': dict(self.cycle),
+                'last_success': self.last_success,
+                'totals': dict(self.totals),
+                'catalogs': {
+                    'languages': len(bot.languages),
+                    'websites': len(bot.websites),
+                    'categorytypes': len(bot.categorytypes),
+                    'categories': len(bot.categories),
+                    'tagtypes': len(bot.tagtypes),
+                    'tags': len(bot.tags),
+                    'comicrelationtypes': len(bot.comicrelationtypes),
+                    'comicauthorpositions': len(bot.comicauthorpositions),
+                    'persons': len(bot.persons),
+                    'magazines': len(bot.magazines),
+                    'characters': len(bot.characters)
+                },
+                'cache': {
+                    'hits': bot.cache.hits,
+                    'misses': bot.cache.misses,
+                    'present': len(bot.cache.present),
+                    'absent': len(bot.cache.absent)
+                },
+                'writes': {
+                    'limit': bot.writes.limit,
+                    'in_flight': bot.writes.in_flight,
+                    **bot.writes.stats
+                },
+                'flight': dict(bot.flight.stats),
+                'seen': len(self.bot_jikan.seen),
+                'dead_letters': len(self.bot_jikan.dead_letters) if self.bot_jikan.dead_letters is not None else None,
+                'frontier': len(self.bot_jikan.frontier) if self.bot_jikan.frontier is not None else None,
+                'targets': {
+                    target.name: {
+                        'seen': len(target.seen),
+                        'dead_letters': len(target.dead_letters) if target.dead_letters is not None else None,
+                        'writes': {
+                            'limit': target.bot.writes.limit,
+                            'in_flight': target.bot.writes.in_flight
+                        }
+                    }
+                    for target in self.bot_jikan.targets
+                }
+            }
+
+    def handler_class(self):
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/health':
+                    healthy = daemon.healthy()
+                    status, body = (200 if healthy else 503), {'status': 'ok' if healthy else 'stale'}
+                elif self.path == '/stats':
+                    status, body = 200, daemon.stats()
+                else:
+                    status, body = 404, {'message': 'Not Found'}
+
+                data = json.dumps(body, default=str).encode()
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: str, *args: Any):
+                pass
+
+        return Handler
@@ -0,0 +1,69 @@
+import json
+import traceback
+from typing import Any
+
+from .clock import Clock
+from .store import Store
+
+class DeadLetterQueue:
+    def __init__(self, store: Store, clock: Clock | None = None):
+        self.store = store
+        self.clock = clock or Clock()
+
+    @staticmethod
+    def describe(error: Exception):
+        context: dict[str, Any] = {
+            'type': f'{type(error).__module__}.{type(error).__qualname__}',
+            'message': str(error),
+            'traceback': ''.join(traceback.format_exception(error))
+        }
+
+        # ComicKing and Jikan ApiException carry the failed response
+        for k in ('status', 'reason', 'body'):
+            v = getattr(error, k, None)
+            if v is not None:
+                context[k] = v if isinstance(v, (int, str)) else str(v)
+
+        return context
+
+    def record(self, mal_id: int, source: str, depth: int, payload: Any, error: Exception):
+        now = self.clock.time()
+
+        self.store.execute(
+            '''
+            INSERT INTO dead_letter (
+                mal_id, source, depth, payload, error, attempts, first_failed, last_failed
+            ) VALUES (?, ?, ?, ?, ?, 1, ?, ?)
+            ON CONFLICT (mal_id) DO UPDATE SET
+                source = excluded.source,
+                depth = excluded.depth,
+                payload = excluded.payload,
+                error = excluded.error,
+                attempts = attempts + 1,
+                last_failed = excluded.last_failed
+            ''',
+            (
+                mal_id,
+                source,
+                depth,
+                json.dumps(payload, default=str, ensure_ascii=False),
+                json.dumps(self.describe(error), default=str, ensure_ascii=False),
+                now,
+                now
+            )
+        )
+
+    def remove(self, mal_id: int):
+        self.store.execute('DELETE FROM dead_letter WHERE mal_id = ?', (mal_id,))
+
+    def entries(self, max_attempts: int | None = None):
+        if max_attempts:
+            return self.store.query(
+                'SELECT * FROM dead_letter WHERE attempts < ? ORDER BY first_failed',
+                (max_attempts,)
+            )
+
+        return self.store.query('SELECT * FROM dead_letter ORDER BY first_failed')
+
+    def __len__(self):
+        return self.store.query('SELECT COUNT(*) AS count FROM dead_letter')[0]['count']
@@ -0,0 +1,61 @@
+import re
+import threading
+
+from .store import Store
+
+class EntityIndex:
+    def __init__(self, kind: str, prefix: str = 'mal-', store: Store | None = None):
+        self.kind = kind
+        self.prefix = prefix
+        self.store = store
+
+        self.lock = threading.Lock()
+        self.codes: dict[int, str] = {}
+
+        self.pattern = re.compile('^%s(\\d+)$' % re.escape(prefix))
+
+        self.hits = 0
+        self.misses = 0
+
+        if store:
+            for row in store.query('SELECT external_id, code FROM entity_index WHERE kind = ?', (kind,)):
+                self.codes[row['external_id']] = row['code']
+
+    def code(self, external_id: int):
+        # Deterministic, a lost index can be rebuilt from ComicKing alone
+        return f'{self.prefix}{external_id}'
+
+    def external_id(self, code: str):
+        m = self.pattern.match(code)
+
+        return int(m[1]) if m else None
+
+    def get(self, external_id: int):
+        code = self.codes.get(external_id)
+
+        with self.lock:
+            if code:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        return code
+
+    def set(self, external_id: int, code: str):
+        with self.lock:
+            if self.codes.get(external_id) == code:
+                return
+
+            self.codes[external_id] = code
+
+        if self.store:
+            self.store.execute(
+                '''
+                INSERT INTO entity_index (kind, external_id, code) VALUES (?, ?, ?)
+                ON CONFLICT (kind, external_id) DO UPDATE SET code = excluded.code
+                ''',
+                (self.kind, external_id, code)
+            )
+
+    def __len__(self):
+        return len(self.codes)
@@ -0,0 +1,81 @@
+import heapq
+import itertools
+import threading
+
+from .seenset import SeenSet
+
+class Frontier:
+    # ComicKing relation type -> how likely the related manga belongs to the same franchise
+    relation_weights = {
+        'sequel': 4.0,
+        'prequel': 4.0,
+        'parent-story': 3.0,
+        'full-story': 3.0,
+        'side-story': 2.0,
+        'spin-off': 2.0,
+        'alternative-setting': 1.0,
+        'alternative-version': 1.0,
+        'character': 1.0,
+        'summary': 0.5,
+        'other': 0.5
+    }
+
+    recommendation_weight = 0.25
+
+    def __init__(self, seen: SeenSet | None = None, max_depth: int = 3, max_size: int = 100000):
+        self.seen = seen if seen is not None else SeenSet()
+        self.max_depth = max_depth
+        self.max_size = max_size
+
+        self.lock = threading.Lock()
+        self.heap: list[tuple[float, int, int]] = []
+        self.scores: dict[int, float] = {}
+        self.depths: dict[int, int] = {}
+        self.counter = itertools.count()
+
+    def push(self, mal_id: int, weight: float, depth: int = 1):
+        if depth > self.max_depth or mal_id in self.seen:
+            return False
+
+        with self.lock:
+            if mal_id not in self.scores and len(self.scores) >= self.max_size:
+                return False
+
+            # Every edge pointing at a manga adds up, franchise hubs rise to the top
+            score = self.scores.get(mal_id, 0.0) + weight / depth
+
+            self.scores[mal_id] = score
+            self.depths[mal_id] = min(self.depths.get(mal_id, depth), depth)
+
+            # Older heap entries of the same manga become stale and are skipped on pop
+            heapq.heappush(self.heap, (-score, next(self.counter), mal_id))
+
+        return True
+
+    def push_relation(self, mal_id: int, relation_type_code: str, depth: int = 1):
+        return self.push(mal_id, self.relation_weights.get(relation_type_code, 0.5), depth)
+
+    def push_recommendation(self, mal_id: int, rank: int, depth: int = 1):
+        # Jikan lists recommendations by votes, the rank stands in for them
+        return self.push(mal_id, self.recommendation_weight / (rank + 1), depth)
+
+    def pop(self):
+        with self.lock:
+            while self.heap:
+                score, _, mal_id = heapq.heappop(self.heap)
+
+                if self.scores.get(mal_id) != -score:
+                    continue
+
+                del self.scores[mal_id]
+                depth = self.depths.pop(mal_id)
+
+                if mal_id in self.seen:
+                    continue
+
+                return mal_id, depth
+
+        return None
+
+    def __len__(self):
+        return len(self.scores)
@@ -0,0 +1,114 @@
+import os
+import json
+import queue
+import logging
+import logging.handlers
+import threading
+from typing import Any
+
+from .clock import Clock
+
+class NoteWriter:
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+        clock: Clock | None = None
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # Stamped like the trace, cache and dead letters, a virtual clock keeps runs reproducible
+        self.clock = clock or Clock()
+
+        self.queue: queue.SimpleQueue[dict[str, Any] | None] = queue.SimpleQueue()
+        self.file = open(path, 'a', encoding='utf-8')
+
+        self.thread = threading.Thread(
+            target=self.loop,
+            name='note-writer',
+            daemon=True
+        )
+        self.thread.start()
+
+    def write(self, event: str, **fields: Any):
+        self.queue.put({'time': self.clock.time(), 'event': event, **fields})
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+        self.file.close()
+
+    def loop(self):
+        stopped = False
+
+        while not stopped:
+            batch = []
+
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+                while True:
+                    if item is None:
+                        stopped = True
+                        break
+
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+
+                    item = self.queue.get_nowait()
+            except queue.Empty:
+                pass
+
+            if not batch:
+                continue
+
+            self.file.write(''.join(
+                json.dumps(v, ensure_ascii=False, default=str) + '\n' for v in batch
+            ))
+            self.file.flush()
+
+            if self.max_bytes > 0 and self.file.tell() >= self.max_bytes:
+                self.rotate()
+
+    def rotate(self):
+        self.file.close()
+
+        for i in range(self.backup_count - 1, 0, -1):
+            source, target = f'{self.path}.{i}', f'{self.path}.{i + 1}'
+            if os.path.exists(source):
+                os.replace(source, target)
+
+        if self.backup_count > 0:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+def configure_logging(level: str = 'INFO'):
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(
+        '%(asctime)s %(levelname)s %(name)s: %(message)s'
+    ))
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    for name in ('urllib3', 'comicking_openapi', 'jikan_openapi'):
+        logging.getLogger(name).setLevel(max(root.level, logging.WARNING))
+
+    return listener
@@ -0,0 +1,110 @@
+import os
+import re
+import json
+import yaml
+import importlib.resources
+from typing import Any
+
+def spec_path(name: str):
+    path = os.getenv(f'COMICKING_SCRAP_OPENAPI_{name.upper()}')
+    if path:
+        return path
+
+    # Installed, the specs are package data, in a checkout they are read from api/
+    spec = importlib.resources.files(__package__ or 'comicking_scrap').joinpath('spec')
+    base = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    for v in (f'openapi-{name}.yaml', f'openapi-{name}.json'):
+        resource = spec.joinpath(v)
+        if resource.is_file():
+            return str(resource)
+
+        path = os.path.join(base, 'api', v)
+        if os.path.exists(path):
+            return path
+
+    raise FileNotFoundError('OpenAPI spec "%s" not found' % name)
+
+def load_spec(path: str) -> dict[str, Any]:
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.json'):
+            return json.load(f)
+
+        return yaml.safe_load(f)
+
+def resolve(spec: dict[str, Any], value: Any) -> Any:
+    while isinstance(value, dict) and '$ref' in value:
+        node: Any = spec
+        for k in value['$ref'].lstrip('#/').split('/'):
+            node = node[k]
+
+        value = node
+
+    return value
+
+class Operation:
+    def __init__(
+        self,
+        spec: dict[str, Any],
+        path: str,
+        method: str,
+        operation: dict[str, Any],
+        base_path: str = ''
+    ):
+        self.id: str = operation['operationId']
+        self.path = path
+        self.method = method.upper()
+        self.secured = bool(operation.get('security'))
+
+        self.parameters: list[dict[str, Any]] = [
+            resolve(spec, v) for v in operation.get('parameters', [])
+        ]
+
+        self.path_params: list[str] = re.findall(r'{(\w+)}', path)
+
+        self.request_schema = None
+        request_body = resolve(spec, operation.get('requestBody'))
+        if request_body:
+            content = request_body.get('content', {}).get('application/json', {})
+            self.request_schema = resolve(spec, content.get('schema'))
+
+        self.response_schema = None
+        for status, response in operation.get('responses', {}).items():
+            if not str(status).startswith('2'):
+                continue
+
+            content = resolve(spec, response).get('content', {}).get('application/json', {})
+            self.response_schema = resolve(spec, content.get('schema'))
+            break
+
+        pattern = re.escape(base_path + path)
+        for name in self.path_params:
+            tail = path.endswith('{%s}' % name)
+            pattern = pattern.replace(
+                re.escape('{%s}' % name),
+                '(?P<%s>%s)' % (name, '[^/]+' if tail else '[^/:]+'),
+                1
+            )
+
+        self.pattern = re.compile('^' + pattern + '$')
+
+    def match(self, method: str, path: str):
+        if method != self.method:
+            return None
+
+        return self.pattern.match(path)
+
+def compile_operations(spec: dict[str, Any], base_path: str = ''):
+    operations: list[Operation] = []
+
+    for path, item in spec.get('paths', {}).items():
+        for method, operation in item.items():
+            if not isinstance(operation, dict) or 'operationId' not in operation:
+                continue
+
+            operations.append(Operation(spec, path, method, operation, base_path))
+
+    # Literal segments win over templated ones, e.g. "/manga/{id}/full" over "/manga/{id}"
+    operations.sort(key=lambda v: (len(v.path_params), -len(v.path)))
+
+    return operations
@@ -0,0 +1,80 @@
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Callable, Iterator
+
+def header(headers: Any, name: str) -> str | None:
+    if not headers:
+        return None
+
+    name = name.lower()
+    for k, v in headers.items():
+        if k.lower() == name:
+            return v
+
+    return None
+
+def paginate(
+    fetch: Callable[..., Any],
+    *args: Any,
+    limit: int = 15,
+    executor: Executor | None = None,
+    prefetch: int = 4,
+    **kwargs: Any
+) -> Iterator[Any]:
+    response = fetch(*args, page=1, limit=limit, **kwargs)
+    if not response.data:
+        return
+
+    yield from response.data
+
+    total_count = header(response.headers, 'X-Total-Count')
+
+    # The server may clamp the limit, page math has to use the one it applied
+    limit = int(header(response.headers, 'X-Pagination-Limit') or limit)
+
+    if total_count is None:
+        page = 1
+        while len(response.data) >= limit:
+            page += 1
+
+            response = fetch(*args, page=page, limit=limit, **kwargs)
+            if not response.data:
+                return
+
+            yield from response.data
+
+        return
+
+    pages = (int(total_count) + limit - 1) // limit
+
+    if not executor:
+        for page in range(2, pages + 1):
+            response = fetch(*args, page=page, limit=limit, **kwargs)
+            if not response.data:
+                return
+
+            yield from response.data
+
+        return
+
+    remaining = iter(range(2, pages + 1))
+    futures = deque(
+        executor.submit(fetch, *args, page=page, limit=limit, **kwargs)
+        for _, page in zip(range(prefetch), remaining)
+    )
+
+    try:
+        while futures:
+            response = futures.popleft().result()
+
+            page = next(remaining, None)
+            if page is not None:
+                futures.append(executor.submit(fetch, *args, page=page, limit=limit, **kwargs))
+
+            if not response.data:
+                return
+
+            yield from response.data
+    finally:
+        for future in futures:
+            future.cancel()
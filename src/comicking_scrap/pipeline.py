@@ -0,0 +1,594 @@
+import comicking_openapi
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Callable
+from urllib.parse import urlparse
+
+from .bot import Bot
+from .concurrency import wait_all
+from .validation import ValidationError, normalize_host, normalize_reference, normalize_text
+
+class Term:
+    def __init__(self, type_code: str, code: str, name: str, kind: str):
+        self.type_code = type_code
+        self.code = code
+        self.name = name
+        self.kind = kind
+
+class Title:
+    def __init__(self, language_lang: str | None, content: str, kind: str):
+        self.language_lang = language_lang
+        self.content = content
+        self.kind = kind
+
+class External:
+    def __init__(
+        self,
+        url: str,
+        name: str | None = None,
+        is_official: bool | None = None,
+        is_community: bool | None = None
+    ):
+        self.url = url
+        self.name = name
+        self.is_official = is_official
+        self.is_community = is_community
+
+class Relation:
+    def __init__(self, type_code: str, host: str, path: str, external_id: int, distance: int = 1):
+        self.type_code = type_code
+        self.host = host
+        self.path = path
+        self.external_id = external_id
+        self.distance = distance
+
+    @property
+    def href(self):
+        return f'{self.host}{self.path}'
+
+class ComicRecord:
+    def __init__(
+        self,
+        host: str,
+        path: str,
+        external_id: int,
+        label: str = 'Comic',
+        depth: int = 0,
+        context: dict[str, Any] | None = None
+    ):
+        # The source page of the comic, it doubles as its identity in ComicKing
+        self.host = host
+        self.path = path
+        self.external_id = external_id
+
+        self.label = label
+        self.depth = depth
+        self.context = context or {}
+
+        self.published_from: datetime | None = None
+        self.published_to: datetime | None = None
+        self.total_chapter: int | None = None
+        self.total_volume: int | None = None
+
+        self.comic_type: Term | None = None
+        self.status: Term | None = None
+        self.categories: list[Term] = []
+        self.tags: list[Term] = []
+
+        self.titles: list[Title] = []
+        self.synopses: list[tuple[str, str, str | None]] = []
+        self.covers: list[tuple[str, str]] = []
+        self.externals: list[External] = []
+        self.authors: list[tuple[int, str, str]] = []
+        self.serializations: list[tuple[int, str]] = []
+        self.characters: list[tuple[int, str, bool]] = []
+        self.relations: list[Relation] = []
+
+        # Parts that cost source requests, only loaded when the engine needs them
+        self.deferred: dict[str, Callable[[], list[Any]]] = {}
+
+        self.comic_code: str | None = None
+        self.created = False
+
+    @property
+    def href(self):
+        return f'{self.host}{self.path}'
+
+    def get(self, name: str) -> list[Any]:
+        load = self.deferred.get(name)
+        if load:
+            # Dropped once loaded, a failed load is tried again by the next run
+            getattr(self, name).extend(load())
+
+            del self.deferred[name]
+
+        return getattr(self, name)
+
+class Pipeline:
+    def __init__(
+        self,
+        bot: Bot,
+        on_relation: Callable[[ComicRecord, Relation, str | None], None] | None = None
+    ):
+        self.bot = bot
+        self.tracer = bot.tracer
+        self.on_relation = on_relation
+
+    def note(self, record: ComicRecord, __message: str, event: str = 'note', **fields: Any):
+        self.bot.note(__message, event, **record.context, comic_code=record.comic_code, **fields)
+
+    def run(self, record: ComicRecord):
+        bot = self.bot
+
+        # A record can be run through several pipelines, one per ComicKing instance
+        record.comic_code, record.created = None, False
+
+        with self.tracer.span('lookup'):
+            response0 = bot.list_comic_by_external_link(record.href)
+
+        bot.authenticate()
+
+        # Comic
+
+        with self.tracer.span('comic'):
+            if len(response0) < 1:
+                response0Z = bot.add_comic(
+                    published_from=record.published_from,
+                    published_to=record.published_to,
+                    total_chapter=record.total_chapter,
+                    total_volume=record.total_volume
+                )
+
+                record.comic_code, record.created = response0Z.code, True
+
+                # Comic External (source)
+
+                bot.ensure_link(record.host, record.path)
+                bot.add_comic_external(record.comic_code, record.host, record.path, is_community=True)
+            else:
+                if len(response0) > 1:
+                    self.note(
+                        record,
+                        'Detected multiple comic with same %s' % record.href,
+                        'comic-duplicate',
+                        comic_code=[v.code for v in response0]
+                    )
+
+                record.comic_code = response0[0].code
+
+        comic_code = record.comic_code
+        comic_exist = not record.created
+
+        # Source requests go out first and one by one, they are rate limited by the source
+
+        with self.tracer.span('fetch'):
+            record.get('covers')
+
+            if not comic_exist:
+                for name in list(record.deferred):
+                    record.get(name)
+
+        with self.tracer.span('characters'):
+            character_codes: dict[int, str] = {}
+
+            if not comic_exist and record.characters:
+                character_codes = bot.resolve_characters({k: name for k, name, _ in record.characters})
+
+        # Everything below only depends on the comic, written concurrently
+
+        with self.tracer.span('writes'):
+            futures: list[Future] = [bot.submit(self.phase, 'cover', self.covers, record, comic_exist)]
+
+            if not comic_exist:
+                if record.comic_type:
+                    futures += self.terms(record, [record.comic_type], bot.categories, bot.add_comic_category)
+
+                if record.status:
+                    futures += self.terms(record, [record.status], bot.tags, bot.add_comic_tag)
+
+                futures += self.terms(record, record.categories, bot.categories, bot.add_comic_category)
+                futures += self.terms(record, record.tags, bot.tags, bot.add_comic_tag)
+
+                titles: list[Title] = []
+                for title in record.titles:
+                    if title.language_lang not in bot.languages:
+                        self.note(
+                            record,
+                            '%s Title "%s" Type "%s" is skipped' % (record.label, title.content, title.kind),
+                            'title-skipped',
+                            reason=title.kind
+                        )
+                        continue
+
+                    titles.append(title)
+
+                # One task, titles are created in source order like the covers
+                if titles:
+                    futures.append(bot.submit(self.phase, 'titles', self.titles, record, titles))
+
+                for synopsis in record.synopses:
+                    futures.append(bot.submit(self.phase, 'synopsis', self.synopsis, record, *synopsis))
+
+                if bot.comicauthorposition_author_code in bot.comicauthorpositions:
+                    for external_id, name, position_code in record.authors:
+                        futures.append(bot.submit(self.phase, 'authors', self.author, record, position_code, external_id, name))
+
+                for external_id, name in record.serializations:
+                    futures.append(bot.submit(self.phase, 'authors', self.serialization, record, external_id, name))
+
+                for external_id, _, is_main in record.characters:
+                    futures.append(bot.submit(
+                        self.phase,
+                        'characters',
+                        bot.add_comic_character,
+                        comic_code,
+                        character_codes[external_id],
+                        is_main=True if is_main else None
+                    ))
+
+                for external in record.externals:
+                    futures.append(bot.submit(self.phase, 'externals', self.external, record, external))
+
+                relations: dict[tuple[str, str], Relation] = {}
+                for relation in record.relations:
+                    if relation.href == record.href:
+                        continue
+
+                    if relation.type_code not in bot.comicrelationtypes:
+                        self.note(
+                            record,
+                            '%s Relation "%s" is skipped' % (record.label, relation.type_code),
+                            'relation-skipped',
+                            reason=relation.type_code
+                        )
+                        continue
+
+                    relations.setdefault((relation.type_code, relation.href), relation)
+
+                for relation in relations.values():
+                    futures.append(bot.submit(self.phase, 'relations', self.relation, record, relation))
+
+            wait_all(futures)
+
+        return comic_code, comic_exist
+
+    def phase(self, name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any):
+        # Opened on the executor thread, nested under the manga span by Tracer.bind
+        with self.tracer.span(name):
+            return fn(*args, **kwargs)
+
+    def refresh(self, record: ComicRecord, comic_code: str, covers: bool = True):
+        bot = self.bot
+
+        record.comic_code, record.created = comic_code, False
+
+        bot.update_comic(
+            comic_code,
+            published_from=record.published_from,
+            published_to=record.published_to,
+            total_chapter=record.total_chapter,
+            total_volume=record.total_volume
+        )
+
+        # Covers are listed once per comic, skipped when the run just synced them
+        if covers:
+            with self.tracer.span('cover'):
+                record.get('covers')
+
+                self.covers(record, True)
+
+        # Titles and synopses are part of the fingerprint, a change in them is written too
+        futures: list[Future] = self.sync_titles(record) + self.sync_synopses(record)
+
+        status = record.status
+        if status and f'{status.type_code}:{status.code}' in bot.tags:
+            comic_statuses = bot.list_comic_tag_codes(comic_code, status.type_code)
+
+            for v in comic_statuses:
+                if v != status.code:
+                    bot.delete_comic_tag(comic_code, status.type_code, v)
+
+            if status.code not in comic_statuses:
+                bot.add_comic_tag(comic_code, status.type_code, status.code)
+
+        wait_all(futures)
+
+    def remap(self, record: ComicRecord, comic_code: str):
+        bot = self.bot
+
+        record.comic_code, record.created = comic_code, False
+
+        # Only what the mapping would write differently, read from ComicKing first
+
+        futures: list[Future] = []
+
+        futures += self.remap_terms(
+            record,
+            [record.comic_type, *record.categories],
+            bot.categories,
+            bot.list_comic_category_codes,
+            bot.add_comic_category,
+            bot.delete_comic_category
+        )
+        futures += self.remap_terms(
+            record,
+            [record.status, *record.tags],
+            bot.tags,
+            bot.list_comic_tag_codes,
+            bot.add_comic_tag,
+            bot.delete_comic_tag
+        )
+
+        futures += self.sync_titles(record)
+
+        wait_all(futures)
+
+        return len(futures)
+
+    def sync_titles(self, record: ComicRecord):
+        bot = self.bot
+
+        titles: dict[str, set[str]] = {}
+        for title in record.titles:
+            if title.language_lang in bot.languages:
+                titles.setdefault(normalize_text(title.content), set()).add(title.language_lang)
+
+        comic_titles = bot.list_comic_titles(record.comic_code)
+
+        futures: list[Future] = []
+
+        # A title moved to another language is replaced, titles the source does not know are kept
+        for comic_title in comic_titles:
+            languages = titles.get(comic_title.content)
+            if languages and comic_title.language_lang not in languages:
+                futures.append(bot.submit(bot.delete_comic_title, record.comic_code, comic_title.ulid))
+
+        missing: list[Title] = []
+        for content, languages in titles.items():
+            for language_lang in languages:
+                if not any(v.content == content and v.language_lang == language_lang for v in comic_titles):
+                    missing.append(Title(language_lang, content, 'title'))
+
+        if missing:
+            futures.append(bot.submit(self.phase, 'titles', self.titles, record, missing))
+
+        return futures
+
+    def sync_synopses(self, record: ComicRecord):
+        bot = self.bot
+
+        comic_synopses = bot.list_comic_synopses(record.comic_code)
+
+        futures: list[Future] = []
+
+        # A synopsis is matched by language and source, another text of it is updated in place
+        for language_lang, content, source in record.synopses:
+            comic_synopsis = next(
+                (v for v in comic_synopses if v.language_lang == language_lang and v.source == source),
+                None
+            )
+
+            if not comic_synopsis:
+                futures.append(bot.submit(self.phase, 'synopsis', self.synopsis, record, language_lang, content, source))
+            elif comic_synopsis.content != normalize_text(content):
+                futures.append(bot.submit(
+                    self.phase,
+                    'synopsis',
+                    bot.update_comic_synopsis,
+                    record.comic_code,
+                    comic_synopsis.ulid,
+                    content
+                ))
+
+        return futures
+
+    def remap_terms(
+        self,
+        record: ComicRecord,
+        terms: list[Term | None],
+        catalog: list[str],
+        list_codes: Callable[[str, str], list[str]],
+        add: Callable[[str, str, str], Any],
+        delete: Callable[[str, str, str], Any]
+    ):
+        codes: dict[str, set[str]] = {}
+        for term in terms:
+            if term and f'{term.type_code}:{term.code}' in catalog:
+                codes.setdefault(term.type_code, set()).add(term.code)
+
+        futures: list[Future] = []
+
+        # A type is only pruned when the record maps something in it
+        for type_code, wanted in codes.items():
+            current = list_codes(record.comic_code, type_code)
+
+            for code in wanted:
+                if code not in current:
+                    futures.append(self.bot.submit(add, record.comic_code, type_code, code))
+
+            for code in current:
+                if code not in wanted:
+                    futures.append(self.bot.submit(delete, record.comic_code, type_code, code))
+
+        return futures
+
+    def terms(
+        self,
+        record: ComicRecord,
+        terms: list[Term],
+        catalog: list[str],
+        add: Callable[[str, str, str], Any]
+    ):
+        futures: list[Future] = []
+
+        for term in terms:
+            if f'{term.type_code}:{term.code}' not in catalog:
+                self.note(
+                    record,
+                    '%s %s "%s" is skipped' % (record.label, term.kind.replace('-', ' ').title(), term.name),
+                    f'{term.kind}-skipped',
+                    reason=term.name
+                )
+                continue
+
+            futures.append(self.bot.submit(self.phase, 'categories', add, record.comic_code, term.type_code, term.code))
+
+        return futures
+
+    def titles(self, record: ComicRecord, titles: list[Title]):
+        for title in titles:
+            self.title(record, title)
+
+    def title(self, record: ComicRecord, title: Title):
+        try:
+            self.bot.add_comic_title(record.comic_code, title.language_lang, title.content)
+        except ValidationError as e:
+            self.note(
+                record,
+                '%s Title "%s" is invalid: %s' % (record.label, title.content, e),
+                'title-skipped',
+                reason='invalid'
+            )
+
+    def synopsis(self, record: ComicRecord, language_lang: str, content: str, source: str | None):
+        try:
+            self.bot.add_comic_synopsis(record.comic_code, language_lang, content, source=source)
+        except ValidationError as e:
+            self.note(
+                record,
+                '%s Synopsis is invalid: %s' % (record.label, e),
+                'synopsis-skipped',
+                reason='invalid'
+            )
+
+    def covers(self, record: ComicRecord, comic_exist: bool):
+        if not record.covers:
+            return
+
+        # An existing comic costs two reads with a cold cache, listComicCover and one batched listImage
+        # (the API has no cover filter by image link), warm image lookups leave listComicCover only
+        comic_covers = self.bot.list_comic_cover_ulids(record.comic_code) if comic_exist else []
+
+        image_ulids = self.bot.get_image_ulids(record.covers)
+
+        for host, path in record.covers:
+            image_ulid = image_ulids[f'{host}{path}']
+
+            if not image_ulid:
+                try:
+                    self.bot.ensure_link(host, path)
+
+                    image_ulid = self.bot.add_image(host, path).ulid
+                except ValidationError as e:
+                    self.note(
+                        record,
+                        '%s Cover "%s%s" is invalid: %s' % (record.label, host, path, e),
+                        'cover-skipped',
+                        reason='invalid'
+                    )
+                    continue
+
+            if image_ulid in comic_covers:
+                continue
+
+            self.bot.add_comic_cover(record.comic_code, image_ulid)
+
+            comic_covers.append(image_ulid)
+
+    def author(self, record: ComicRecord, position_code: str, external_id: int, name: str):
+        person_code = self.bot.resolve_person(external_id, name)
+
+        self.bot.add_comic_author(record.comic_code, position_code, person_code)
+
+    def serialization(self, record: ComicRecord, external_id: int, name: str):
+        magazine_code = self.bot.resolve_magazine(external_id, name)
+
+        self.bot.add_comic_serialization(record.comic_code, magazine_code)
+
+    def external(self, record: ComicRecord, external: External):
+        url = urlparse(external.url)
+
+        if url.port:
+            self.note(
+                record,
+                '%s External "%s" skipped' % (record.label, external.url),
+                'external-skipped',
+                reason='port'
+            )
+            return
+
+        if not url.hostname:
+            return
+
+        try:
+            website_host = normalize_host(str(url.hostname))
+        except ValueError:
+            self.note(
+                record,
+                '%s External "%s" skipped' % (record.label, external.url),
+                'external-skipped',
+                reason='host'
+            )
+            return
+
+        if website_host.endswith('wikipedia.org'):
+            if website_host != 'en.wikipedia.org':
+                self.note(
+                    record,
+                    '%s External non-english Wikipedia "%s" skipped' % (record.label, external.url),
+                    'external-skipped',
+                    reason='non-english-wikipedia'
+                )
+                return
+
+            website_host = 'wikipedia.org'
+
+        website_name = external.name
+        if not website_name or website_name == 'Official Site':
+            website_name = website_host
+
+        relative_reference = str(url.path)
+        if url.query:
+            relative_reference += '?' + str(url.query)
+
+        relative_reference = normalize_reference(relative_reference)
+
+        try:
+            self.bot.ensure_website(website_host, website_name)
+            self.bot.ensure_link(website_host, relative_reference)
+
+            self.bot.add_comic_external(
+                record.comic_code,
+                website_host,
+                relative_reference,
+                is_official=external.is_official,
+                is_community=external.is_community
+            )
+        except ValidationError as e:
+            self.note(
+                record,
+                '%s External "%s" is invalid: %s' % (record.label, external.url, e),
+                'external-skipped',
+                reason='invalid'
+            )
+
+    def relation(self, record: ComicRecord, relation: Relation):
+        response = self.bot.list_comic_by_external_link(relation.href)
+
+        child_code = response[0].code if response else None
+
+        if self.on_relation:
+            self.on_relation(record, relation, child_code)
+
+        if not child_code:
+            return
+
+        api = comicking_openapi.ComicApi(self.bot.client)
+
+        try:
+            api.get_comic_relation(record.comic_code, relation.type_code, child_code)
+        except comicking_openapi.ApiException as e:
+            if e.status == 404:
+                self.bot.add_comic_relation(record.comic_code, relation.type_code, child_code)
+            else:
+                raise e
@@ -0,0 +1,299 @@
+import os
+import sys
+import time
+import signal
+import logging
+import cProfile
+import pstats
+import threading
+import tracemalloc
+import traceback
+from collections import Counter
+from typing import Iterable
+
+from .tracing import Span, Tracer
+
+class Profiler:
+    mode_cpu = 'cpu'
+    mode_memory = 'memory'
+    mode_sample = 'sample'
+
+    def __init__(
+        self,
+        tracer: Tracer,
+        logger: logging.Logger,
+        modes: Iterable[str],
+        directory: str = 'profile',
+        memory_interval: float = 60.0,
+        memory_top: int = 25,
+        sample_interval: float = 0.01
+    ):
+        self.tracer = tracer
+        self.logger = logger
+        self.modes = set(modes)
+        self.directory = directory
+        self.memory_interval = memory_interval
+        self.memory_top = memory_top
+        self.sample_interval = sample_interval
+
+        # Phases are tracked per thread, executor threads run other phases than the main one
+        self.local = threading.local()
+        self.contexts: dict[int, str] = {}
+        self.lock = threading.Lock()
+        self.profiles: dict[str, list[cProfile.Profile]] = {}
+        self.thread_id = threading.get_ident()
+
+        # From Python 3.12 cProfile is built on sys.monitoring, only one profile can be enabled at a time
+        self.profile_threads = sys.version_info < (3, 12)
+
+        self.stopped = threading.Event()
+        self.memory_thread: threading.Thread | None = None
+        self.memory_snapshot: tracemalloc.Snapshot | None = None
+
+        self.sampling = threading.Event()
+        self.sample_thread: threading.Thread | None = None
+        self.sample_count = 0
+
+    @staticmethod
+    def phase(span: Span | None):
+        while span and span.depth() > 1:
+            span = span.parent
+
+        if not span or span.depth() < 1:
+            return None
+
+        return span.name
+
+    @staticmethod
+    def label(span: Span | None):
+        if not span:
+            return 'run'
+
+        mal_id = span.root().args.get('mal_id')
+        if mal_id is None:
+            return span.root().name
+
+        return f'mal_id={mal_id} phase={Profiler.phase(span) or "-"}'
+
+    def start(self):
+        if not self.modes:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.tracer.listeners.append(self)
+
+        if self.mode_cpu in self.modes:
+            self.switch_profile('run')
+
+            if not self.profile_threads:
+                self.logger.warning(
+                    'Profiler CPU profiles cover the main thread only on Python %s.%s, '
+                    'executor threads are counted in its current phase',
+                    *sys.version_info[:2]
+                )
+
+        if self.mode_memory in self.modes:
+            tracemalloc.start(25)
+
+            self.memory_thread = threading.Thread(
+                target=self.memory_loop,
+                name='profiler-memory',
+                daemon=True
+            )
+            self.memory_thread.start()
+
+        if self.mode_sample in self.modes:
+            if hasattr(signal, 'SIGUSR1'):
+                signal.signal(signal.SIGUSR1, self.toggle_sampling)
+
+                self.logger.info(
+                    'Profiler sampling toggled by "kill -USR1 %s"', os.getpid()
+                )
+            else:
+                self.logger.warning('Profiler sampling needs SIGUSR1, skipped')
+
+        self.logger.info('Profiler started with modes %s', sorted(self.modes))
+
+    def stop(self):
+        if not self.modes:
+            return
+
+        self.stopped.set()
+
+        if self in self.tracer.listeners:
+            self.tracer.listeners.remove(self)
+
+        if self.mode_cpu in self.modes:
+            self.switch_profile(None)
+            self.dump_profiles()
+
+        if self.memory_thread:
+            self.memory_thread.join()
+            self.memory_snapshot_write()
+            tracemalloc.stop()
+
+        if self.sampling.is_set():
+            self.sampling.clear()
+        if self.sample_thread:
+            self.sample_thread.join()
+
+        self.logger.info('Profiler stopped, output in "%s"', self.directory)
+
+    #
+    # Tracer listener
+    #
+
+    def enter(self, span: Span):
+        self.contexts[threading.get_ident()] = self.label(span)
+
+        if self.mode_cpu in self.modes:
+            self.switch_profile(self.phase(span) or 'run')
+
+    def exit(self, span: Span):
+        thread_id = threading.get_ident()
+        current = self.tracer.current()
+
+        # An executor thread left without span is idle, it is not profiled
+        if current or thread_id == self.thread_id:
+            self.contexts[thread_id] = self.label(current)
+        else:
+            self.contexts.pop(thread_id, None)
+
+        if self.mode_cpu in self.modes:
+            if current or thread_id == self.thread_id:
+                self.switch_profile(self.phase(current) or 'run')
+            else:
+                self.switch_profile(None)
+
+    #
+    # CPU
+    #
+
+    def switch_profile(self, key: str | None):
+        local = self.local
+        if key == getattr(local, 'key', None):
+            return
+
+        profile = getattr(local, 'profile', None)
+        if profile:
+            profile.disable()
+
+        local.key, local.profile = key, None
+
+        if not key or not (self.profile_threads or threading.get_ident() == self.thread_id):
+            return
+
+        # One profile per thread and phase, merged when dumped
+        profiles = getattr(local, 'profiles', None)
+        if profiles is None:
+            profiles = local.profiles = {}
+
+        if key not in profiles:
+            profiles[key] = cProfile.Profile()
+            with self.lock:
+                self.profiles.setdefault(key, []).append(profiles[key])
+
+        local.profile = profiles[key]
+        local.profile.enable()
+
+    def dump_profiles(self):
+        merged = None
+
+        with self.lock:
+            profiles = {k: list(v) for k, v in self.profiles.items()}
+
+        for key, items in profiles.items():
+            stats = pstats.Stats(items[0])
+            for profile in items[1:]:
+                stats.add(profile)
+
+            stats.dump_stats(os.path.join(self.directory, f'cpu-{key}.pstats'))
+
+            if merged is None:
+                merged = stats
+            else:
+                merged.add(stats)
+
+        if merged:
+            merged.dump_stats(os.path.join(self.directory, 'cpu.pstats'))
+
+    #
+    # Memory
+    #
+
+    def memory_loop(self):
+        while not self.stopped.wait(self.memory_interval):
+            self.memory_snapshot_write()
+
+    def memory_snapshot_write(self):
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>')
+        ))
+
+        if self.memory_snapshot:
+            statistics = snapshot.compare_to(self.memory_snapshot, 'lineno')
+        else:
+            statistics = snapshot.statistics('lineno')
+
+        current, peak = tracemalloc.get_traced_memory()
+
+        with open(os.path.join(self.directory, 'memory.txt'), 'a', encoding='utf-8') as f:
+            f.write('# %s %s current=%d peak=%d\n' % (
+                time.ctime(), self.contexts.get(self.thread_id, 'run'), current, peak
+            ))
+            for statistic in statistics[:self.memory_top]:
+                f.write(f'{statistic}\n')
+            f.write('\n')
+
+        self.memory_snapshot = snapshot
+
+    #
+    # Sample
+    #
+
+    def toggle_sampling(self, signum: int, frame: object):
+        if self.sampling.is_set():
+            self.sampling.clear()
+
+            return
+
+        self.sampling.set()
+
+        self.sample_thread = threading.Thread(
+            target=self.sample_loop,
+            name='profiler-sample',
+            daemon=True
+        )
+        self.sample_thread.start()
+
+    def sample_loop(self):
+        stacks: Counter[str] = Counter()
+        own_id = threading.get_ident()
+
+        while self.sampling.is_set() and not self.stopped.is_set():
+            contexts = dict(self.contexts)
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+
+                context = contexts.get(thread_id, 'run' if thread_id == self.thread_id else 'idle')
+
+                frames = [
+                    f'{f.name} ({os.path.basename(f.filename)}:{f.lineno})'
+                    for f in traceback.extract_stack(frame)
+                ]
+                stacks[';'.join([context] + frames)] += 1
+
+            time.sleep(self.sample_interval)
+
+        self.sample_count += 1
+
+        path = os.path.join(self.directory, f'sample-{self.sample_count}.folded')
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+        self.logger.info('Profiler sample written to "%s"', path)
@@ -0,0 +1,130 @@
+import json
+import hashlib
+from typing import Any
+
+from .clock import Clock
+from .store import Store
+
+class RecrawlScheduler:
+    # Jikan manga status -> how much more often it is expected to change
+    status_weights = {
+        'Publishing': 4.0,
+        'Not yet published': 2.0,
+        'On Hiatus': 1.0,
+        'Finished': 0.25,
+        'Discontinued': 0.25
+    }
+
+    def __init__(
+        self,
+        store: Store,
+        clock: Clock | None = None,
+        base_interval: float = 30 * 86400.0,
+        min_interval: float = 86400.0,
+        max_interval: float = 365 * 86400.0
+    ):
+        self.store = store
+        self.clock = clock or Clock()
+
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+
+    @staticmethod
+    def fingerprint(manga: Any):
+        published = getattr(manga, 'published', None)
+        jpg = getattr(getattr(manga, 'images', None), 'jpg', None)
+
+        raw = json.dumps([
+            manga.status,
+            manga.chapters,
+            manga.volumes,
+            getattr(published, 'to', None),
+            [(v.type, v.title) for v in manga.titles or []],
+            manga.synopsis,
+            getattr(jpg, 'image_url', None)
+        ], default=str, ensure_ascii=False)
+
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def interval(self, status: str | None, first_synced: float, checked: float, changes: int):
+        # Changes per second observed so far, with one change per base interval as prior
+        rate = (changes + 1) / (checked - first_synced + self.base_interval)
+        rate *= self.status_weights.get(status or '', 1.0)
+
+        return min(max(1 / rate, self.min_interval), self.max_interval)
+
+    def get(self, mal_id: int):
+        rows = self.store.query('SELECT * FROM manga_sync WHERE mal_id = ?', (mal_id,))
+
+        return rows[0] if rows else None
+
+    def record(
+        self,
+        mal_id: int,
+        comic_code: str | None,
+        manga: Any | None = None,
+        etag: str | None = None,
+        modified: str | None = None
+    ):
+        now = self.clock.time()
+        row = self.get(mal_id)
+
+        fingerprint = self.fingerprint(manga) if manga else (row['fingerprint'] if row else None)
+        status = manga.status if manga else (row['status'] if row else None)
+
+        if not row:
+            self.store.execute(
+                '''
+                INSERT INTO manga_sync (
+                    mal_id, comic_code, status, fingerprint, etag, modified,
+                    first_synced, synced, checked, checks, changes, next_check
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, 0, ?)
+                ''',
+                (
+                    mal_id, comic_code, status, fingerprint, etag, modified,
+                    now, now, now, now + self.interval(status, now, now, 0)
+                )
+            )
+
+            return False
+
+        changed = fingerprint is not None and fingerprint != row['fingerprint']
+        changes = row['changes'] + int(changed)
+
+        self.store.execute(
+            '''
+            UPDATE manga_sync SET
+                comic_code = ?, status = ?, fingerprint = ?, etag = ?, modified = ?,
+                synced = ?, checked = ?, checks = checks + 1, changes = ?, next_check = ?
+            WHERE mal_id = ?
+            ''',
+            (
+                comic_code or row['comic_code'],
+                status,
+                fingerprint,
+                etag or row['etag'],
+                modified or row['modified'],
+                now if changed else row['synced'],
+                now,
+                changes,
+                now + self.interval(status, row['first_synced'], now, changes),
+                mal_id
+            )
+        )
+
+        return changed
+
+    def due(self, limit: int):
+        now = self.clock.time()
+
+        # Age over expected change interval ranks by the likelihood of a change since the last check
+        return self.store.query(
+            '''
+            SELECT * FROM manga_sync
+            WHERE next_check <= ? AND comic_code IS NOT NULL
+            ORDER BY (? - checked) / (next_check - checked) DESC
+            LIMIT ?
+            ''',
+            (now, now, limit)
+        )
@@ -0,0 +1,160 @@
+import json
+import hashlib
+from typing import Any
+
+version = 1
+
+# Kind -> (Bot catalog, Bot add method, stage), later stages depend on earlier ones
+kinds = {
+    'language': ('languages', 'add_language', 0),
+    'categorytype': ('categorytypes', 'add_categorytype', 0),
+    'tagtype': ('tagtypes', 'add_tagtype', 0),
+    'comicrelationtype': ('comicrelationtypes', 'add_comicrelationtype', 0),
+    'comicauthorposition': ('comicauthorpositions', 'add_comicauthorposition', 0),
+    'category': ('categories', 'add_category', 1),
+    'tag': ('tags', 'add_tag', 1)
+}
+
+# Kind, parent code, code, name
+table: list[tuple[str, str | None, str, str]] = [
+    ('language', None, 'en', 'English'),
+    ('language', None, 'ja', 'Japanese'),
+    ('language', None, 'ko', 'Korean'),
+    ('language', None, 'zh', 'Chinese'),
+
+    ('categorytype', None, 'comic-type', 'Comic Type'),
+    ('categorytype', None, 'genre', 'Genre'),
+
+    ('category', 'comic-type', 'manga', 'Manga'),
+    ('category', 'comic-type', 'one-shot', 'One-shot'),
+    ('category', 'comic-type', 'doujinshi', 'Doujinshi'),
+    ('category', 'comic-type', 'manhua', 'Manhua'),
+    ('category', 'comic-type', 'manhwa', 'Manhwa'),
+
+    ('category', 'genre', 'action', 'Action'),
+    ('category', 'genre', 'adventure', 'Adventure'),
+    ('category', 'genre', 'avant-garde', 'Avant-garde'),
+    ('category', 'genre', 'boys-love', 'Boys Love'),
+    ('category', 'genre', 'comedy', 'Comedy'),
+    ('category', 'genre', 'drama', 'Drama'),
+    ('category', 'genre', 'fantasy', 'Fantasy'),
+    ('category', 'genre', 'girls-love', 'Girls Love'),
+    ('category', 'genre', 'gourmet', 'Gourmet'),
+    ('category', 'genre', 'horror', 'Horror'),
+    ('category', 'genre', 'mystery', 'Mystery'),
+    ('category', 'genre', 'romance', 'Romance'),
+    ('category', 'genre', 'sci-fi', 'Sci-Fi'),
+    ('category', 'genre', 'slice-of-life', 'Slice of Life'),
+    ('category', 'genre', 'sports', 'Sports'),
+    ('category', 'genre', 'supernatural', 'Supernatural'),
+    ('category', 'genre', 'suspense', 'Suspense'),
+
+    ('category', 'genre', 'ecchi', 'Ecchi'),
+    ('category', 'genre', 'erotica', 'Erotica'),
+    ('category', 'genre', 'hentai', 'Hentai'),
+
+    ('category', 'genre', 'adult-cast', 'Adult Cast'),
+    ('category', 'genre', 'anthropomorphism', 'Anthropomorphism'),
+    ('category', 'genre', 'cute-girls-doing-cute-things', 'Cute Girls Doing Cute Things'),
+    ('category', 'genre', 'childcare', 'Childcare'),
+    ('category', 'genre', 'combat-sports', 'Combat Sports'),
+    ('category', 'genre', 'cross-dressing', 'Cross-dressing'),
+    ('category', 'genre', 'delinquents', 'Delinquents'),
+    ('category', 'genre', 'detective', 'Detective'),
+    ('category', 'genre', 'educational', 'Educational'),
+    ('category', 'genre', 'female-idol', 'Female Idol'),
+    ('category', 'genre', 'gag-humor', 'Gag Humor'),
+    ('category', 'genre', 'gore', 'Gore'),
+    ('category', 'genre', 'harem', 'Harem'),
+    ('category', 'genre', 'high-stakes-game', 'High Stakes Game'),
+    ('category', 'genre', 'historical', 'Historical'),
+    ('category', 'genre', 'isekai', 'Isekai'),
+    ('category', 'genre', 'iyashikei', 'Iyashikei'),
+    ('category', 'genre', 'love-polygon', 'Love Polygon'),
+    ('category', 'genre', 'magical-sex-shift', 'Magical Sex Shift'),
+    ('category', 'genre', 'mahou-shoujo', 'Mahou Shoujo'),
+    ('category', 'genre', 'male-idol', 'Male Idol'),
+    ('category', 'genre', 'martial-arts', 'Martial Arts'),
+    ('category', 'genre', 'mecha', 'Mecha'),
+    ('category', 'genre', 'medical', 'Medical'),
+    ('category', 'genre', 'memoir', 'Memoir'),
+    ('category', 'genre', 'military', 'Military'),
+    ('category', 'genre', 'music', 'Music'),
+    ('category', 'genre', 'mythology', 'Mythology'),
+    ('category', 'genre', 'organized-crime', 'Organized Crime'),
+    ('category', 'genre', 'otaku-culture', 'Otaku Culture'),
+    ('category', 'genre', 'parody', 'Parody'),
+    ('category', 'genre', 'performing-arts', 'Performing Arts'),
+    ('category', 'genre', 'pets', 'Pets'),
+    ('category', 'genre', 'psychological', 'Psychological'),
+    ('category', 'genre', 'racing', 'Racing'),
+    ('category', 'genre', 'reincarnation', 'Reincarnation'),
+    ('category', 'genre', 'reverse-harem', 'Reverse Harem'),
+    ('category', 'genre', 'romantic-subtext', 'Romantic Subtext'),
+    ('category', 'genre', 'samurai', 'Samurai'),
+    ('category', 'genre', 'school', 'School'),
+    ('category', 'genre', 'showbiz', 'Showbiz'),
+    ('category', 'genre', 'space', 'Space'),
+    ('category', 'genre', 'strategy-game', 'Strategy Game'),
+    ('category', 'genre', 'superpower', 'Superpower'),
+    ('category', 'genre', 'survival', 'Survival'),
+    ('category', 'genre', 'team-sports', 'Team Sports'),
+    ('category', 'genre', 'time-travel', 'Time Travel'),
+    ('category', 'genre', 'vampire', 'Vampire'),
+    ('category', 'genre', 'video-game', 'Video Game'),
+    ('category', 'genre', 'villainess', 'Villainess'),
+    ('category', 'genre', 'visual-arts', 'Visual Arts'),
+    ('category', 'genre', 'workplace', 'Workplace'),
+
+    ('category', 'genre', 'josei', 'Josei'),
+    ('category', 'genre', 'kids', 'Kids'),
+    ('category', 'genre', 'seinen', 'Seinen'),
+    ('category', 'genre', 'shoujo', 'Shoujo'),
+    ('category', 'genre', 'shounen', 'Shounen'),
+
+    ('tagtype', None, 'comic', 'Comic'),
+    ('tagtype', None, 'comic-status', 'Comic Status'),
+
+    ('tag', 'comic', 'award-winning', 'Award Winning'),
+
+    ('tag', 'comic-status', 'announced', 'Announced'),
+    ('tag', 'comic-status', 'ongoing', 'Ongoing'),
+    ('tag', 'comic-status', 'finished', 'Finished'),
+    ('tag', 'comic-status', 'hiatus', 'Hiatus'),
+    ('tag', 'comic-status', 'cancelled', 'Cancelled'),
+
+    ('comicrelationtype', None, 'alternative-setting', 'Alternative Setting'),
+    ('comicrelationtype', None, 'alternative-version', 'Alternative Version'),
+    ('comicrelationtype', None, 'character', 'Character'),
+    ('comicrelationtype', None, 'full-story', 'Full Story'),
+    ('comicrelationtype', None, 'other', 'Other'),
+    ('comicrelationtype', None, 'parent-story', 'Parent Story'),
+    ('comicrelationtype', None, 'prequel', 'Prequel'),
+    ('comicrelationtype', None, 'sequel', 'Sequel'),
+    ('comicrelationtype', None, 'side-story', 'Side Story'),
+    ('comicrelationtype', None, 'spin-off', 'Spin-off'),
+    ('comicrelationtype', None, 'summary', 'Summary'),
+
+    ('comicauthorposition', None, 'author', 'Author')
+]
+
+def fingerprint(rows: list[tuple[str, str | None, str, str]] = table):
+    raw = json.dumps([version, rows], ensure_ascii=False, separators=(',', ':'))
+
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def diff(catalogs: dict[str, list[str]], rows: list[tuple[str, str | None, str, str]] = table):
+    existing = {k: set(v) for k, v in catalogs.items()}
+
+    stages: list[list[tuple[str, tuple[Any, ...]]]] = [[] for _ in range(max(v[2] for v in kinds.values()) + 1)]
+
+    for kind, parent, code, name in rows:
+        catalog, method, stage = kinds[kind]
+
+        key = f'{parent}:{code}' if parent else code
+        if key in existing[catalog]:
+            continue
+
+        stages[stage].append((method, (parent, code, name) if parent else (code, name)))
+
+    return stages
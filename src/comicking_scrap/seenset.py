@@ -0,0 +1,125 @@
+import math
+import zlib
+import struct
+import threading
+
+from .store import Store
+
+class SeenSet:
+    kind = 'bitmap'
+
+    def __init__(self, store: Store | None = None, key: str = 'seen', flush_every: int = 100):
+        self.store = store
+        self.key = f'{self.kind}:{key}'
+        self.flush_every = flush_every
+
+        self.lock = threading.Lock()
+        self.bits = bytearray()
+        self.count = 0
+        self.dirty = 0
+
+        if store:
+            self.load()
+
+    def add(self, value: int):
+        index, mask = value >> 3, 1 << (value & 7)
+
+        with self.lock:
+            if index >= len(self.bits):
+                # Grow geometrically, MAL IDs are dense and mostly below a few hundred thousand
+                self.bits.extend(bytes(max(index + 1, len(self.bits) * 2) - len(self.bits)))
+
+            if self.bits[index] & mask:
+                return False
+
+            self.bits[index] |= mask
+            self.count += 1
+            self.dirty += 1
+
+        if self.dirty >= self.flush_every:
+            self.flush()
+
+        return True
+
+    def __contains__(self, value: int):
+        index = value >> 3
+
+        return index < len(self.bits) and bool(self.bits[index] & (1 << (value & 7)))
+
+    def __len__(self):
+        return self.count
+
+    def load(self):
+        if not self.store:
+            return
+
+        value = self.store.get_blob(self.key)
+        if value is None:
+            return
+
+        count, = struct.unpack_from('>Q', value)
+
+        with self.lock:
+            self.bits = bytearray(zlib.decompress(value[8:]))
+            self.count = count
+            self.dirty = 0
+
+    def flush(self):
+        if not self.store:
+            return
+
+        with self.lock:
+            if not self.dirty:
+                return
+
+            value = struct.pack('>Q', self.count) + zlib.compress(self.bits)
+            self.dirty = 0
+
+        self.store.set_blob(self.key, value)
+
+class BloomSeenSet(SeenSet):
+    kind = 'bloom'
+
+    def __init__(
+        self,
+        store: Store | None = None,
+        key: str = 'seen',
+        flush_every: int = 100,
+        capacity: int = 1000000,
+        error_rate: float = 0.001
+    ):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+
+        super().__init__(store, f'{capacity}:{error_rate}:{key}', flush_every)
+
+        if not self.bits:
+            self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, value: int):
+        # Double hashing over two 64-bit multiplicative hashes of the ID
+        h1 = (value * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        h2 = ((value ^ (value >> 31)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF | 1
+
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, value: int):
+        positions = self.positions(value)
+
+        with self.lock:
+            if all(self.bits[v >> 3] & (1 << (v & 7)) for v in positions):
+                return False
+
+            for v in positions:
+                self.bits[v >> 3] |= 1 << (v & 7)
+
+            self.count += 1
+            self.dirty += 1
+
+        if self.dirty >= self.flush_every:
+            self.flush()
+
+        return True
+
+    def __contains__(self, value: int):
+        return all(self.bits[v >> 3] & (1 << (v & 7)) for v in self.positions(value))
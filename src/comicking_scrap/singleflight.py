@@ -0,0 +1,43 @@
+import threading
+from collections import Counter
+from typing import Any, Callable, Hashable
+
+class Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Exception | None = None
+
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls: dict[Hashable, Call] = {}
+        self.stats: Counter[str] = Counter()
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+
+            if leader:
+                call = self.calls[key] = Call()
+
+            self.stats['calls' if leader else 'shared'] += 1
+
+        if leader:
+            try:
+                call.result = fn(*args, **kwargs)
+            except Exception as e:
+                call.error = e
+            finally:
+                with self.lock:
+                    self.calls.pop(key, None)
+
+                call.event.set()
+        else:
+            call.event.wait()
+
+        if call.error:
+            raise call.error
+
+        return call.result
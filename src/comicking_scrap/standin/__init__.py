@@ -0,0 +1,3 @@
+from .server import Request, Response, StandInServer
+from .comicking import ComicKingStandIn
+from .jikan import JikanDataset, JikanStandIn
@@ -0,0 +1,428 @@
+import re
+import time
+import string
+import secrets
+import argparse
+from datetime import datetime, timezone
+from typing import Any
+from urllib.parse import quote, unquote
+
+from ..openapi import Operation, compile_operations, load_spec, spec_path
+from .server import Request, Response, StandInServer
+
+# Foreign keys checked on add/update: body fields -> referenced collection
+references: dict[str, list[tuple[tuple[str, ...], str]]] = {
+    'ComicTitle': [(('languageLang',), '/rest/languages')],
+    'ComicSynopsis': [(('languageLang',), '/rest/languages')],
+    'ComicCover': [(('imageULID',), '/rest/images')],
+    'ComicCharacter': [(('characterCode',), '/rest/characters')],
+    'ComicAuthor': [
+        (('positionCode',), '/rest/comic-author-positions'),
+        (('personCode',), '/rest/people')
+    ],
+    'ComicSerialization': [(('magazineCode',), '/rest/magazines')],
+    'ComicExternal': [(('linkWebsiteHost', 'linkRelativeReference'), '/rest/links')],
+    'ComicCategory': [(('categoryTypeCode', 'categoryCode'), '/rest/categories')],
+    'ComicTag': [(('tagTypeCode', 'tagCode'), '/rest/tags')],
+    'ComicRelation': [
+        (('typeCode',), '/rest/comic-relation-types'),
+        (('childCode',), '/rest/comics')
+    ],
+    'Link': [(('websiteHost',), '/rest/websites')],
+    'Image': [(('linkWebsiteHost', 'linkRelativeReference'), '/rest/links')],
+    'Category': [(('typeCode',), '/rest/category-types')],
+    'Tag': [(('typeCode',), '/rest/tag-types')]
+}
+
+# Counters computed from other collections: field -> (collection, field, own key field)
+counters: dict[str, tuple[str, str, str]] = {
+    'linkCount': ('/rest/links', 'websiteHost', 'host'),
+    'childCount': ('/rest/categories', 'parentCode', 'code')
+}
+
+def href(*parts: Any):
+    return ''.join(str(v) for v in parts if v)
+
+def reference_key(collection: str, values: list[Any]):
+    if collection == '/rest/links':
+        return href(*values)
+
+    return ':'.join(str(v) for v in values)
+
+def now():
+    return datetime.now(timezone.utc).isoformat()
+
+class Resource:
+    def __init__(self, name: str):
+        self.name = name
+        self.operations: dict[str, Operation] = {}
+
+    @property
+    def collection(self):
+        operation = self.operations.get('list') or self.operations['add']
+
+        return operation.path
+
+    @property
+    def key_params(self):
+        operation = self.operations.get('get')
+        if not operation:
+            return []
+
+        return operation.path_params[len(self.operations['add'].path_params):]
+
+class ComicKingStandIn(StandInServer):
+    base_path = '/api'
+    token_path = '/oauth/token'
+
+    def __init__(
+        self,
+        spec_file: str | None = None,
+        default_limit: int = 10,
+        max_limit: int = 100,
+        token_expires_in: int = 86400,
+        **kwargs: Any
+    ):
+        super().__init__(**kwargs)
+
+        self.spec = load_spec(spec_file or spec_path('comicking'))
+        self.operations = compile_operations(self.spec, self.base_path)
+
+        self.resources: dict[str, Resource] = {}
+        for operation in self.operations:
+            m = re.match(r'^(list|add|get|update|delete)(\w+)$', operation.id)
+            if not m:
+                continue
+
+            resource = self.resources.setdefault(m[2], Resource(m[2]))
+            resource.operations[m[1]] = operation
+
+        self.default_limit = default_limit
+        self.max_limit = max_limit
+        self.token_expires_in = token_expires_in
+        self.tokens: set[str] = set()
+
+        self.collections: dict[str, dict[str, dict[str, Any]]] = {}
+
+    @property
+    def base_comicking(self):
+        return self.url + self.base_path
+
+    @property
+    def oauth_issuer(self):
+        return self.url + '/'
+
+    #
+    # Store
+    #
+
+    def records(self, collection: str):
+        return self.collections.setdefault(collection, {})
+
+    def insert(self, operation_id: str, body: dict[str, Any], **path_params: str):
+        resource = self.resources[operation_id[3:]]
+
+        with self.lock:
+            return self.add_record(resource, path_params, body)
+
+    def key_of(self, resource: Resource, record: dict[str, Any]):
+        return ':'.join(str(record[v]) for v in resource.key_params)
+
+    def render(self, resource: Resource, collection: str, record: dict[str, Any]):
+        data = dict(record)
+
+        schema = resource.operations['get'].response_schema if 'get' in resource.operations else None
+        properties = (schema or {}).get('properties', {})
+
+        for name, prop in properties.items():
+            if name in data:
+                continue
+
+            if name in counters:
+                source, field, own = counters[name]
+                data[name] = sum(
+                    1 for v in self.records(source).values() if v.get(field) == record.get(own)
+                )
+            elif name.endswith('Count'):
+                data[name] = len(self.records(f'{collection}/{self.key_of(resource, record)}/{self.child(name)}'))
+            elif name == 'websiteName':
+                website = self.records('/rest/websites').get(record.get('websiteHost', ''))
+                data[name] = website['name'] if website else None
+            else:
+                data[name] = 0 if prop.get('type') == 'integer' and not prop.get('nullable') else None
+
+        return data
+
+    @staticmethod
+    def child(count_name: str):
+        name = count_name[:-len('Count')]
+
+        for k, v in {'synopsis': 'synopses', 'category': 'categories'}.items():
+            if name == k:
+                return v
+
+        return name + 's'
+
+    def generate(self, param: str, body: dict[str, Any]):
+        if param in ('href', 'linkHREF'):
+            prefix = 'link' if param == 'linkHREF' else ''
+            host = body.get(f'{prefix}WebsiteHost' if prefix else 'websiteHost')
+            reference = body.get(f'{prefix}RelativeReference' if prefix else 'relativeReference')
+
+            return href(host, reference)
+
+        if param.lower().endswith('ulid'):
+            return '%013X%s' % (
+                time.time_ns() // 1_000_000,
+                ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(13))
+            )
+
+        if param == 'nv':
+            return href(body.get('number'), body.get('version') and '+' + body['version'])
+
+        return ''.join(secrets.choice(string.ascii_lowercase + string.digits) for _ in range(8))
+
+    def check_references(self, resource: Resource, body: dict[str, Any]):
+        for fields, collection in references.get(resource.name, []):
+            values = [body.get(v) for v in fields]
+            if values[0] is None:
+                continue
+
+            key = reference_key(collection, values)
+            if key not in self.records(collection):
+                return Response(404, {
+                    'message': '%s "%s" not found' % (collection.rsplit('/', 1)[-1], key)
+                })
+
+        return None
+
+    def add_record(self, resource: Resource, params: dict[str, str], body: dict[str, Any]):
+        operation = resource.operations['add']
+
+        for name in (operation.request_schema or {}).get('required', []):
+            if body.get(name) is None:
+                return Response(400, {'message': 'Field "%s" is required' % name})
+
+        collection = operation.path.format(**params)
+
+        if 'comicCode' in params and params['comicCode'] not in self.records('/rest/comics'):
+            return Response(404, {'message': 'Comic not found'})
+
+        response = self.check_references(resource, body)
+        if response:
+            return response
+
+        record = {'createdAt': now(), 'updatedAt': None}
+        record.update({k: v for k, v in body.items()})
+
+        for param in resource.key_params:
+            if record.get(param) is None:
+                record[param] = self.generate(param, body)
+
+        key = self.key_of(resource, record)
+        records = self.records(collection)
+        if key in records:
+            return Response(409, {'message': '%s "%s" already exists' % (resource.name, key)})
+
+        records[key] = record
+
+        return Response(
+            201,
+            self.render(resource, collection, record),
+            {'Location': f'{self.base_path}{collection}/{quote(key, safe=":")}'}
+        )
+
+    def list_records(self, resource: Resource, params: dict[str, str], query: dict[str, list[str]]):
+        collection = resource.operations['list'].path.format(**params)
+
+        try:
+            page = max(int(query.get('page', ['1'])[0]), 1)
+            limit = min(max(int(query.get('limit', [str(self.default_limit)])[0]), 1), self.max_limit)
+        except ValueError:
+            return Response(400, {'message': 'Invalid pagination'})
+
+        filters = {
+            k: [unquote(v) for v in values]
+            for k, values in query.items() if k not in ('page', 'limit', 'order', 'orderBy')
+        }
+
+        with self.lock:
+            items = list(self.records(collection).values())
+
+            for name, values in filters.items():
+                items = [v for v in items if self.matches(v, name, values)]
+
+            data = [self.render(resource, collection, v) for v in items[(page - 1) * limit:page * limit]]
+
+        return Response(
+            200,
+            data,
+            {'X-Total-Count': str(len(items)), 'X-Pagination-Limit': str(limit)}
+        )
+
+    def matches(self, record: dict[str, Any], name: str, values: list[str]):
+        if name.startswith('external'):
+            externals = self.records(f'/rest/comics/{record["code"]}/externals').values()
+            field = 'link' + name[len('externalLink'):]
+
+            return any(self.matches(v, field, values) for v in externals)
+
+        if name in ('href', 'linkHREF'):
+            prefix = 'link' if name == 'linkHREF' else ''
+            value = href(
+                record.get(f'{prefix}WebsiteHost' if prefix else 'websiteHost'),
+                record.get(f'{prefix}RelativeReference' if prefix else 'relativeReference')
+            )
+
+            return value in values
+
+        for k, v in record.items():
+            if k.lower() == name.lower():
+                return str(v) in values
+
+        return False
+
+    def update_record(self, resource: Resource, params: dict[str, str], key: str, body: dict[str, Any]):
+        collection = resource.operations['list'].path.format(**params)
+        records = self.records(collection)
+
+        if key not in records:
+            return Response(404, {'message': '%s not found' % resource.name})
+
+        response = self.check_references(resource, body)
+        if response:
+            return response
+
+        record = dict(records[key])
+        record.update({k: v for k, v in body.items() if v is not None})
+        record['updatedAt'] = now()
+
+        new_key = self.key_of(resource, record)
+        if new_key != key and new_key in records:
+            return Response(409, {'message': '%s "%s" already exists' % (resource.name, new_key)})
+
+        del records[key]
+        records[new_key] = record
+
+        return Response(200, self.render(resource, collection, record))
+
+    #
+    # HTTP
+    #
+
+    def authorized(self, request: Request):
+        authorization = request.headers.get('Authorization') or ''
+
+        return authorization.startswith('Bearer ') and authorization[7:] in self.tokens
+
+    def token(self, request: Request):
+        form = request.form()
+
+        if form.get('grant_type') != 'client_credentials':
+            return Response(400, {'error': 'unsupported_grant_type'})
+
+        access_token = secrets.token_urlsafe(24)
+        with self.lock:
+            self.tokens.add(access_token)
+
+        return Response(200, {
+            'access_token': access_token,
+            'token_type': 'Bearer',
+            'expires_in': self.token_expires_in
+        })
+
+    def handle(self, request: Request) -> Response:
+        if request.method == 'POST' and request.path == self.token_path:
+            with self.lock:
+                self.stats['token'] += 1
+
+            return self.token(request)
+
+        for operation in self.operations:
+            m = operation.match(request.method, request.path)
+            if not m:
+                continue
+
+            params = {k: unquote(v) for k, v in m.groupdict().items()}
+
+            # The lock only guards the collections, requests are parsed and answered concurrently
+            with self.lock:
+                self.stats[operation.id] += 1
+
+                authorized = not operation.secured or self.authorized(request)
+
+            if not authorized:
+                return Response(401, {'message': 'Unauthorized'})
+
+            return self.operate(operation, params, request)
+
+        return Response(404, {'message': 'Not found'})
+
+    def operate(self, operation: Operation, params: dict[str, str], request: Request):
+        m = re.match(r'^(list|add|get|update|delete)(\w+)$', operation.id)
+        if not m or m[2] not in self.resources:
+            return Response(501, {'message': 'Not implemented'})
+
+        kind, resource = m[1], self.resources[m[2]]
+
+        parent_params = {k: params[k] for k in resource.operations['add'].path_params}
+        key = ':'.join(params[k] for k in resource.key_params if k in params)
+
+        match kind:
+            case 'list':
+                return self.list_records(resource, parent_params, request.query)
+            case 'add':
+                body = request.json() or {}
+
+                with self.lock:
+                    return self.add_record(resource, parent_params, body)
+            case 'update':
+                body = request.json() or {}
+
+                with self.lock:
+                    return self.update_record(resource, parent_params, key, body)
+            case _:
+                collection = resource.collection.format(**parent_params)
+
+                with self.lock:
+                    records = self.records(collection)
+
+                    if key not in records:
+                        return Response(404, {'message': '%s not found' % resource.name})
+
+                    if kind == 'delete':
+                        del records[key]
+
+                        return Response(204)
+
+                    return Response(200, self.render(resource, collection, records[key]))
+
+def main():
+    parser = argparse.ArgumentParser(description='In-memory ComicKing API stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--spec', default=None)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--latency-jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    server = ComicKingStandIn(
+        args.spec,
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed
+    )
+
+    print(f'ComicKing stand-in on {server.base_comicking} (issuer {server.oauth_issuer})')
+
+    server.serve_forever()
+
+if __name__ == '__main__':
+    main()
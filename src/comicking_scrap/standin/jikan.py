@@ -0,0 +1,331 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import urllib.error
+import urllib.request
+from collections import deque
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any
+
+from .server import Request, Response, StandInServer
+
+class JikanDataset:
+    endpoints = ('external', 'relations', 'pictures', 'characters', 'recommendations')
+
+    def __init__(self):
+        self.manga: dict[int, dict[str, Any]] = {}
+        self.payloads: dict[str, dict[int, Any]] = {v: {} for v in self.endpoints}
+        self.modified: dict[int, float] = {}
+
+    @classmethod
+    def load(cls, path: str):
+        dataset = cls()
+
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+
+        for k, v in data.get('manga', {}).items():
+            dataset.manga[int(k)] = v
+        for endpoint in cls.endpoints:
+            for k, v in data.get(endpoint, {}).items():
+                dataset.payloads[endpoint][int(k)] = v
+        for k, v in data.get('modified', {}).items():
+            dataset.modified[int(k)] = float(v)
+
+        return dataset
+
+    def save(self, path: str):
+        data: dict[str, Any] = {'manga': self.manga, 'modified': self.modified}
+        data.update(self.payloads)
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def add(self, manga: dict[str, Any], **payloads: Any):
+        mal_id = int(manga['mal_id'])
+
+        self.manga[mal_id] = manga
+        for endpoint, payload in payloads.items():
+            self.payloads[endpoint][mal_id] = payload
+
+        self.modified.setdefault(mal_id, time.time())
+
+    def touch(self, mal_id: int, modified: float | None = None):
+        self.modified[mal_id] = modified or time.time()
+
+class RateLimiter:
+    def __init__(self, limits: list[tuple[int, float]]):
+        self.limits = limits
+        self.windows = [deque() for _ in limits]
+
+    def acquire(self, now: float):
+        for (count, period), window in zip(self.limits, self.windows):
+            while window and window[0] <= now - period:
+                window.popleft()
+
+            if len(window) >= count:
+                return window[0] + period - now
+
+        for window in self.windows:
+            window.append(now)
+
+        return 0.0
+
+class JikanStandIn(StandInServer):
+    base_path = '/v4'
+    page_size = 25
+
+    operations = {
+        None: 'getMangaById',
+        'full': 'getMangaFullById',
+        'external': 'getMangaExternal',
+        'relations': 'getMangaRelations',
+        'pictures': 'getMangaPictures',
+        'characters': 'getMangaCharacters',
+        'recommendations': 'getMangaRecommendations'
+    }
+
+    def __init__(
+        self,
+        dataset: JikanDataset | None = None,
+        rate_limits: list[tuple[int, float]] | None = None,
+        upstream: str | None = None,
+        **kwargs: Any
+    ):
+        super().__init__(**kwargs)
+
+        self.dataset = dataset or JikanDataset()
+        self.rate_limiter = RateLimiter([(3, 1.0), (60, 60.0)] if rate_limits is None else rate_limits)
+        self.upstream = upstream.rstrip('/') if upstream else None
+        self.started = self.clock.time()
+
+    @property
+    def base_jikan(self):
+        return self.url + self.base_path
+
+    @staticmethod
+    def error(status: int, type: str, message: str, error: str | None = None):
+        return Response(status, {
+            'status': status,
+            'type': type,
+            'message': message,
+            'error': error
+        })
+
+    def record(self, path: str):
+        if not self.upstream:
+            return None
+
+        try:
+            with urllib.request.urlopen(f'{self.upstream}{path}', timeout=30) as r:
+                return json.loads(r.read())
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+
+            raise e
+
+    # Upstream is fetched outside the lock, the lock is only taken to read and store the dataset
+    def payload(self, mal_id: int, endpoint: str | None):
+        if endpoint is None:
+            with self.lock:
+                manga = self.dataset.manga.get(mal_id)
+
+            if manga is None:
+                body = self.record(f'/manga/{mal_id}')
+                if body is None:
+                    return None
+
+                with self.lock:
+                    if mal_id not in self.dataset.manga:
+                        self.dataset.add(body['data'])
+
+                    manga = self.dataset.manga[mal_id]
+
+            return {'data': manga}
+
+        if endpoint == 'full':
+            manga = self.payload(mal_id, None)
+            if manga is None:
+                return None
+
+            data = dict(manga['data'])
+            for v in ('relations', 'external'):
+                payload = self.payload(mal_id, v)
+                data[v] = payload['data'] if payload else []
+
+            return {'data': data}
+
+        payloads = self.dataset.payloads[endpoint]
+
+        with self.lock:
+            found = mal_id in payloads
+            data = payloads.get(mal_id)
+
+        if not found:
+            body = self.record(f'/manga/{mal_id}/{endpoint}')
+            if body is None:
+                return None
+
+            with self.lock:
+                data = payloads.setdefault(mal_id, body['data'])
+
+        return {'data': data}
+
+    def search(self, query: dict[str, list[str]]):
+        try:
+            page = max(int(query.get('page', ['1'])[0]), 1)
+            limit = min(max(int(query.get('limit', [str(self.page_size)])[0]), 1), self.page_size)
+        except ValueError:
+            return self.error(400, 'ValidationException', 'Invalid pagination')
+
+        items = list(self.dataset.manga.values())
+
+        if 'type' in query:
+            items = [v for v in items if (v.get('type') or '').lower() == query['type'][0].lower()]
+
+        if 'q' in query:
+            q = query['q'][0].lower()
+            items = [v for v in items if q in (v.get('title') or '').lower()]
+
+        order_by = query.get('order_by', ['mal_id'])[0]
+        items.sort(
+            key=lambda v: (v.get(order_by) is None, v.get(order_by) or 0),
+            reverse=query.get('sort', ['asc'])[0] == 'desc'
+        )
+
+        total = len(items)
+        data = items[(page - 1) * limit:page * limit]
+        last_visible_page = max((total + limit - 1) // limit, 1)
+
+        return Response(200, {
+            'pagination': {
+                'last_visible_page': last_visible_page,
+                'has_next_page': page < last_visible_page,
+                'current_page': page,
+                'items': {'count': len(data), 'total': total, 'per_page': limit}
+            },
+            'data': data
+        })
+
+    def cacheable(self, request: Request, body: Any, modified: float):
+        raw = json.dumps(body, sort_keys=True, default=str).encode()
+
+        etag = '"%s"' % hashlib.md5(raw).hexdigest()
+        headers = {
+            'ETag': etag,
+            'Last-Modified': formatdate(modified, usegmt=True),
+            'Cache-Control': 'max-age=86400'
+        }
+
+        if request.headers.get('If-None-Match') == etag:
+            return Response(304, None, headers)
+
+        since = request.headers.get('If-Modified-Since')
+        if since and not request.headers.get('If-None-Match'):
+            try:
+                if parsedate_to_datetime(since).timestamp() >= int(modified):
+                    return Response(304, None, headers)
+            except (TypeError, ValueError):
+                pass
+
+        return Response(200, body, headers)
+
+    def handle(self, request: Request) -> Response:
+        with self.lock:
+            retry_after = self.rate_limiter.acquire(self.clock.monotonic())
+
+        if retry_after > 0:
+            with self.lock:
+                self.stats['429'] += 1
+
+            response = self.error(
+                429,
+                'RateLimitException',
+                'You are being rate-limited. Please follow Rate Limiting guidelines: '
+                'https://docs.api.jikan.moe/#section/Information/Rate-Limiting'
+            )
+            response.headers['Retry-After'] = str(max(int(retry_after + 0.999), 1))
+
+            return response
+
+        if request.method != 'GET' or not request.path.startswith(self.base_path + '/manga'):
+            return self.error(404, 'HttpException', 'Not Found')
+
+        parts = request.path[len(self.base_path):].strip('/').split('/')
+
+        if len(parts) == 1:
+            with self.lock:
+                self.stats['getMangaSearch'] += 1
+
+                return self.search(request.query)
+
+        if not parts[1].isdigit() or len(parts) > 3:
+            return self.error(400, 'ValidationException', 'Invalid request')
+
+        mal_id = int(parts[1])
+        endpoint = parts[2] if len(parts) > 2 else None
+
+        if endpoint not in self.operations:
+            return self.error(404, 'HttpException', 'Not Found')
+
+        with self.lock:
+            self.stats[self.operations[endpoint]] += 1
+
+        body = self.payload(mal_id, endpoint)
+
+        with self.lock:
+            modified = self.dataset.modified.get(mal_id, self.started)
+
+        if body is None:
+            return self.error(
+                404,
+                'BadResponseException',
+                'Resource does not exist',
+                f'404 on https://myanimelist.net/manga/{mal_id}/'
+            )
+
+        return self.cacheable(request, body, modified)
+
+def main():
+    parser = argparse.ArgumentParser(description='Record/replay Jikan API stand-in')
+    parser.add_argument('dataset', nargs='?', default=None)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--upstream', default=None, help='record misses from e.g. https://api.jikan.moe/v4')
+    parser.add_argument('--rate-per-second', type=int, default=3)
+    parser.add_argument('--rate-per-minute', type=int, default=60)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--latency-jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    dataset = JikanDataset()
+    if args.dataset and os.path.exists(args.dataset):
+        dataset = JikanDataset.load(args.dataset)
+
+    server = JikanStandIn(
+        dataset,
+        rate_limits=[(args.rate_per_second, 1.0), (args.rate_per_minute, 60.0)],
+        upstream=args.upstream,
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        seed=args.seed
+    )
+
+    print(f'Jikan stand-in on {server.base_jikan}')
+
+    try:
+        server.serve_forever()
+    finally:
+        if args.upstream and args.dataset:
+            dataset.save(args.dataset)
+
+if __name__ == '__main__':
+    main()
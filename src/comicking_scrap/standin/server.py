@@ -0,0 +1,181 @@
+import abc
+import json
+import random
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from ..clock import Clock
+
+class Response:
+    def __init__(
+        self,
+        status: int,
+        body: Any = None,
+        headers: dict[str, str] | None = None
+    ):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+class Request:
+    def __init__(self, handler: BaseHTTPRequestHandler):
+        url = urlsplit(handler.path)
+
+        self.method = handler.command
+        self.path = url.path
+        self.query = parse_qs(url.query, keep_blank_values=True)
+        self.headers = handler.headers
+
+        length = int(handler.headers.get('Content-Length') or 0)
+        self.body = handler.rfile.read(length) if length > 0 else b''
+
+    def json(self):
+        if not self.body:
+            return None
+
+        return json.loads(self.body)
+
+    def form(self):
+        return {k: v[0] for k, v in parse_qs(self.body.decode()).items()}
+
+class HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    # Concurrent clients overflow the default listen backlog of 5 and stall on SYN retries
+    request_queue_size = 128
+
+class StandInServer(abc.ABC):
+    stats_path = '/_standin/stats'
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: int | None = None,
+        clock: Clock | None = None
+    ):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+        self.clock = clock or Clock()
+        self.random = random.Random(seed)
+        self.lock = threading.RLock()
+        self.stats: Counter[str] = Counter()
+
+        self.httpd = HTTPServer((host, port), self.handler_class())
+
+        self.thread: threading.Thread | None = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever,
+            name=type(self).__name__,
+            daemon=True
+        )
+        self.thread.start()
+
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+        if self.thread:
+            self.thread.join()
+
+    def serve_forever(self):
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args: Any):
+        self.stop()
+
+    @abc.abstractmethod
+    def handle(self, request: Request) -> Response:
+        ...
+
+    def inject(self, request: Request) -> Response | None:
+        with self.lock:
+            delay = self.latency + self.random.uniform(0, self.latency_jitter)
+            failed = self.error_rate > 0 and self.random.random() < self.error_rate
+
+        if delay > 0:
+            self.clock.sleep(delay)
+
+        if failed:
+            return Response(self.error_status, {'message': 'Injected error'})
+
+        return None
+
+    def dispatch(self, request: Request) -> Response:
+        if request.path == self.stats_path:
+            with self.lock:
+                stats = dict(self.stats)
+
+                if request.method == 'DELETE':
+                    self.stats.clear()
+
+            return Response(200, stats)
+
+        response = self.inject(request)
+        if response:
+            return response
+
+        try:
+            return self.handle(request)
+        except Exception as e:
+            return Response(500, {'message': repr(e)})
+
+    def handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def handle_one(self):
+                request = Request(self)
+                response = server.dispatch(request)
+
+                body = b''
+                if response.body is not None:
+                    body = json.dumps(response.body, default=str).encode()
+
+                self.send_response(response.status)
+                if body:
+                    self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for k, v in response.headers.items():
+                    self.send_header(k, v)
+                self.end_headers()
+
+                if body and self.command != 'HEAD':
+                    self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = handle_one
+
+            def log_message(self, format: str, *args: Any):
+                pass
+
+        return Handler
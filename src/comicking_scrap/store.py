@@ -0,0 +1,121 @@
+import sqlite3
+import threading
+from typing import Any
+
+class Store:
+    schema = [
+        '''
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS blob (
+            key TEXT PRIMARY KEY,
+            value BLOB NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS manga_sync (
+            mal_id INTEGER PRIMARY KEY,
+            comic_code TEXT,
+            status TEXT,
+            fingerprint TEXT,
+            etag TEXT,
+            modified TEXT,
+            first_synced REAL NOT NULL,
+            synced REAL NOT NULL,
+            checked REAL NOT NULL,
+            checks INTEGER NOT NULL DEFAULT 0,
+            changes INTEGER NOT NULL DEFAULT 0,
+            next_check REAL NOT NULL
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS manga_sync_next_check ON manga_sync (next_check)
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS dead_letter (
+            mal_id INTEGER PRIMARY KEY,
+            source TEXT NOT NULL,
+            depth INTEGER NOT NULL DEFAULT 0,
+            payload TEXT,
+            error TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 1,
+            first_failed REAL NOT NULL,
+            last_failed REAL NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS entity_index (
+            kind TEXT NOT NULL,
+            external_id INTEGER NOT NULL,
+            code TEXT NOT NULL,
+            PRIMARY KEY (kind, external_id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS payload (
+            digest TEXT PRIMARY KEY,
+            value BLOB NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS payload_ref (
+            mal_id INTEGER NOT NULL,
+            endpoint TEXT NOT NULL,
+            digest TEXT NOT NULL,
+            fetched REAL NOT NULL,
+            PRIMARY KEY (mal_id, endpoint)
+        )
+        '''
+    ]
+
+    def __init__(self, path: str = ':memory:'):
+        self.path = path
+        self.lock = threading.RLock()
+
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+
+        if path != ':memory:':
+            self.connection.execute('PRAGMA journal_mode=WAL')
+
+        with self.lock:
+            for statement in self.schema:
+                self.connection.execute(statement)
+
+    def execute(self, sql: str, parameters: Any = ()):
+        with self.lock:
+            self.connection.execute(sql, parameters)
+
+    def query(self, sql: str, parameters: Any = ()) -> list[sqlite3.Row]:
+        with self.lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def get(self, key: str) -> str | None:
+        rows = self.query('SELECT value FROM meta WHERE key = ?', (key,))
+
+        return rows[0]['value'] if rows else None
+
+    def set(self, key: str, value: str):
+        self.execute(
+            'INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value',
+            (key, value)
+        )
+
+    def get_blob(self, key: str) -> bytes | None:
+        rows = self.query('SELECT value FROM blob WHERE key = ?', (key,))
+
+        return rows[0]['value'] if rows else None
+
+    def set_blob(self, key: str, value: bytes):
+        self.execute(
+            'INSERT INTO blob (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value',
+            (key, value)
+        )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,25 @@
+from .bot import Bot
+from .deadletter import DeadLetterQueue
+from .pipeline import Pipeline
+from .seenset import SeenSet
+
+class Target:
+    def __init__(
+        self,
+        name: str,
+        bot: Bot,
+        seen: SeenSet | None = None,
+        dead_letters: DeadLetterQueue | None = None
+    ):
+        self.name = name
+        self.bot = bot
+
+        # Progress is kept per target, one lagging behind catches up on its own
+        self.seen = seen if seen is not None else SeenSet()
+        self.dead_letters = dead_letters
+        self.consecutive_failures = 0
+
+        self.pipeline = Pipeline(bot)
+
+    def flush(self):
+        self.seen.flush()
@@ -0,0 +1,160 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable
+from urllib.parse import urlparse
+
+class Span:
+    def __init__(
+        self,
+        name: str,
+        category: str,
+        args: dict[str, Any],
+        parent: 'Span | None' = None
+    ):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.parent = parent
+        self.started = 0
+        self.requests = 0
+
+    def depth(self):
+        depth, span = 0, self
+        while span.parent:
+            depth, span = depth + 1, span.parent
+
+        return depth
+
+    def root(self):
+        span = self
+        while span.parent:
+            span = span.parent
+
+        return span
+
+class Tracer:
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8') if path else None
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.pid = os.getpid()
+        self.origin = time.perf_counter_ns()
+        self.emitted = 0
+        self.listeners: list[Any] = []
+
+        if self.file:
+            self.file.write('[\n')
+
+    def stack(self) -> list[Span]:
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+
+        return stack
+
+    def current(self):
+        stack = self.stack()
+
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, name: str, category: str = 'phase', **args: Any):
+        stack = self.stack()
+
+        span = Span(name, category, args, stack[-1] if stack else None)
+        span.started = time.perf_counter_ns()
+
+        stack.append(span)
+        for listener in self.listeners:
+            listener.enter(span)
+
+        try:
+            yield span
+        except BaseException as e:
+            span.args['error'] = repr(e)
+
+            raise e
+        finally:
+            stack.pop()
+            for listener in self.listeners:
+                listener.exit(span)
+
+            if category == 'http' and span.parent:
+                root = span.root()
+                with self.lock:
+                    root.requests += 1
+
+            self.emit(span, time.perf_counter_ns())
+
+    def bind(self, fn: Callable[..., Any]):
+        parent = self.current()
+
+        def bound(*args: Any, **kwargs: Any):
+            if not parent:
+                return fn(*args, **kwargs)
+
+            # Spans opened on another thread (e.g. an executor) nest under the submitting span
+            stack = self.stack()
+            stack.append(parent)
+            for listener in self.listeners:
+                listener.enter(parent)
+
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stack.pop()
+                for listener in self.listeners:
+                    listener.exit(parent)
+
+        return bound
+
+    def emit(self, span: Span, stopped: int):
+        if not self.file:
+            return
+
+        event = {
+            'name': span.name,
+            'cat': span.category,
+            'ph': 'X',
+            'ts': (span.started - self.origin) / 1000,
+            'dur': (stopped - span.started) / 1000,
+            'pid': self.pid,
+            'tid': threading.get_ident(),
+            'args': span.args
+        }
+
+        line = json.dumps(event, default=str)
+
+        with self.lock:
+            if self.file.closed:
+                return
+
+            if self.emitted > 0:
+                self.file.write(',\n')
+            self.file.write(line)
+            self.emitted += 1
+
+    def instrument(self, client: Any, category: str = 'http'):
+        call_api = client.call_api
+
+        def traced_call_api(method: str, url: str, *args: Any, **kwargs: Any):
+            with self.span(f'{method} {urlparse(url).path}', category, url=url) as span:
+                response = call_api(method, url, *args, **kwargs)
+
+                span.args['status'] = response.status
+
+                return response
+
+        client.call_api = traced_call_api
+
+    def close(self):
+        if not self.file:
+            return
+
+        with self.lock:
+            self.file.write('\n]\n')
+            self.file.close()
@@ -0,0 +1,184 @@
+import re
+import unicodedata
+from datetime import datetime
+from typing import Any, Callable
+from urllib.parse import quote
+
+from .openapi import load_spec, resolve, spec_path
+
+class ValidationError(ValueError):
+    def __init__(self, schema: str, field: str, reason: str):
+        super().__init__('%s.%s %s' % (schema, field, reason))
+
+        self.schema = schema
+        self.field = field
+        self.reason = reason
+
+control_characters = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]')
+
+hostname = re.compile(r'^(?=.{1,253}$)[a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?(\.[a-z0-9]([a-z0-9-]{0,61}[a-z0-9])?)*$')
+relative_reference = re.compile(r"^[/?#][A-Za-z0-9\-._~!$&'()*+,;=:@/?#%]*$")
+
+def normalize_text(value: str):
+    return control_characters.sub('', unicodedata.normalize('NFC', value)).strip()
+
+def normalize_host(value: str):
+    value = value.strip().rstrip('.').lower()
+
+    try:
+        value = value.encode('idna').decode('ascii')
+    except UnicodeError:
+        raise ValueError('invalid host "%s"' % value)
+
+    if not hostname.match(value):
+        raise ValueError('invalid host "%s"' % value)
+
+    return value
+
+def normalize_reference(value: str | None):
+    if not value:
+        return None
+
+    # Percent-encode what is not allowed as is (brackets too, the reference pattern has none), existing escapes are kept
+    value = quote(value.strip(), safe="/?#@!$&'()*+,;=:%~")
+    if not value.startswith(('/', '?', '#')):
+        value = '/' + value
+
+    return value
+
+# Properties the spec types as plain strings but ComicKing parses as hosts or references
+field_formats = {
+    'host': 'hostname',
+    'websiteHost': 'hostname',
+    'linkWebsiteHost': 'hostname',
+    'relativeReference': 'relative-reference',
+    'linkRelativeReference': 'relative-reference'
+}
+
+class Validator:
+    def __init__(self, spec: dict[str, Any], name: str, schema: dict[str, Any]):
+        self.name = name
+        self.required: list[str] = schema.get('required', [])
+        self.fields: dict[str, Callable[[Any], Any]] = {
+            k: self.compile(resolve(spec, v), field_formats.get(k))
+            for k, v in schema.get('properties', {}).items()
+        }
+
+    @staticmethod
+    def compile(schema: dict[str, Any], format: str | None = None) -> Callable[[Any], Any]:
+        type = schema.get('type')
+        format = schema.get('format') or format
+        nullable = schema.get('nullable', False)
+
+        max_length = schema.get('maxLength')
+        min_length = schema.get('minLength')
+        pattern = re.compile(schema['pattern']) if 'pattern' in schema else None
+        enum = schema.get('enum')
+        minimum = schema.get('minimum')
+        maximum = schema.get('maximum')
+
+        def check(value: Any):
+            if type == 'string' and isinstance(value, str):
+                value = normalize_text(value)
+                if not value:
+                    if not nullable:
+                        raise ValueError('must not be empty')
+
+                    value = None
+
+            if value is None:
+                if not nullable:
+                    raise ValueError('must not be null')
+
+                return None
+
+            match type:
+                case 'string':
+                    if format == 'date-time' and isinstance(value, datetime):
+                        return value
+                    if not isinstance(value, str):
+                        raise ValueError('must be a string')
+                case 'integer':
+                    if isinstance(value, bool) or not isinstance(value, int):
+                        raise ValueError('must be an integer')
+                case 'number':
+                    if isinstance(value, bool) or not isinstance(value, (int, float)):
+                        raise ValueError('must be a number')
+                case 'boolean':
+                    if not isinstance(value, bool):
+                        raise ValueError('must be a boolean')
+                case _:
+                    pass
+
+            match format:
+                case 'date-time':
+                    try:
+                        datetime.fromisoformat(value)
+                    except ValueError:
+                        raise ValueError('must be a date-time')
+                case 'hostname':
+                    if not hostname.match(value):
+                        raise ValueError('must be a lowercase ASCII host')
+                case 'relative-reference':
+                    if not relative_reference.match(value):
+                        raise ValueError('must be a percent-encoded relative reference')
+                case _:
+                    pass
+
+            if max_length is not None and len(value) > max_length:
+                raise ValueError('longer than %s' % max_length)
+            if min_length is not None and len(value) < min_length:
+                raise ValueError('shorter than %s' % min_length)
+            if pattern and not pattern.search(value):
+                raise ValueError('does not match "%s"' % pattern.pattern)
+            if enum is not None and value not in enum:
+                raise ValueError('not one of %s' % enum)
+            if minimum is not None and value < minimum:
+                raise ValueError('lower than %s' % minimum)
+            if maximum is not None and value > maximum:
+                raise ValueError('greater than %s' % maximum)
+
+            return value
+
+        return check
+
+    def __call__(self, values: dict[str, Any]):
+        result: dict[str, Any] = {}
+
+        for k, v in values.items():
+            check = self.fields.get(k)
+            if not check:
+                raise ValidationError(self.name, k, 'is not a property')
+
+            try:
+                result[k] = check(v)
+            except ValueError as e:
+                raise ValidationError(self.name, k, str(e)) from None
+
+        for k in self.required:
+            if result.get(k) is None:
+                raise ValidationError(self.name, k, 'is required')
+
+        return result
+
+class Validators:
+    def __init__(self, spec: dict[str, Any]):
+        schemas = spec.get('components', {}).get('schemas', {})
+
+        # Request payloads only, compiled once
+        self.validators = {
+            k: Validator(spec, k, resolve(spec, v))
+            for k, v in schemas.items()
+            if k.startswith(('New', 'Set'))
+        }
+
+    @classmethod
+    def load(cls, path: str | None = None):
+        return cls(load_spec(path or spec_path('comicking')))
+
+    def validate(self, name: str, values: dict[str, Any]):
+        validator = self.validators.get(name)
+        if not validator:
+            return values
+
+        return validator(values)
@@ -0,0 +1,118 @@
+import logging
+
+import pytest
+
+from comicking_scrap.bot import Bot
+from comicking_scrap.bot_jikan import BotJikan
+from comicking_scrap.clock import VirtualClock
+from comicking_scrap.standin import ComicKingStandIn, JikanDataset, JikanStandIn
+
+# Stand-in backed fixtures for the end-to-end tests, every manga is in a franchise with its neighbours
+
+def manga(mal_id: int, **fields):
+    return {
+        'mal_id': mal_id,
+        'url': f'https://myanimelist.net/manga/{mal_id}',
+        'approved': True,
+        'type': 'Manga',
+        'popularity': mal_id,
+        'title': f'Manga {mal_id}',
+        'titles': [
+            {'type': 'Default', 'title': f'Manga {mal_id}'},
+            {'type': 'Japanese', 'title': f'漫画 {mal_id}'},
+            {'type': 'English', 'title': f'Comic {mal_id}'}
+        ],
+        'images': {'jpg': {'image_url': f'https://cdn.myanimelist.net/images/manga/{mal_id}.jpg'}},
+        'chapters': 10,
+        'volumes': 2,
+        'status': 'Publishing',
+        'published': {'from': '2001-01-01T00:00:00+00:00', 'to': None},
+        'synopsis': 'A story.',
+        'genres': [{'mal_id': 1, 'type': 'manga', 'name': 'Action', 'url': ''}],
+        'explicit_genres': [],
+        'themes': [],
+        'demographics': [{'mal_id': 27, 'type': 'manga', 'name': 'Shounen', 'url': ''}],
+        'authors': [{'mal_id': 100 + mal_id % 3, 'type': 'people', 'name': f'Author {mal_id % 3}', 'url': ''}],
+        'serializations': [{'mal_id': 5, 'type': 'manga', 'name': 'Shounen Jump', 'url': ''}],
+        **fields
+    }
+
+def dataset(count: int):
+    dataset = JikanDataset()
+
+    for mal_id in range(1, count + 1):
+        related = [v for v in (mal_id - 1, mal_id + 1) if 1 <= v <= count]
+
+        dataset.add(
+            manga(mal_id),
+            external=[{'name': 'Official Site', 'url': f'https://example.com/manga/{mal_id}'}],
+            relations=[{'relation': 'Sequel', 'entry': [
+                {'mal_id': v, 'type': 'manga', 'name': f'Manga {v}', 'url': ''} for v in related
+            ]}] if related else [],
+            pictures=[{'jpg': {'image_url': f'https://cdn.myanimelist.net/images/manga/{mal_id}.jpg'}}],
+            characters=[],
+            recommendations=[]
+        )
+
+    return dataset
+
+@pytest.fixture
+def clock():
+    return VirtualClock()
+
+@pytest.fixture
+def comicking():
+    with ComicKingStandIn() as server:
+        yield server
+
+@pytest.fixture
+def jikan():
+    with JikanStandIn(dataset(6), rate_limits=[]) as server:
+        yield server
+
+@pytest.fixture
+def create_bot(comicking, clock):
+    bots = []
+
+    def create(server=None, **kwargs):
+        server = server or comicking
+
+        bot = Bot(
+            server.base_comicking,
+            oauth_issuer=server.oauth_issuer,
+            oauth_client_id='test',
+            oauth_client_secret='test',
+            oauth_audience='comicking',
+            logger=logging.getLogger('comicking_scrap.test'),
+            clock=kwargs.pop('clock', clock),
+            **kwargs
+        )
+        bots.append(bot)
+
+        bot.load(True)
+
+        return bot
+
+    yield create
+
+    for bot in bots:
+        bot.close()
+
+@pytest.fixture
+def bot(create_bot):
+    return create_bot()
+
+@pytest.fixture
+def create_bot_jikan(bot, jikan):
+    def create(**kwargs):
+        bot_jikan = BotJikan(
+            kwargs.pop('bot', bot),
+            logger=logging.getLogger('comicking_scrap.test'),
+            base_jikan=jikan.base_jikan,
+            **kwargs
+        )
+        bot_jikan.load(True)
+
+        return bot_jikan
+
+    return create
@@ -0,0 +1,97 @@
+import zlib
+
+import pytest
+
+from comicking_scrap.archive import PayloadArchive
+from comicking_scrap.clock import VirtualClock
+from comicking_scrap.store import Store
+
+def test_encode_canonical():
+    assert PayloadArchive.encode({'a': 1, 'b': [1, 2]}) == PayloadArchive.encode({'b': [1, 2], 'a': 1})
+    assert PayloadArchive.encode({'a': 1})[1] == b'{"a":1}'
+    assert PayloadArchive.encode({'a': 1})[0] != PayloadArchive.encode({'a': 2})[0]
+
+def test_put_get():
+    clock = VirtualClock(1000.0, frozen=True)
+    store = Store()
+    archive = PayloadArchive(store, clock=clock)
+
+    assert archive.get(2, 'manga') is None
+
+    digest = archive.put(2, 'manga', {'mal_id': 2, 'title': 'Berserk'})
+
+    assert archive.get(2, 'manga') == {'mal_id': 2, 'title': 'Berserk'}
+    assert archive.get(2, 'external') is None
+
+    row = store.query('SELECT * FROM payload_ref')[0]
+    assert (row['digest'], row['fetched']) == (digest, 1000.0)
+
+    value = store.query('SELECT value FROM payload')[0]['value']
+    assert zlib.decompress(value) == PayloadArchive.encode({'mal_id': 2, 'title': 'Berserk'})[1]
+
+def test_dedupe():
+    clock = VirtualClock(1000.0, frozen=True)
+    archive = PayloadArchive(Store(), clock=clock)
+
+    archive.put(2, 'relations', [])
+    archive.put(656, 'relations', [])
+    archive.put(656, 'external', [])
+
+    assert len(archive) == 1
+
+    clock.advance(60)
+    archive.put(2, 'relations', [])
+
+    assert len(archive) == 1
+    assert archive.store.query('SELECT fetched FROM payload_ref WHERE mal_id = 2')[0]['fetched'] == 1060.0
+
+def test_replaced_payload_dropped():
+    archive = PayloadArchive(Store())
+
+    archive.put(2, 'manga', {'chapters': 1})
+    archive.put(656, 'manga', {'chapters': 1})
+
+    # Still referenced by the other manga
+    archive.put(2, 'manga', {'chapters': 2})
+    assert len(archive) == 2
+
+    archive.put(656, 'manga', {'chapters': 2})
+    assert len(archive) == 1
+
+    assert archive.get(2, 'manga') == {'chapters': 2}
+    assert archive.get(656, 'manga') == {'chapters': 2}
+
+def test_mal_ids():
+    archive = PayloadArchive(Store())
+
+    archive.put(656, 'manga', {})
+    archive.put(2, 'manga', {})
+    archive.put(3, 'external', [])
+
+    assert archive.mal_ids() == [2, 656]
+    assert archive.mal_ids('external') == [3]
+
+@pytest.fixture
+def archive(clock):
+    return PayloadArchive(Store(), clock=clock)
+
+def test_remap_offline(create_bot_jikan, archive, comicking, jikan):
+    bot_jikan = create_bot_jikan(archive=archive)
+
+    codes = bot_jikan.scrap_comics_complete(2)
+
+    assert archive.mal_ids() == [5, 6]
+    assert archive.get(6, 'external') == {'data': [{'name': 'Official Site', 'url': 'https://example.com/manga/6'}]}
+
+    comic_code = codes[0]
+    del comicking.records(f'/rest/comics/{comic_code}/categories')['genre:action']
+
+    # Remapped from the archive alone
+    jikan.stop()
+
+    results = list(bot_jikan.remap())
+
+    assert [(v.mal_id, v.comic_code) for v in results] == [(5, codes[1]), (6, comic_code)]
+    assert 'genre:action' in comicking.records(f'/rest/comics/{comic_code}/categories')
+
+    assert len(list(bot_jikan.remap(1))) == 1
@@ -0,0 +1,50 @@
+from comicking_scrap.benchmark import benchmark, compare, synthetic_dataset
+
+def test_synthetic_dataset_deterministic():
+    first, second = synthetic_dataset(10, seed=1), synthetic_dataset(10, seed=1)
+
+    assert first.manga == second.manga
+    assert first.payloads == second.payloads
+    assert synthetic_dataset(10, seed=2).manga != first.manga
+
+def test_synthetic_dataset_franchises():
+    dataset = synthetic_dataset(7, franchise_size=3)
+
+    def related(mal_id):
+        return {
+            v['relation']: [e['mal_id'] for e in v['entry']]
+            for v in dataset.payloads['relations'][mal_id]
+        }
+
+    assert sorted(dataset.manga) == list(range(1, 8))
+    assert related(1) == {'Sequel': [2], 'Side Story': [3], 'Adaptation': [1]}
+    assert related(2) == {'Prequel': [1], 'Sequel': [3], 'Adaptation': [2]}
+    assert related(7) == {'Adaptation': [7]}
+
+def test_compare(capsys):
+    baseline = [
+        {'scenario': 'get', 'dataset': 'small', 'wall_time': 10.0, 'new_comics_per_minute': 60.0},
+        {'scenario': 'scrap', 'dataset': 'small', 'wall_time': 10.0}
+    ]
+    results = [
+        {'scenario': 'get', 'dataset': 'small', 'wall_time': 10.5, 'new_comics_per_minute': 40.0},
+        {'scenario': 'scrap', 'dataset': 'small', 'wall_time': 12.0},
+        {'scenario': 'load', 'dataset': 'small', 'wall_time': 99.0}
+    ]
+
+    regressions = compare(results, baseline, 0.1)
+
+    assert [v[:3] for v in regressions] == [
+        ('get', 'small', 'new_comics_per_minute'),
+        ('scrap', 'small', 'wall_time')
+    ]
+    assert 'REGRESSION' in capsys.readouterr().out
+
+def test_benchmark():
+    result = benchmark('get', 'small', 2, jikan_rate_limits=[])
+
+    assert result['error'] is None
+    assert result['comics'] == 2
+    assert result['new_comics'] == 2
+    assert result['http_calls']['jikan']['getMangaById'] >= 2
+    assert result['http_calls_per_comic'] > 0
@@ -0,0 +1,62 @@
+from comicking_scrap.cache import ExistenceCache
+from comicking_scrap.clock import VirtualClock
+
+def test_present():
+    cache = ExistenceCache(clock=VirtualClock(frozen=True))
+
+    assert cache.get('comic:berserk') == (False, None)
+
+    cache.set('comic:berserk', 'berserk')
+
+    assert cache.get('comic:berserk') == (True, 'berserk')
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_absent_expires():
+    clock = VirtualClock(frozen=True)
+    cache = ExistenceCache(negative_ttl=300, clock=clock)
+
+    cache.set_absent('comic:berserk')
+
+    clock.advance(299)
+    assert cache.get('comic:berserk') == (True, None)
+
+    clock.advance(1)
+    assert cache.get('comic:berserk') == (False, None)
+    assert 'comic:berserk' not in cache.absent
+
+def test_present_never_expires():
+    clock = VirtualClock(frozen=True)
+    cache = ExistenceCache(negative_ttl=300, clock=clock)
+
+    cache.set('comic:berserk')
+    clock.advance(3600)
+
+    assert cache.get('comic:berserk') == (True, True)
+
+def test_set_replaces_absent():
+    cache = ExistenceCache(clock=VirtualClock(frozen=True))
+
+    cache.set_absent('comic:berserk')
+    cache.set('comic:berserk', 'berserk')
+    assert cache.get('comic:berserk') == (True, 'berserk')
+
+    cache.set_absent('comic:berserk')
+    assert cache.get('comic:berserk') == (True, None)
+
+def test_no_negative_ttl():
+    cache = ExistenceCache(negative_ttl=0, clock=VirtualClock(frozen=True))
+
+    cache.set_absent('comic:berserk')
+
+    assert cache.get('comic:berserk') == (False, None)
+
+def test_discard():
+    cache = ExistenceCache(clock=VirtualClock(frozen=True))
+
+    cache.set('comic:berserk')
+    cache.set_absent('comic:vagabond')
+    cache.discard('comic:berserk')
+    cache.discard('comic:vagabond')
+
+    assert cache.get('comic:berserk') == (False, None)
+    assert cache.get('comic:vagabond') == (False, None)
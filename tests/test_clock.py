@@ -0,0 +1,69 @@
+import threading
+import time
+
+from comicking_scrap.clock import Clock, VirtualClock
+
+def test_clock():
+    clock = Clock()
+
+    assert abs(clock.time() - time.time()) < 1
+    clock.sleep(-1)
+
+def test_virtual_sleep_skips():
+    clock = VirtualClock(1000.0, frozen=True)
+
+    started = time.monotonic()
+    clock.sleep(3600)
+
+    assert time.monotonic() - started < 1
+    assert clock.time() == 4600.0
+    assert clock.elapsed() == 3600.0
+    assert clock.slept == 3600.0
+
+def test_virtual_advance():
+    clock = VirtualClock(0.0, frozen=True)
+
+    clock.sleep(10)
+    clock.advance(5)
+    clock.sleep(0)
+
+    assert clock.monotonic() == 15.0
+    assert clock.slept == 10.0
+
+def test_virtual_parallel_sleeps_overlap():
+    clock = VirtualClock(0.0, frozen=True)
+    barrier = threading.Barrier(4)
+
+    def work():
+        # A thread joins the timeline at its first read
+        clock.monotonic()
+        barrier.wait()
+        for _ in range(3):
+            clock.sleep(1)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert clock.elapsed() == 3.0
+    assert clock.slept == 12.0
+
+def test_virtual_new_thread_starts_at_latest():
+    clock = VirtualClock(0.0, frozen=True)
+    clock.sleep(30)
+
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(clock.monotonic()))
+    thread.start()
+    thread.join()
+
+    assert seen == [30.0]
+
+def test_virtual_real_time_passes():
+    clock = VirtualClock(0.0)
+
+    time.sleep(0.01)
+
+    assert clock.monotonic() > 0
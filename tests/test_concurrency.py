@@ -0,0 +1,196 @@
+from concurrent.futures import Future
+
+import pytest
+
+from comicking_scrap.bot import Bot
+from comicking_scrap.clock import VirtualClock
+from comicking_scrap.concurrency import AdaptiveLimiter, Pacer, wait_all
+
+class Response:
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.headers = headers or {}
+
+    def getheader(self, name):
+        return self.headers.get(name)
+
+class Client:
+    def __init__(self, *statuses):
+        self.responses = [v if isinstance(v, Response) else Response(v) for v in statuses]
+        self.calls = []
+
+    def call_api(self, method, url, header_params=None, body=None, **kwargs):
+        self.calls.append((method, url))
+
+        return self.responses.pop(0)
+
+def test_additive_increase():
+    limiter = AdaptiveLimiter(VirtualClock(frozen=True), initial=1, maximum=3)
+
+    for _ in range(3):
+        limiter.release(limiter.acquire(), 200)
+
+    assert limiter.limit == pytest.approx(1 + 1 + 1 / 2 + 1 / 2.5)
+
+    for _ in range(10):
+        limiter.release(limiter.acquire(), 200)
+
+    assert limiter.limit == 3
+
+def test_multiplicative_decrease_once_per_window():
+    clock = VirtualClock(frozen=True)
+    limiter = AdaptiveLimiter(clock, initial=8, maximum=8)
+
+    started = limiter.acquire()
+    clock.advance(1)
+
+    limiter.release(limiter.acquire(), 503)
+    assert limiter.limit == 4
+
+    # Started before the cut, the same overload is not counted twice
+    limiter.release(started, 429)
+    assert limiter.limit == 4
+
+    limiter.release(limiter.acquire(), 500)
+    assert limiter.limit == 2
+    assert limiter.stats == {'requests': 3, 'overloaded': 2, 'errors': 1, 'decreases': 2}
+
+    for _ in range(3):
+        limiter.release(limiter.acquire(), 503)
+    assert limiter.limit == 1
+
+def test_decrease_on_latency():
+    clock = VirtualClock(frozen=True)
+    limiter = AdaptiveLimiter(clock, initial=4, maximum=8, increase=0, latency_window=4)
+
+    def request(latency):
+        started = limiter.acquire()
+        clock.advance(latency)
+        limiter.release(started, 200)
+
+    for _ in range(4):
+        request(1)
+    assert limiter.baseline == 1
+
+    request(5)
+    assert limiter.limit == 4
+
+    request(5)
+    assert limiter.limit == 2
+    assert limiter.stats['slow'] == 1
+
+def test_slow_at_minimum_moves_baseline():
+    clock = VirtualClock(frozen=True)
+    limiter = AdaptiveLimiter(clock, initial=1, increase=0, latency_window=1)
+
+    for latency in (1, 5):
+        started = limiter.acquire()
+        clock.advance(latency)
+        limiter.release(started, 200)
+
+    assert limiter.limit == 1
+    assert limiter.baseline == 5
+    assert 'decreases' not in limiter.stats
+
+def test_retry_delay():
+    limiter = AdaptiveLimiter(backoff=1, max_backoff=10)
+
+    assert limiter.retry_delay(Response(503), 0) == 1
+    assert limiter.retry_delay(Response(503), 2) == 4
+    assert limiter.retry_delay(Response(503), 5) == 10
+    assert limiter.retry_delay(Response(429, {'Retry-After': '3'}), 5) == 3
+    assert limiter.retry_delay(Response(429, {'Retry-After': 'soon'}), 1) == 2
+
+def instrumented(*statuses, max_retries=5):
+    clock = VirtualClock(frozen=True)
+    limiter = AdaptiveLimiter(clock, max_retries=max_retries)
+    client = limiter.instrument(Client(*statuses), Bot.keyed_creates)
+
+    return limiter, client, clock
+
+def test_retries_overload():
+    limiter, client, clock = instrumented(429, 503, 200)
+
+    assert client.call_api('PATCH', 'http://comicking/api/rest/comics/berserk', {}, {}).status == 200
+    assert len(client.calls) == 3
+    assert limiter.stats['retries'] == 2
+    assert clock.slept == 1 + 2
+
+def test_max_retries():
+    limiter, client, _ = instrumented(503, 503, 503, max_retries=2)
+
+    assert client.call_api('DELETE', 'http://comicking/api/rest/comics/berserk', {}, None).status == 503
+    assert len(client.calls) == 3
+
+def test_reads_pass_through():
+    limiter, client, _ = instrumented(503)
+
+    assert client.call_api('GET', 'http://comicking/api/rest/comics', {}, None).status == 503
+    assert limiter.stats['requests'] == 0
+
+@pytest.mark.parametrize('url, body, retried', [
+    ('http://comicking/api/rest/comics', {'code': 'berserk'}, True),
+    ('http://comicking/api/rest/comics', {'code': None}, False),
+    ('http://comicking/api/rest/categories', {'typeCode': 'genre', 'code': 'action'}, True),
+    ('http://comicking/api/rest/categories', {'typeCode': 'genre'}, False),
+    ('http://comicking/api/rest/comics/berserk/covers', {'imageULID': '01ABC'}, True),
+    ('http://comicking/api/rest/comics/berserk/titles', {'languageLang': 'en', 'content': 'Berserk'}, False),
+    ('http://comicking/api/rest/images', {'linkWebsiteHost': 'cdn.myanimelist.net'}, False)
+])
+def test_post_503_only_retries_keyed_creates(url, body, retried):
+    _, client, _ = instrumented(503, 201)
+
+    status = client.call_api('POST', url, {}, body).status
+
+    assert status == (201 if retried else 503)
+
+def test_post_retry_after_and_429_always_retry():
+    body = {'languageLang': 'en', 'content': 'Berserk'}
+
+    _, client, clock = instrumented(Response(503, {'Retry-After': '7'}), 201)
+    assert client.call_api('POST', 'http://comicking/api/rest/comics/berserk/titles', {}, body=body).status == 201
+    assert clock.slept == 7
+
+    _, client, _ = instrumented(429, 201)
+    assert client.call_api('POST', 'http://comicking/api/rest/comics/berserk/titles', {}, body).status == 201
+
+def test_pacer():
+    clock = VirtualClock(frozen=True)
+    pacer = Pacer(2, clock)
+    client = pacer.instrument(Client(200, 200, 200))
+
+    for _ in range(3):
+        client.call_api('GET', 'https://api.jikan.moe/v4/manga/2')
+
+    assert clock.monotonic() == 4
+    assert len(client.calls) == 3
+
+def test_pacer_idle_does_not_bank():
+    clock = VirtualClock(frozen=True)
+    pacer = Pacer(2, clock)
+
+    pacer.wait()
+    clock.advance(10)
+    pacer.wait()
+    pacer.wait()
+
+    assert clock.slept == 2
+
+def completed(result=None, error=None):
+    future = Future()
+    if error:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+    return future
+
+def test_wait_all():
+    assert wait_all([completed(1), completed(2)]) == [1, 2]
+    assert wait_all([]) == []
+
+    first = ValueError('first')
+    with pytest.raises(ValueError) as e:
+        wait_all([completed(1), completed(error=first), completed(error=KeyError('second'))])
+
+    assert e.value is first
@@ -0,0 +1,91 @@
+import json
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from comicking_scrap.daemon import Daemon
+
+def get(daemon, path):
+    host, port = daemon.httpd.server_address[:2]
+
+    try:
+        with urllib.request.urlopen(f'http://{host}:{port}{path}') as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def create_daemon(bot, bot_jikan, **kwargs):
+    return Daemon(bot, bot_jikan, logging.getLogger('comicking_scrap.test'), **kwargs)
+
+def test_cycle(bot, create_bot_jikan, comicking):
+    daemon = create_daemon(bot, create_bot_jikan(), max_new_comic=2)
+
+    daemon.run_cycle()
+
+    assert daemon.cycles == 1
+    assert daemon.cycle['error'] is None
+    assert daemon.cycle['created'] == 2
+    assert daemon.totals['created'] == 2
+    assert daemon.totals['requests'] > 0
+    assert daemon.last_success is not None
+    assert len(comicking.records('/rest/comics')) == 2
+
+    daemon.run_cycle()
+
+    # Seen manga are skipped, the next cycle picks up where the last stopped
+    assert daemon.totals['created'] == 4
+    assert len(comicking.records('/rest/comics')) == 4
+
+def test_failed_cycle(bot, create_bot_jikan, jikan):
+    daemon = create_daemon(bot, create_bot_jikan(), interval=60, max_new_comic=2)
+
+    jikan.stop()
+    daemon.run_cycle()
+
+    assert daemon.cycle['error']
+    assert daemon.totals['errors'] == 1
+    assert daemon.last_success is None
+    assert not daemon.healthy()
+
+def test_healthy(bot, create_bot_jikan, clock):
+    daemon = create_daemon(bot, create_bot_jikan(), interval=60, max_new_comic=1)
+
+    assert daemon.healthy()
+
+    daemon.run_cycle()
+    assert daemon.healthy()
+
+    clock.advance(60 * 3 + daemon.cycle['duration'])
+    assert not daemon.healthy()
+
+def test_health_endpoints(bot, create_bot_jikan):
+    daemon = create_daemon(
+        bot,
+        create_bot_jikan(),
+        interval=3600,
+        max_new_comic=1,
+        health_address=('127.0.0.1', 0)
+    )
+
+    thread = threading.Thread(target=daemon.run)
+    thread.start()
+
+    try:
+        while daemon.cycles < 1:
+            time.sleep(0.05)
+
+        assert get(daemon, '/health') == (200, {'status': 'ok'})
+
+        status, stats = get(daemon, '/stats')
+        assert status == 200
+        assert stats['cycles'] == 1
+        assert stats['totals']['created'] == 1
+        assert stats['catalogs']['languages'] == 4
+        assert stats['seen'] >= 1
+
+        assert get(daemon, '/missing')[0] == 404
+    finally:
+        daemon.stop()
+        thread.join()
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from comicking_scrap.clock import VirtualClock
+from comicking_scrap.deadletter import DeadLetterQueue
+from comicking_scrap.store import Store
+
+class ApiException(Exception):
+    def __init__(self, status, reason, body):
+        super().__init__(f'({status}) {reason}')
+
+        self.status = status
+        self.reason = reason
+        self.body = body
+
+def fail(error):
+    try:
+        raise error
+    except Exception as e:
+        return e
+
+def test_describe():
+    context = DeadLetterQueue.describe(fail(ApiException(409, 'Conflict', b'{"message": "exists"}')))
+
+    assert context['type'] == f'{__name__}.ApiException'
+    assert context['message'] == '(409) Conflict'
+    assert context['status'] == 409
+    assert context['reason'] == 'Conflict'
+    assert context['body'] == "b'{\"message\": \"exists\"}'"
+    assert 'Traceback' in context['traceback']
+
+    assert 'status' not in DeadLetterQueue.describe(fail(ValueError('bad')))
+
+def test_record_and_remove():
+    clock = VirtualClock(1000.0, frozen=True)
+    dead_letters = DeadLetterQueue(Store(), clock=clock)
+
+    dead_letters.record(2, 'search', 0, {'mal_id': 2}, fail(ValueError('first')))
+    clock.advance(60)
+    dead_letters.record(656, 'discover', 1, None, fail(ValueError('other')))
+    dead_letters.record(2, 'replay', 0, {'mal_id': 2, 'title': 'Berserk'}, fail(KeyError('second')))
+
+    assert len(dead_letters) == 2
+
+    first, second = dead_letters.entries()
+    assert (first['mal_id'], first['source'], first['attempts']) == (2, 'replay', 2)
+    assert (first['first_failed'], first['last_failed']) == (1000.0, 1060.0)
+    assert json.loads(first['payload']) == {'mal_id': 2, 'title': 'Berserk'}
+    assert json.loads(first['error'])['type'] == 'builtins.KeyError'
+    assert (second['mal_id'], second['depth'], second['payload']) == (656, 1, 'null')
+
+    assert [v['mal_id'] for v in dead_letters.entries(max_attempts=2)] == [656]
+
+    dead_letters.remove(2)
+    dead_letters.remove(3)
+
+    assert [v['mal_id'] for v in dead_letters.entries()] == [656]
+
+@pytest.fixture
+def dead_letters(clock):
+    return DeadLetterQueue(Store(), clock=clock)
+
+def test_isolates_and_replays(create_bot_jikan, dead_letters, jikan, comicking):
+    bot_jikan = create_bot_jikan(dead_letters=dead_letters)
+
+    # A poison payload fails its manga only, the scrape moves on
+    jikan.dataset.manga[6]['published'] = {'from': 'not-a-date', 'to': None}
+
+    results = list(bot_jikan.iter_comics_complete(2))
+
+    assert [(v.mal_id, v.error is not None) for v in results] == [(6, True), (5, False), (4, False)]
+    assert [v['mal_id'] for v in dead_letters.entries()] == [6]
+    assert dead_letters.entries()[0]['source'] == 'search'
+
+    jikan.dataset.manga[6]['published'] = {'from': '2001-01-01T00:00:00+00:00', 'to': None}
+    jikan.dataset.touch(6)
+
+    results = list(bot_jikan.replay())
+
+    assert [(v.mal_id, v.created, v.error) for v in results] == [(6, True, None)]
+    assert len(dead_letters) == 0
+    assert len(comicking.records('/rest/comics')) == 3
+
+def test_replay_drops_missing(create_bot_jikan, dead_letters):
+    bot_jikan = create_bot_jikan(dead_letters=dead_letters)
+
+    dead_letters.record(404, 'search', 0, None, fail(ValueError('gone')))
+
+    assert list(bot_jikan.replay()) == []
+    assert len(dead_letters) == 0
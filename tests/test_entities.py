@@ -0,0 +1,72 @@
+from comicking_scrap.entities import EntityIndex
+from comicking_scrap.store import Store
+
+def test_code():
+    index = EntityIndex('person')
+
+    assert index.code(1868) == 'mal-1868'
+    assert index.external_id('mal-1868') == 1868
+    assert index.external_id('kentarou-miura') is None
+    assert index.external_id('mal-') is None
+
+def test_get_set():
+    index = EntityIndex('person')
+
+    assert index.get(1868) is None
+
+    index.set(1868, 'mal-1868')
+
+    assert index.get(1868) == 'mal-1868'
+    assert (index.hits, index.misses) == (1, 1)
+    assert len(index) == 1
+
+def test_persisted_per_kind():
+    store = Store()
+
+    EntityIndex('person:comicking', store=store).set(1868, 'mal-1868')
+    EntityIndex('magazine:comicking', store=store).set(5, 'mal-5')
+
+    index = EntityIndex('person:comicking', store=store)
+
+    assert index.get(1868) == 'mal-1868'
+    assert index.get(5) is None
+
+    index.set(1868, 'kentarou-miura')
+
+    assert EntityIndex('person:comicking', store=store).get(1868) == 'kentarou-miura'
+
+def test_resolve(bot, comicking):
+    # Nothing is read up front, entities are indexed on first use
+    assert not {'listPerson', 'listMagazine', 'listCharacter'} & set(comicking.stats)
+
+    assert bot.resolve_person(1868, 'Kentarou Miura') == 'mal-1868'
+    assert bot.resolve_person(1868, 'Kentarou Miura') == 'mal-1868'
+
+    assert comicking.stats['addPerson'] == 1
+    assert comicking.records('/rest/people')['mal-1868']['name'] == 'Kentarou Miura'
+
+def test_resolve_existing(bot, comicking):
+    # Created by an earlier run whose index was lost
+    comicking.insert('addMagazine', {'code': 'mal-5', 'name': 'Shounen Jump'})
+
+    assert bot.resolve_magazine(5, 'Shounen Jump') == 'mal-5'
+    assert bot.magazines.get(5) == 'mal-5'
+    assert comicking.stats['addMagazine'] == 1
+
+def test_resolve_characters(bot, comicking):
+    bot.resolve_characters({1: 'Guts'})
+
+    codes = bot.resolve_characters({1: 'Guts', 2: 'Griffith', 3: 'Casca'})
+
+    assert codes == {1: 'mal-1', 2: 'mal-2', 3: 'mal-3'}
+    assert comicking.stats['addCharacter'] == 3
+
+def test_shared_between_comics(create_bot_jikan, comicking):
+    bot_jikan = create_bot_jikan()
+
+    bot_jikan.scrap_comics_complete(6)
+
+    # Six comics by three authors in one magazine
+    assert comicking.stats['addPerson'] == 3
+    assert comicking.stats['addMagazine'] == 1
+    assert len(comicking.records('/rest/comics/%s/authors' % next(iter(comicking.records('/rest/comics'))))) == 1
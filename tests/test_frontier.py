@@ -0,0 +1,82 @@
+from comicking_scrap.frontier import Frontier
+from comicking_scrap.seenset import SeenSet
+
+def test_pops_by_score():
+    frontier = Frontier()
+
+    frontier.push_relation(10, 'other')
+    frontier.push_relation(20, 'sequel')
+    frontier.push_relation(30, 'side-story')
+
+    assert [frontier.pop() for _ in range(4)] == [(20, 1), (30, 1), (10, 1), None]
+
+def test_edges_add_up():
+    frontier = Frontier()
+
+    frontier.push_relation(10, 'sequel')
+    frontier.push_relation(20, 'side-story')
+    frontier.push_relation(20, 'side-story')
+    frontier.push_relation(20, 'character')
+
+    assert len(frontier) == 2
+    assert frontier.pop() == (20, 1)
+    assert frontier.pop() == (10, 1)
+    assert frontier.pop() is None
+
+def test_depth():
+    frontier = Frontier(max_depth=2)
+
+    assert frontier.push_relation(10, 'sequel', 2)
+    assert not frontier.push_relation(20, 'sequel', 3)
+
+    # Farther edges weigh less, the shallowest depth is kept
+    frontier.push_relation(30, 'sequel', 2)
+    frontier.push_relation(30, 'other', 1)
+
+    assert frontier.pop() == (30, 1)
+    assert frontier.pop() == (10, 2)
+
+def test_recommendations_rank_below_relations():
+    frontier = Frontier()
+
+    frontier.push_recommendation(10, 0)
+    frontier.push_recommendation(20, 1)
+    frontier.push_relation(30, 'other')
+
+    assert [frontier.pop()[0] for _ in range(3)] == [30, 10, 20]
+
+def test_seen_skipped():
+    seen = SeenSet()
+    seen.add(10)
+
+    frontier = Frontier(seen)
+
+    assert not frontier.push_relation(10, 'sequel')
+    assert frontier.push_relation(20, 'sequel')
+
+    seen.add(20)
+
+    assert frontier.pop() is None
+
+def test_max_size():
+    frontier = Frontier(max_size=1)
+
+    assert frontier.push_relation(10, 'sequel')
+    assert not frontier.push_relation(20, 'sequel')
+    assert frontier.push_relation(10, 'sequel')
+    assert len(frontier) == 1
+
+def test_discover(create_bot_jikan, comicking):
+    frontier = Frontier(max_depth=2)
+    bot_jikan = create_bot_jikan(frontier=frontier)
+
+    assert len(bot_jikan.scrap_comics_complete(1)) == 1
+    # Relations of relations come along, one hop farther
+    assert frontier.depths == {5: 1, 4: 2}
+
+    results = list(bot_jikan.iter_discover_complete(5))
+
+    # Nothing past the maximum depth is discovered
+    assert [(v.mal_id, v.created) for v in results] == [(5, True), (4, True)]
+    assert len(comicking.records('/rest/comics')) == 3
+    assert frontier.pop() is None
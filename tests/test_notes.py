@@ -0,0 +1,67 @@
+import json
+import os
+
+from comicking_scrap.clock import VirtualClock
+from comicking_scrap.notes import NoteWriter
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(v) for v in f]
+
+def test_writes_jsonl(tmp_path):
+    path = str(tmp_path / 'bot.jsonl')
+
+    note_writer = NoteWriter(path, clock=VirtualClock(1000.0, frozen=True))
+    note_writer.write('comic-added', mal_id=1, title='Berserk')
+    note_writer.write('cover-skipped', mal_id=1, reason='invalid')
+    note_writer.close()
+
+    assert read(path) == [
+        {'time': 1000.0, 'event': 'comic-added', 'mal_id': 1, 'title': 'Berserk'},
+        {'time': 1000.0, 'event': 'cover-skipped', 'mal_id': 1, 'reason': 'invalid'}
+    ]
+
+def test_stamps_with_clock(tmp_path):
+    path = str(tmp_path / 'bot.jsonl')
+    clock = VirtualClock(1000.0, frozen=True)
+
+    note_writer = NoteWriter(path, clock=clock)
+    note_writer.write('first')
+    clock.advance(60)
+    note_writer.write('second')
+    note_writer.close()
+
+    assert [v['time'] for v in read(path)] == [1000.0, 1060.0]
+
+def test_unserializable_fields(tmp_path):
+    path = str(tmp_path / 'bot.jsonl')
+
+    note_writer = NoteWriter(path)
+    note_writer.write('error', error=ValueError('bad'))
+    note_writer.close()
+
+    assert read(path)[0]['error'] == 'bad'
+
+def test_rotates(tmp_path):
+    path = str(tmp_path / 'bot.jsonl')
+
+    # One note per batch, so each write is checked against the size
+    note_writer = NoteWriter(path, max_bytes=1, backup_count=2, batch_size=1)
+    for i in range(4):
+        note_writer.write('note', i=i)
+    note_writer.close()
+
+    assert not os.path.exists(path + '.3')
+    assert [v['i'] for v in read(path + '.2')] == [2]
+    assert [v['i'] for v in read(path + '.1')] == [3]
+    assert read(path) == []
+
+def test_rotates_without_backups(tmp_path):
+    path = str(tmp_path / 'bot.jsonl')
+
+    note_writer = NoteWriter(path, max_bytes=1, backup_count=0, batch_size=1)
+    note_writer.write('note')
+    note_writer.close()
+
+    assert os.listdir(tmp_path) == ['bot.jsonl']
+    assert read(path) == []
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from comicking_scrap.openapi import compile_operations, load_spec, resolve, spec_path
+
+def test_spec_path_from_env(monkeypatch):
+    monkeypatch.setenv('COMICKING_SCRAP_OPENAPI_COMICKING', '/srv/openapi.yaml')
+
+    assert spec_path('comicking') == '/srv/openapi.yaml'
+
+def test_spec_path_from_checkout():
+    assert spec_path('comicking').endswith('openapi-comicking.yaml')
+    assert spec_path('jikan').endswith('openapi-jikan.json')
+
+def test_spec_path_missing():
+    with pytest.raises(FileNotFoundError):
+        spec_path('missing')
+
+def test_load_spec_json(tmp_path):
+    path = tmp_path / 'openapi.json'
+    path.write_text(json.dumps({'openapi': '3.0.0'}))
+
+    assert load_spec(str(path)) == {'openapi': '3.0.0'}
+
+def test_resolve():
+    spec = {'components': {'schemas': {
+        'Alias': {'$ref': '#/components/schemas/Website'},
+        'Website': {'type': 'object'}
+    }}}
+
+    assert resolve(spec, {'$ref': '#/components/schemas/Alias'}) == {'type': 'object'}
+    assert resolve(spec, {'type': 'string'}) == {'type': 'string'}
+    assert resolve(spec, None) is None
+
+def test_compile_operations():
+    spec = {
+        'paths': {
+            '/manga/{id}': {'get': {'operationId': 'getManga'}},
+            '/manga/{id}/full': {'get': {'operationId': 'getMangaFull'}},
+            '/comics/{code}/titles/{ulid}': {
+                'parameters': [],
+                'patch': {
+                    'operationId': 'updateComicTitle',
+                    'security': [{'oauth': []}],
+                    'requestBody': {'$ref': '#/components/requestBodies/SetComicTitle'},
+                    'responses': {
+                        '400': {'description': 'Bad'},
+                        '200': {'content': {'application/json': {'schema': {'type': 'object'}}}}
+                    }
+                }
+            }
+        },
+        'components': {'requestBodies': {'SetComicTitle': {
+            'content': {'application/json': {'schema': {'required': ['content']}}}
+        }}}
+    }
+
+    operations = {v.id: v for v in compile_operations(spec, '/api')}
+
+    assert [v.id for v in compile_operations(spec)][:2] == ['getMangaFull', 'getManga']
+
+    operation = operations['updateComicTitle']
+    assert operation.method == 'PATCH'
+    assert operation.secured
+    assert operation.path_params == ['code', 'ulid']
+    assert operation.request_schema == {'required': ['content']}
+    assert operation.response_schema == {'type': 'object'}
+
+    m = operation.match('PATCH', '/api/comics/berserk/titles/01ABC')
+    assert m and m.groupdict() == {'code': 'berserk', 'ulid': '01ABC'}
+    assert not operation.match('GET', '/api/comics/berserk/titles/01ABC')
+    assert not operation.match('PATCH', '/comics/berserk/titles/01ABC')
+
+    assert not operations['getManga'].secured
+    assert operations['getManga'].match('GET', '/api/manga/1')['id'] == '1'
@@ -0,0 +1,82 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from comicking_scrap.pagination import header, paginate
+
+class Response:
+    def __init__(self, data, headers):
+        self.data = data
+        self.headers = headers
+
+class Catalog:
+    def __init__(self, count, max_limit=100, total=True):
+        self.items = list(range(count))
+        self.max_limit = max_limit
+        self.total = total
+
+        self.lock = threading.Lock()
+        self.pages = []
+
+    def fetch(self, kind, page, limit):
+        assert kind == 'comics'
+
+        with self.lock:
+            self.pages.append(page)
+
+        limit = min(limit, self.max_limit)
+
+        headers = {'X-Pagination-Limit': str(limit)}
+        if self.total:
+            headers['x-total-count'] = str(len(self.items))
+
+        return Response(self.items[(page - 1) * limit:page * limit], headers)
+
+def test_header():
+    assert header({'X-Total-Count': '3'}, 'x-total-count') == '3'
+    assert header({}, 'X-Total-Count') is None
+    assert header(None, 'X-Total-Count') is None
+
+@pytest.mark.parametrize('count', [0, 1, 15, 16, 46])
+def test_with_total(count):
+    catalog = Catalog(count)
+
+    assert list(paginate(catalog.fetch, 'comics', limit=15)) == list(range(count))
+    assert catalog.pages == list(range(1, max((count + 14) // 15, 1) + 1))
+
+@pytest.mark.parametrize('count', [0, 1, 15, 16, 46])
+def test_without_total(count):
+    catalog = Catalog(count, total=False)
+
+    assert list(paginate(catalog.fetch, 'comics', limit=15)) == list(range(count))
+
+    # A full last page costs one empty request to find the end
+    assert len(catalog.pages) == max(count // 15 + 1, 1)
+
+def test_clamped_limit():
+    catalog = Catalog(250, max_limit=100)
+
+    assert list(paginate(catalog.fetch, 'comics', limit=1000)) == list(range(250))
+    assert catalog.pages == [1, 2, 3]
+
+def test_executor_prefetch():
+    catalog = Catalog(200)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        items = list(paginate(catalog.fetch, 'comics', limit=10, executor=executor, prefetch=3))
+
+    assert items == list(range(200))
+    assert sorted(catalog.pages) == list(range(1, 21))
+
+def test_executor_stops_on_close():
+    catalog = Catalog(1000)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        items = paginate(catalog.fetch, 'comics', limit=10, executor=executor, prefetch=2)
+
+        assert [next(items) for _ in range(15)] == list(range(15))
+        items.close()
+
+    # Only the pages already in flight were fetched
+    assert len(catalog.pages) <= 5
@@ -0,0 +1,166 @@
+import pytest
+
+from comicking_scrap.pipeline import ComicRecord, External, Pipeline, Relation, Term, Title
+
+def test_record_get():
+    record = ComicRecord('myanimelist.net', '/manga/2', 2)
+    calls = []
+
+    def load_covers():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise ConnectionError('timeout')
+
+        return [('cdn.myanimelist.net', '/images/manga/2.jpg')]
+
+    record.covers.append(('cdn.myanimelist.net', '/images/manga/2l.jpg'))
+    record.deferred['covers'] = load_covers
+
+    assert record.href == 'myanimelist.net/manga/2'
+    assert record.get('titles') == []
+
+    # A failed load is kept for the next try
+    with pytest.raises(ConnectionError):
+        record.get('covers')
+
+    assert record.get('covers') == [
+        ('cdn.myanimelist.net', '/images/manga/2l.jpg'),
+        ('cdn.myanimelist.net', '/images/manga/2.jpg')
+    ]
+    assert record.get('covers') == record.covers
+    assert calls == [0, 1]
+
+def comic_record(mal_id: int, **relations: int):
+    record = ComicRecord('myanimelist.net', f'/manga/{mal_id}', mal_id, label=f'Manga {mal_id}')
+
+    record.total_chapter = 10
+    record.comic_type = Term('comic-type', 'manga', 'Manga', 'comic-type')
+    record.status = Term('comic-status', 'ongoing', 'Ongoing', 'comic-status')
+    record.categories = [
+        Term('genre', 'action', 'Action', 'genre'),
+        Term('genre', 'unknown', 'Unknown', 'genre')
+    ]
+    record.titles = [
+        Title('en', f'Manga {mal_id}', 'Default'),
+        Title('ja', f'漫画 {mal_id}', 'Japanese'),
+        Title(None, f'M{mal_id}', 'Synonym'),
+        Title('en', f'Comic {mal_id}', 'English')
+    ]
+    record.synopses = [('en', 'A story.', 'MyAnimeList')]
+    record.covers = [('cdn.myanimelist.net', f'/images/manga/{mal_id}.jpg')]
+    record.externals = [
+        External(f'https://example.com/manga/{mal_id}?ref=mal', 'Official Site', is_official=True),
+        External(f'https://ja.wikipedia.org/wiki/{mal_id}', 'Wikipedia'),
+        External(f'https://example.com:8080/manga/{mal_id}', 'Mirror')
+    ]
+    record.authors = [(1868, 'Kentarou Miura', 'author')]
+    record.serializations = [(5, 'Young Animal')]
+    record.relations = [
+        Relation(type_code, 'myanimelist.net', f'/manga/{v}', v) for type_code, v in relations.items()
+    ]
+
+    return record
+
+@pytest.fixture
+def relations():
+    return []
+
+@pytest.fixture
+def pipeline(bot, comicking, relations):
+    comicking.insert('addWebsite', {'host': 'myanimelist.net', 'name': 'MyAnimeList'})
+    comicking.insert('addWebsite', {'host': 'cdn.myanimelist.net', 'name': 'MyAnimeList CDN'})
+
+    return Pipeline(bot, on_relation=lambda record, relation, child_code: relations.append(
+        (record.external_id, relation.external_id, child_code)
+    ))
+
+def children(comicking, comic_code, name):
+    return comicking.records(f'/rest/comics/{comic_code}/{name}')
+
+def test_run(pipeline, comicking, relations):
+    comic_code, comic_exist = pipeline.run(comic_record(2, sequel=3))
+
+    assert not comic_exist
+    assert comicking.records('/rest/comics')[comic_code]['totalChapter'] == 10
+
+    assert list(children(comicking, comic_code, 'categories')) == ['comic-type:manga', 'genre:action']
+    assert list(children(comicking, comic_code, 'tags')) == ['comic-status:ongoing']
+
+    # Titles are written in source order, the one without a language is skipped
+    assert [(v['languageLang'], v['content']) for v in children(comicking, comic_code, 'titles').values()] == [
+        ('en', 'Manga 2'),
+        ('ja', '漫画 2'),
+        ('en', 'Comic 2')
+    ]
+    assert [v['content'] for v in children(comicking, comic_code, 'synopses').values()] == ['A story.']
+    assert len(children(comicking, comic_code, 'covers')) == 1
+    assert list(children(comicking, comic_code, 'authors')) == ['author:mal-1868']
+    assert list(children(comicking, comic_code, 'serializations')) == ['mal-5']
+
+    assert sorted(v['linkWebsiteHost'] + v['linkRelativeReference'] for v in children(comicking, comic_code, 'externals').values()) == [
+        'example.com/manga/2?ref=mal',
+        'myanimelist.net/manga/2'
+    ]
+
+    assert relations == [(2, 3, None)]
+    assert children(comicking, comic_code, 'relations') == {}
+
+def test_run_existing(pipeline, comicking):
+    comic_code, _ = pipeline.run(comic_record(2))
+
+    comicking.stats.clear()
+
+    assert pipeline.run(comic_record(2)) == (comic_code, True)
+
+    assert len(comicking.records('/rest/comics')) == 1
+    assert not [k for k in comicking.stats if k.startswith('add')]
+
+def test_run_relation(pipeline, comicking, relations):
+    child_code, _ = pipeline.run(comic_record(3))
+    comic_code, _ = pipeline.run(comic_record(2, sequel=3, unknown=4))
+
+    assert relations == [(2, 3, child_code)]
+    assert list(children(comicking, comic_code, 'relations')) == [f'sequel:{child_code}']
+
+def test_refresh(pipeline, comicking):
+    comic_code, _ = pipeline.run(comic_record(2))
+
+    record = comic_record(2)
+    record.total_chapter = 20
+    record.status = Term('comic-status', 'finished', 'Finished', 'comic-status')
+    record.titles[3] = Title('ja', 'Comic 2', 'English')
+    record.synopses = [('en', 'Another story.', 'MyAnimeList')]
+    record.covers.append(('cdn.myanimelist.net', '/images/manga/2l.jpg'))
+
+    pipeline.refresh(record, comic_code)
+
+    assert comicking.records('/rest/comics')[comic_code]['totalChapter'] == 20
+    assert list(children(comicking, comic_code, 'tags')) == ['comic-status:finished']
+    assert sorted((v['languageLang'], v['content']) for v in children(comicking, comic_code, 'titles').values()) == [
+        ('en', 'Manga 2'),
+        ('ja', 'Comic 2'),
+        ('ja', '漫画 2')
+    ]
+    assert [v['content'] for v in children(comicking, comic_code, 'synopses').values()] == ['Another story.']
+    assert len(children(comicking, comic_code, 'covers')) == 2
+
+    comicking.stats.clear()
+
+    pipeline.refresh(record, comic_code, covers=False)
+
+    assert 'listComicCover' not in comicking.stats
+    assert not [k for k in comicking.stats if k.startswith(('add', 'delete')) or k == 'updateComicSynopsis']
+
+def test_remap(pipeline, comicking):
+    comic_code, _ = pipeline.run(comic_record(2))
+
+    record = comic_record(2)
+    record.comic_type = Term('comic-type', 'manhwa', 'Manhwa', 'comic-type')
+    record.categories = [Term('genre', 'drama', 'Drama', 'genre')]
+
+    # Two added, two pruned, the tags are left as they are
+    assert pipeline.remap(record, comic_code) == 4
+    assert sorted(children(comicking, comic_code, 'categories')) == ['comic-type:manhwa', 'genre:drama']
+    assert list(children(comicking, comic_code, 'tags')) == ['comic-status:ongoing']
+
+    assert pipeline.remap(record, comic_code) == 0
@@ -0,0 +1,77 @@
+import logging
+import os
+import pstats
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from comicking_scrap.profiling import Profiler
+from comicking_scrap.tracing import Tracer
+
+def busy():
+    return sum(i * i for i in range(20000))
+
+def test_phase_and_label():
+    tracer = Tracer()
+
+    assert Profiler.label(None) == 'run'
+
+    with tracer.span('process') as root:
+        assert Profiler.phase(root) is None
+        assert Profiler.label(root) == 'process'
+
+    with tracer.span('manga 1', 'manga', mal_id=1) as root:
+        with tracer.span('writes') as phase:
+            with tracer.span('POST /api/rest/comics', 'http') as span:
+                assert Profiler.phase(span) == 'writes'
+                assert Profiler.label(span) == 'mal_id=1 phase=writes'
+
+        assert Profiler.label(root) == 'mal_id=1 phase=-'
+
+def test_disabled_without_modes(tmp_path):
+    profiler = Profiler(Tracer(), logging.getLogger(), [], str(tmp_path / 'profile'))
+    profiler.start()
+    profiler.stop()
+
+    assert not os.path.exists(tmp_path / 'profile')
+
+def test_cpu_profiles_per_phase(tmp_path):
+    tracer = Tracer()
+    profiler = Profiler(tracer, logging.getLogger(), ['cpu'], str(tmp_path))
+    profiler.start()
+
+    def work():
+        with tracer.span('categories'):
+            busy()
+
+    with ThreadPoolExecutor(2) as executor:
+        with tracer.span('manga 1', 'manga', mal_id=1):
+            with tracer.span('lookup'):
+                busy()
+
+            for future in [executor.submit(tracer.bind(work)) for _ in range(2)]:
+                future.result()
+
+    profiler.stop()
+
+    assert {'cpu.pstats', 'cpu-run.pstats', 'cpu-lookup.pstats', 'cpu-categories.pstats'} <= set(os.listdir(tmp_path))
+
+    def calls(key: str):
+        stats = pstats.Stats(str(tmp_path / f'cpu-{key}.pstats')).stats
+        return sum(v[0] for k, v in stats.items() if k[2] == 'busy')
+
+    assert calls('lookup') == 1
+
+    # Executor threads are profiled on their own before 3.12, counted in the main thread phase after
+    if sys.version_info < (3, 12):
+        assert calls('categories') == 2
+
+def test_context_per_thread():
+    tracer = Tracer()
+    profiler = Profiler(tracer, logging.getLogger(), [])
+    tracer.listeners.append(profiler)
+
+    with tracer.span('manga 1', 'manga', mal_id=1):
+        with tracer.span('lookup'):
+            assert profiler.contexts[profiler.thread_id] == 'mal_id=1 phase=lookup'
+
+    assert profiler.contexts[profiler.thread_id] == 'run'
@@ -0,0 +1,130 @@
+from types import SimpleNamespace
+
+import pytest
+
+from comicking_scrap.clock import VirtualClock
+from comicking_scrap.recrawl import RecrawlScheduler
+from comicking_scrap.store import Store
+
+day = 86400.0
+
+def manga(status='Publishing', chapters=10, title='Berserk', synopsis='A story.'):
+    return SimpleNamespace(
+        status=status,
+        chapters=chapters,
+        volumes=2,
+        published=SimpleNamespace(to=None),
+        titles=[SimpleNamespace(type='Default', title=title)],
+        synopsis=synopsis,
+        images=SimpleNamespace(jpg=SimpleNamespace(image_url='https://cdn.myanimelist.net/images/manga/2.jpg'))
+    )
+
+def test_fingerprint():
+    assert RecrawlScheduler.fingerprint(manga()) == RecrawlScheduler.fingerprint(manga())
+
+    for changed in (manga(status='Finished'), manga(chapters=11), manga(title='Berserk 2'), manga(synopsis='')):
+        assert RecrawlScheduler.fingerprint(changed) != RecrawlScheduler.fingerprint(manga())
+
+    assert RecrawlScheduler.fingerprint(SimpleNamespace(status=None, chapters=None, volumes=None, titles=None, synopsis=None))
+
+def test_interval():
+    scheduler = RecrawlScheduler(Store(), base_interval=30 * day, min_interval=day, max_interval=365 * day)
+
+    assert scheduler.interval(None, 0, 0, 0) == pytest.approx(30 * day)
+    assert scheduler.interval('Publishing', 0, 0, 0) == pytest.approx(7.5 * day)
+    assert scheduler.interval('Finished', 0, 0, 0) == pytest.approx(120 * day)
+
+    # Observed changes shorten the interval, a long quiet history stretches it
+    assert scheduler.interval(None, 0, 90 * day, 5) == pytest.approx(20 * day)
+    assert scheduler.interval(None, 0, 330 * day, 0) == pytest.approx(360 * day)
+    assert scheduler.interval('Finished', 0, 3650 * day, 0) == pytest.approx(365 * day)
+    assert scheduler.interval('Publishing', 0, 30 * day, 100) == day
+
+def test_record():
+    clock = VirtualClock(1000.0, frozen=True)
+    scheduler = RecrawlScheduler(Store(), clock=clock)
+
+    assert scheduler.get(2) is None
+    assert not scheduler.record(2, 'berserk', manga())
+
+    row = scheduler.get(2)
+    assert row['comic_code'] == 'berserk'
+    assert row['status'] == 'Publishing'
+    assert (row['first_synced'], row['checks'], row['changes']) == (1000.0, 0, 0)
+    assert row['next_check'] == 1000.0 + 7.5 * day
+
+    clock.advance(day)
+    assert not scheduler.record(2, None, manga(), etag='"a"')
+
+    row = scheduler.get(2)
+    assert row['comic_code'] == 'berserk'
+    assert row['etag'] == '"a"'
+    assert (row['synced'], row['checked'], row['checks'], row['changes']) == (1000.0, 1000.0 + day, 1, 0)
+
+    clock.advance(day)
+    assert scheduler.record(2, None, manga(chapters=11))
+
+    row = scheduler.get(2)
+    assert row['etag'] == '"a"'
+    assert (row['synced'], row['checks'], row['changes']) == (1000.0 + 2 * day, 2, 1)
+
+    # Not modified, nothing new to compare
+    clock.advance(day)
+    assert not scheduler.record(2, None)
+    assert scheduler.get(2)['checks'] == 3
+
+def test_due():
+    clock = VirtualClock(0.0, frozen=True)
+    scheduler = RecrawlScheduler(Store(), clock=clock)
+
+    scheduler.record(1, 'a', manga(status='Finished'))
+    scheduler.record(2, 'b', manga(status='Publishing'))
+    scheduler.record(3, None, manga(status='Publishing'))
+
+    assert scheduler.due(10) == []
+
+    clock.advance(8 * day)
+    assert [v['mal_id'] for v in scheduler.due(10)] == [2]
+
+    clock.advance(200 * day)
+    assert [v['mal_id'] for v in scheduler.due(10)] == [2, 1]
+    assert [v['mal_id'] for v in scheduler.due(1)] == [2]
+
+@pytest.fixture
+def scheduler(clock):
+    return RecrawlScheduler(Store(), clock=clock)
+
+def test_recrawl(bot, create_bot_jikan, scheduler, comicking, jikan, clock):
+    bot_jikan = create_bot_jikan(scheduler=scheduler)
+
+    codes = bot_jikan.scrap_comics_complete(2)
+    assert len(codes) == 2
+    assert list(bot_jikan.recrawl(10)) == []
+
+    mal_id, comic_code = 6, scheduler.get(6)['comic_code']
+
+    manga = jikan.dataset.manga[mal_id]
+    manga['chapters'] = 99
+    manga['titles'][2]['title'] = 'Comic Six'
+    manga['synopsis'] = 'Another story.'
+    jikan.dataset.touch(mal_id)
+
+    clock.advance(8 * day)
+    comicking.stats.clear()
+
+    results = list(bot_jikan.recrawl(10))
+
+    assert sorted(v.mal_id for v in results) == [5, 6]
+    assert scheduler.get(mal_id)['changes'] == 1
+    assert scheduler.get(5)['changes'] == 0
+
+    assert comicking.records('/rest/comics')[comic_code]['totalChapter'] == 99
+
+    titles = comicking.records(f'/rest/comics/{comic_code}/titles').values()
+    assert 'Comic Six' in [v['content'] for v in titles]
+
+    synopses = comicking.records(f'/rest/comics/{comic_code}/synopses').values()
+    assert [v['content'] for v in synopses] == ['Another story.']
+
+    assert comicking.stats['updateComicSynopsis'] == 1
+    assert comicking.stats['listComicCover'] == 1
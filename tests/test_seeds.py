@@ -0,0 +1,103 @@
+import logging
+
+import pytest
+
+from comicking_scrap import seeds
+from comicking_scrap.bot import Bot
+from comicking_scrap.standin import ComicKingStandIn
+from comicking_scrap.store import Store
+
+rows = [
+    ('language', None, 'en', 'English'),
+    ('categorytype', None, 'genre', 'Genre'),
+    ('category', 'genre', 'action', 'Action'),
+    ('tagtype', None, 'comic-status', 'Comic Status'),
+    ('tag', 'comic-status', 'ongoing', 'Ongoing')
+]
+
+def empty():
+    return {v[0]: [] for v in seeds.kinds.values()}
+
+def test_table_is_consistent():
+    keys = {(kind, code) for kind, _, code, _ in seeds.table}
+
+    assert len(keys) == len(seeds.table)
+
+    for kind, parent, _, _ in seeds.table:
+        assert kind in seeds.kinds
+        if parent:
+            assert (kind + 'type', parent) in keys
+
+def test_fingerprint():
+    assert seeds.fingerprint(rows) == seeds.fingerprint(list(rows))
+    assert seeds.fingerprint(rows) != seeds.fingerprint(rows[:-1])
+    assert seeds.fingerprint() == seeds.fingerprint(seeds.table)
+
+def test_diff_stages():
+    assert seeds.diff(empty(), rows) == [
+        [
+            ('add_language', ('en', 'English')),
+            ('add_categorytype', ('genre', 'Genre')),
+            ('add_tagtype', ('comic-status', 'Comic Status'))
+        ],
+        [
+            ('add_category', ('genre', 'action', 'Action')),
+            ('add_tag', ('comic-status', 'ongoing', 'Ongoing'))
+        ]
+    ]
+
+def test_diff_skips_existing():
+    catalogs = empty()
+    catalogs['languages'] = ['en']
+    catalogs['categorytypes'] = ['genre']
+    catalogs['categories'] = ['genre:action']
+
+    assert seeds.diff(catalogs, rows) == [
+        [('add_tagtype', ('comic-status', 'Comic Status'))],
+        [('add_tag', ('comic-status', 'ongoing', 'Ongoing'))]
+    ]
+
+@pytest.fixture
+def comicking():
+    with ComicKingStandIn() as server:
+        yield server
+
+def create_bot(server, store):
+    return Bot(
+        server.base_comicking,
+        oauth_issuer=server.oauth_issuer,
+        oauth_client_id='test',
+        oauth_client_secret='test',
+        oauth_audience='comicking',
+        logger=logging.getLogger(),
+        store=store
+    )
+
+def test_seed_applied_once(comicking):
+    store = Store()
+
+    bot = create_bot(comicking, store)
+    bot.load(True)
+    bot.close()
+
+    assert len(comicking.records('/rest/languages')) == 4
+    assert 'genre:action' in comicking.records('/rest/categories')
+    assert comicking.stats['addTag'] == 6
+
+    comicking.stats.clear()
+
+    bot = create_bot(comicking, store)
+    bot.load(True)
+    bot.close()
+
+    assert not [k for k in comicking.stats if k.startswith('add')]
+
+def test_seed_fills_gaps(comicking):
+    comicking.insert('addLanguage', {'lang': 'en', 'name': 'English'})
+
+    bot = create_bot(comicking, Store())
+    bot.load(True)
+    bot.close()
+
+    assert comicking.stats['addLanguage'] == 3
+    assert len(comicking.records('/rest/languages')) == 4
@@ -0,0 +1,78 @@
+import pytest
+
+from comicking_scrap.seenset import BloomSeenSet, SeenSet
+from comicking_scrap.store import Store
+
+@pytest.mark.parametrize('cls', [SeenSet, BloomSeenSet])
+def test_add_contains(cls):
+    seen = cls()
+
+    assert 2 not in seen
+    assert seen.add(2)
+    assert not seen.add(2)
+    assert seen.add(150000)
+
+    assert 2 in seen
+    assert 150000 in seen
+    assert 3 not in seen
+    assert len(seen) == 2
+
+@pytest.mark.parametrize('cls', [SeenSet, BloomSeenSet])
+def test_round_trip(cls):
+    store = Store()
+    values = [1, 2, 13, 656, 44347, 150000]
+
+    seen = cls(store, key='comicking')
+    for v in values:
+        seen.add(v)
+    seen.flush()
+
+    loaded = cls(store, key='comicking')
+
+    assert all(v in loaded for v in values)
+    assert 3 not in loaded
+    assert len(loaded) == len(values)
+
+    # Another ComicKing instance has its own set
+    assert len(cls(store, key='other')) == 0
+
+def test_flush_every():
+    store = Store()
+
+    seen = SeenSet(store, flush_every=2)
+    seen.add(1)
+    assert store.get_blob('bitmap:seen') is None
+
+    seen.add(2)
+    assert 2 in SeenSet(store)
+
+def test_bitmap_grows():
+    seen = SeenSet()
+
+    seen.add(7)
+    assert len(seen.bits) == 1
+
+    seen.add(8)
+    assert len(seen.bits) == 2
+
+    seen.add(1000)
+    assert len(seen.bits) == 126
+
+def test_bloom_error_rate():
+    seen = BloomSeenSet(capacity=1000, error_rate=0.01)
+
+    for v in range(1000):
+        seen.add(v)
+
+    assert all(v in seen for v in range(1000))
+    assert sum(v in seen for v in range(1000, 11000)) < 10000 * 0.03
+
+def test_bloom_keyed_by_parameters():
+    store = Store()
+
+    seen = BloomSeenSet(store, capacity=1000)
+    seen.add(1)
+    seen.flush()
+
+    assert 1 in BloomSeenSet(store, capacity=1000)
+    assert len(BloomSeenSet(store, capacity=2000)) == 0
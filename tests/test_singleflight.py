@@ -0,0 +1,64 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from comicking_scrap.singleflight import SingleFlight
+
+def test_shares_in_flight_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch(mal_id):
+        calls.append(mal_id)
+        release.wait()
+
+        return {'mal_id': mal_id}
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(flight.do, ('manga', 2), fetch, 2) for _ in range(4)]
+
+        # Every caller is waiting on the leader before it returns
+        while sum(flight.stats.values()) < 4:
+            time.sleep(0.01)
+        release.set()
+
+        results = [v.result() for v in futures]
+
+    assert calls == [2]
+    assert results == [{'mal_id': 2}] * 4
+    assert all(v is results[0] for v in results)
+    assert flight.stats == {'calls': 1, 'shared': 3}
+    assert flight.calls == {}
+
+def test_sequential_calls_not_shared():
+    flight = SingleFlight()
+
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('a', lambda: 2) == 2
+    assert flight.do('b', lambda x, y=0: x + y, 1, y=2) == 3
+    assert flight.stats == {'calls': 3}
+
+def test_error_shared_and_forgotten():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait()
+
+        raise KeyError('missing')
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(flight.do, 'a', fail) for _ in range(2)]
+
+        while sum(flight.stats.values()) < 2:
+            time.sleep(0.01)
+        release.set()
+
+        for future in futures:
+            with pytest.raises(KeyError):
+                future.result()
+
+    assert flight.do('a', lambda: 'retried') == 'retried'
@@ -0,0 +1,151 @@
+import json
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import pytest
+
+from comicking_scrap.standin import ComicKingStandIn
+
+def call(server, method, path, body=None, token=None, form=None):
+    headers = {}
+    data = None
+
+    if token:
+        headers['Authorization'] = 'Bearer ' + token
+    if body is not None:
+        headers['Content-Type'] = 'application/json'
+        data = json.dumps(body).encode()
+    if form is not None:
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        data = urllib.parse.urlencode(form).encode()
+
+    request = urllib.request.Request(server.url + path, data, headers, method=method)
+
+    try:
+        with urllib.request.urlopen(request) as response:
+            content = response.read()
+
+            return response.status, json.loads(content) if content else None, response.headers
+    except urllib.error.HTTPError as e:
+        content = e.read()
+
+        return e.code, json.loads(content) if content else None, e.headers
+
+@pytest.fixture
+def server():
+    with ComicKingStandIn() as server:
+        yield server
+
+@pytest.fixture
+def token(server):
+    status, body, _ = call(server, 'POST', '/oauth/token', form={'grant_type': 'client_credentials'})
+    assert status == 200
+
+    return body['access_token']
+
+def test_token(server):
+    status, body, _ = call(server, 'POST', '/oauth/token', form={'grant_type': 'password'})
+
+    assert status == 400
+    assert body == {'error': 'unsupported_grant_type'}
+
+def test_unauthorized(server):
+    status, _, _ = call(server, 'POST', '/api/rest/websites', {'host': 'myanimelist.net'})
+    assert status == 401
+
+    status, _, _ = call(server, 'POST', '/api/rest/websites', {'host': 'myanimelist.net'}, token='invalid')
+    assert status == 401
+
+def test_add_get_update_delete(server, token):
+    status, body, headers = call(server, 'POST', '/api/rest/websites', {'host': 'myanimelist.net', 'name': 'MAL'}, token)
+    assert status == 201
+    assert body['host'] == 'myanimelist.net'
+    assert body['linkCount'] == 0
+    assert headers['Location'] == '/api/rest/websites/myanimelist.net'
+
+    status, body, _ = call(server, 'POST', '/api/rest/websites', {'host': 'myanimelist.net'}, token)
+    assert status == 409
+
+    status, body, _ = call(server, 'GET', '/api/rest/websites/myanimelist.net')
+    assert status == 200
+    assert body['name'] == 'MAL'
+
+    status, body, _ = call(server, 'PATCH', '/api/rest/websites/myanimelist.net', {'name': 'MyAnimeList'}, token)
+    assert status == 200
+    assert body['name'] == 'MyAnimeList'
+    assert body['updatedAt']
+
+    status, _, _ = call(server, 'DELETE', '/api/rest/websites/myanimelist.net', token=token)
+    assert status == 204
+
+    status, _, _ = call(server, 'GET', '/api/rest/websites/myanimelist.net')
+    assert status == 404
+
+def test_required_and_references(server, token):
+    status, body, _ = call(server, 'POST', '/api/rest/websites', {'name': 'MAL'}, token)
+    assert status == 400
+    assert body == {'message': 'Field "host" is required'}
+
+    status, _, _ = call(server, 'POST', '/api/rest/comics/berserk/titles', {'languageLang': 'en', 'content': 'Berserk'}, token)
+    assert status == 404
+
+    server.insert('addComic', {'code': 'berserk'})
+
+    status, body, _ = call(server, 'POST', '/api/rest/comics/berserk/titles', {'languageLang': 'en', 'content': 'Berserk'}, token)
+    assert status == 404
+    assert body == {'message': 'languages "en" not found'}
+
+    server.insert('addLanguage', {'lang': 'en', 'name': 'English'})
+
+    status, body, _ = call(server, 'POST', '/api/rest/comics/berserk/titles', {'languageLang': 'en', 'content': 'Berserk'}, token)
+    assert status == 201
+    assert body['ulid']
+
+    status, body, _ = call(server, 'GET', '/api/rest/comics/berserk')
+    assert body['titleCount'] == 1
+
+def test_list_pagination_and_filters(server):
+    for i in range(25):
+        server.insert('addWebsite', {'host': f'site{i}.com', 'name': 'Even' if i % 2 == 0 else 'Odd'})
+
+    status, body, headers = call(server, 'GET', '/api/rest/websites')
+    assert status == 200
+    assert len(body) == 10
+    assert headers['X-Total-Count'] == '25'
+    assert headers['X-Pagination-Limit'] == '10'
+
+    _, body, _ = call(server, 'GET', '/api/rest/websites?page=3&limit=10')
+    assert [v['host'] for v in body] == [f'site{i}.com' for i in range(20, 25)]
+
+    _, body, headers = call(server, 'GET', '/api/rest/websites?limit=1000')
+    assert len(body) == 25
+    assert headers['X-Pagination-Limit'] == '100'
+
+    _, body, headers = call(server, 'GET', '/api/rest/websites?name=Odd')
+    assert headers['X-Total-Count'] == '12'
+
+    status, _, _ = call(server, 'GET', '/api/rest/websites?page=x')
+    assert status == 400
+
+def test_stats(server, token):
+    call(server, 'GET', '/api/rest/websites')
+    call(server, 'GET', '/api/rest/websites')
+
+    _, body, _ = call(server, 'DELETE', '/_standin/stats')
+    assert body == {'token': 1, 'listWebsite': 2}
+
+    _, body, _ = call(server, 'GET', '/_standin/stats')
+    assert body == {}
+
+def test_injected_errors():
+    with ComicKingStandIn(error_rate=1.0, error_status=503, seed=1) as server:
+        status, body, _ = call(server, 'GET', '/api/rest/websites')
+
+    assert status == 503
+    assert body == {'message': 'Injected error'}
+
+def test_not_found(server):
+    status, _, _ = call(server, 'GET', '/api/rest/unknown')
+
+    assert status == 404
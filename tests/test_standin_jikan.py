@@ -0,0 +1,149 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from comicking_scrap.standin import JikanDataset, JikanStandIn
+from comicking_scrap.standin.jikan import RateLimiter
+
+def get(server, path, **headers):
+    request = urllib.request.Request(server.url + path, headers=headers)
+
+    try:
+        with urllib.request.urlopen(request) as response:
+            content = response.read()
+
+            return response.status, json.loads(content) if content else None, response.headers
+    except urllib.error.HTTPError as e:
+        content = e.read()
+
+        return e.code, json.loads(content) if content else None, e.headers
+
+def dataset():
+    dataset = JikanDataset()
+
+    for mal_id, title, type, score in [
+        (2, 'Berserk', 'Manga', 9.47),
+        (656, 'Vagabond', 'Manga', 9.27),
+        (1706, 'JoJo no Kimyou na Bouken Part 7: Steel Ball Run', 'Manga', 9.3),
+        (44347, 'One Punch-Man', 'Manga', 8.71),
+        (21, 'Death Note', 'Manga', 8.69),
+        (9115, 'Ookami to Koushinryou', 'Light Novel', 8.1)
+    ]:
+        dataset.add(
+            {'mal_id': mal_id, 'title': title, 'type': type, 'score': score},
+            external=[{'name': 'Official', 'url': 'https://example.com/%d' % mal_id}],
+            relations=[]
+        )
+
+    return dataset
+
+@pytest.fixture
+def server():
+    with JikanStandIn(dataset(), rate_limits=[]) as server:
+        yield server
+
+def test_rate_limiter():
+    rate_limiter = RateLimiter([(2, 1.0), (3, 60.0)])
+
+    assert rate_limiter.acquire(0.0) == 0.0
+    assert rate_limiter.acquire(0.5) == 0.0
+    assert rate_limiter.acquire(0.75) == pytest.approx(0.25)
+    assert rate_limiter.acquire(1.0) == 0.0
+    assert rate_limiter.acquire(2.0) == pytest.approx(58.0)
+    assert rate_limiter.acquire(60.0) == 0.0
+
+def test_dataset_round_trip(tmp_path):
+    path = str(tmp_path / 'jikan.json')
+
+    source = dataset()
+    source.touch(2, 1000.0)
+    source.save(path)
+
+    loaded = JikanDataset.load(path)
+
+    assert loaded.manga == source.manga
+    assert loaded.payloads == source.payloads
+    assert loaded.modified[2] == 1000.0
+
+def test_manga(server):
+    status, body, _ = get(server, '/v4/manga/2')
+    assert status == 200
+    assert body['data']['title'] == 'Berserk'
+
+    status, body, _ = get(server, '/v4/manga/2/full')
+    assert status == 200
+    assert body['data']['external'] == [{'name': 'Official', 'url': 'https://example.com/2'}]
+    assert body['data']['relations'] == []
+
+    status, body, _ = get(server, '/v4/manga/2/external')
+    assert status == 200
+    assert len(body['data']) == 1
+
+    assert get(server, '/v4/manga/3')[0] == 404
+    assert get(server, '/v4/manga/2/pictures')[0] == 404
+    assert get(server, '/v4/manga/2/unknown')[0] == 404
+    assert get(server, '/v4/manga/x')[0] == 400
+
+def test_conditional_get(server):
+    _, _, headers = get(server, '/v4/manga/2')
+
+    status, body, _ = get(server, '/v4/manga/2', **{'If-None-Match': headers['ETag']})
+    assert status == 304
+    assert body is None
+
+    status, _, _ = get(server, '/v4/manga/2', **{'If-Modified-Since': headers['Last-Modified']})
+    assert status == 304
+
+    server.dataset.manga[2]['score'] = 9.5
+    server.dataset.touch(2)
+
+    status, body, _ = get(server, '/v4/manga/2', **{'If-None-Match': headers['ETag']})
+    assert status == 200
+    assert body['data']['score'] == 9.5
+
+def test_search(server):
+    status, body, _ = get(server, '/v4/manga?type=manga&order_by=score&sort=desc&limit=2')
+    assert status == 200
+    assert [v['mal_id'] for v in body['data']] == [2, 1706]
+    assert body['pagination'] == {
+        'last_visible_page': 3,
+        'has_next_page': True,
+        'current_page': 1,
+        'items': {'count': 2, 'total': 5, 'per_page': 2}
+    }
+
+    _, body, _ = get(server, '/v4/manga?type=manga&order_by=score&sort=desc&limit=2&page=3')
+    assert [v['mal_id'] for v in body['data']] == [21]
+    assert not body['pagination']['has_next_page']
+
+    _, body, _ = get(server, '/v4/manga?q=punch')
+    assert [v['mal_id'] for v in body['data']] == [44347]
+
+    assert get(server, '/v4/manga?page=x')[0] == 400
+
+def test_rate_limited():
+    with JikanStandIn(dataset(), rate_limits=[(1, 60.0)]) as server:
+        assert get(server, '/v4/manga/2')[0] == 200
+
+        status, body, headers = get(server, '/v4/manga/2')
+
+        assert status == 429
+        assert body['type'] == 'RateLimitException'
+        assert int(headers['Retry-After']) > 0
+        assert server.stats['429'] == 1
+
+def test_records_upstream():
+    with JikanStandIn(dataset(), rate_limits=[]) as upstream:
+        with JikanStandIn(rate_limits=[], upstream=upstream.base_jikan + '/') as server:
+            assert get(server, '/v4/manga/656')[0] == 200
+            assert get(server, '/v4/manga/656/external')[0] == 200
+            assert get(server, '/v4/manga/3')[0] == 404
+
+            # Replayed from the dataset, upstream only saw the misses
+            assert get(server, '/v4/manga/656')[0] == 200
+
+        assert server.dataset.manga[656]['title'] == 'Vagabond'
+        assert server.dataset.payloads['external'][656] == [{'name': 'Official', 'url': 'https://example.com/656'}]
+        assert upstream.stats['getMangaById'] == 2
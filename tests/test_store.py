@@ -0,0 +1,48 @@
+from comicking_scrap.store import Store
+
+def test_meta():
+    store = Store()
+
+    assert store.get('seed:host') is None
+
+    store.set('seed:host', 'a')
+    store.set('seed:host', 'b')
+
+    assert store.get('seed:host') == 'b'
+
+def test_blob():
+    store = Store()
+
+    assert store.get_blob('seen:host') is None
+
+    store.set_blob('seen:host', b'\x00\x01')
+    store.set_blob('seen:host', b'\x02')
+
+    assert store.get_blob('seen:host') == b'\x02'
+
+def test_query():
+    store = Store()
+
+    store.execute(
+        'INSERT INTO entity_index (kind, external_id, code) VALUES (?, ?, ?)',
+        ('person', 1868, 'mal-1868')
+    )
+
+    rows = store.query('SELECT * FROM entity_index WHERE kind = ?', ('person',))
+
+    assert [dict(v) for v in rows] == [{'kind': 'person', 'external_id': 1868, 'code': 'mal-1868'}]
+
+def test_persists(tmp_path):
+    path = str(tmp_path / 'bot.db')
+
+    store = Store(path)
+    store.set('seed:host', 'a')
+    store.close()
+
+    # Reopening runs the schema again without touching the data
+    store = Store(path)
+
+    assert store.get('seed:host') == 'a'
+    assert store.query('PRAGMA journal_mode')[0][0] == 'wal'
+
+    store.close()
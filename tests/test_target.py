@@ -0,0 +1,70 @@
+import pytest
+
+from comicking_scrap.deadletter import DeadLetterQueue
+from comicking_scrap.seenset import SeenSet
+from comicking_scrap.standin import ComicKingStandIn
+from comicking_scrap.store import Store
+from comicking_scrap.target import Target
+
+@pytest.fixture
+def staging():
+    with ComicKingStandIn() as server:
+        yield server
+
+@pytest.fixture
+def target(create_bot, staging, clock):
+    store = Store()
+
+    return Target('staging', create_bot(staging, store=store), SeenSet(store), DeadLetterQueue(store, clock=clock))
+
+def test_defaults(bot):
+    target = Target('default', bot)
+
+    assert len(target.seen) == 0
+    assert target.dead_letters is None
+    assert target.pipeline.bot is bot
+
+    target.flush()
+
+def test_fan_out(create_bot_jikan, target, comicking, staging, jikan):
+    bot_jikan = create_bot_jikan(targets=[target])
+
+    results = list(bot_jikan.iter_comics_complete(2))
+
+    assert [(v.mal_id, v.target, v.created) for v in results] == [(6, 'default', True), (5, 'default', True)]
+    assert [[(v.target, v.created, v.error) for v in result.fanout] for result in results] == [
+        [('staging', True, None)],
+        [('staging', True, None)]
+    ]
+
+    assert len(comicking.records('/rest/comics')) == 2
+    assert len(staging.records('/rest/comics')) == 2
+    assert 6 in target.seen and 5 in target.seen
+
+    # One crawl feeds both, every manga is fetched from Jikan once
+    assert jikan.stats['getMangaExternal'] == 2
+
+def test_failure_isolated_per_target(create_bot_jikan, target, comicking, staging):
+    bot_jikan = create_bot_jikan(targets=[target])
+
+    # Gone from staging behind the back of its bot
+    action = staging.records('/rest/categories').pop('genre:action')
+
+    results = list(bot_jikan.iter_comics_complete(2))
+
+    assert [(v.mal_id, v.error) for v in results] == [(6, None), (5, None)]
+    assert all(v.fanout[0].error for v in results)
+
+    assert len(comicking.records('/rest/comics')) == 2
+    assert [v['mal_id'] for v in target.dead_letters.entries()] == [6, 5]
+    assert 6 not in target.seen
+
+    staging.records('/rest/categories')['genre:action'] = action
+
+    results = list(bot_jikan.replay())
+
+    assert [(v.mal_id, v.target, v.error) for v in results] == [(6, 'staging', None), (5, 'staging', None)]
+    assert len(target.dead_letters) == 0
+    assert 6 in target.seen
+    assert len(comicking.records('/rest/comics')) == 2
+    assert len(staging.records('/rest/comics')) == 2
@@ -0,0 +1,89 @@
+import json
+import threading
+
+import pytest
+
+from comicking_scrap.tracing import Tracer
+
+class Response:
+    def __init__(self, status: int):
+        self.status = status
+
+class Client:
+    def call_api(self, method: str, url: str, *args, **kwargs):
+        return Response(200)
+
+def test_span_nesting():
+    tracer = Tracer()
+
+    with tracer.span('manga 1', 'manga', mal_id=1) as root:
+        with tracer.span('lookup') as span:
+            assert span.parent is root
+            assert span.depth() == 1
+            assert span.root() is root
+            assert tracer.current() is span
+
+        assert tracer.current() is root
+
+    assert tracer.current() is None
+
+def test_span_error():
+    tracer = Tracer()
+
+    with pytest.raises(ValueError):
+        with tracer.span('fail') as span:
+            raise ValueError('boom')
+
+    assert span.args['error'] == "ValueError('boom')"
+    assert tracer.current() is None
+
+def test_bind_nests_under_submitting_span():
+    tracer = Tracer()
+    spans = []
+
+    def work():
+        with tracer.span('categories') as span:
+            spans.append(span)
+
+    with tracer.span('manga 1', 'manga') as root:
+        thread = threading.Thread(target=tracer.bind(work))
+        thread.start()
+        thread.join()
+
+    assert spans[0].parent is root
+    assert spans[0].depth() == 1
+
+def test_instrument_counts_requests():
+    tracer = Tracer()
+    client = Client()
+    tracer.instrument(client)
+
+    with tracer.span('manga 1', 'manga') as root:
+        with tracer.span('lookup'):
+            client.call_api('GET', 'http://localhost/api/rest/comics')
+            client.call_api('GET', 'http://localhost/api/rest/comics')
+
+    assert root.requests == 2
+
+def test_trace_file(tmp_path):
+    path = tmp_path / 'trace.json'
+
+    tracer = Tracer(str(path))
+    with tracer.span('manga 1', 'manga', mal_id=1):
+        with tracer.span('lookup'):
+            pass
+    tracer.close()
+
+    events = json.loads(path.read_text())
+
+    assert [v['name'] for v in events] == ['lookup', 'manga 1']
+    assert events[1]['cat'] == 'manga'
+    assert events[1]['args'] == {'mal_id': 1}
+    assert all(v['ph'] == 'X' and v['dur'] >= 0 for v in events)
+
+def test_trace_file_empty(tmp_path):
+    path = tmp_path / 'trace.json'
+
+    Tracer(str(path)).close()
+
+    assert json.loads(path.read_text()) == []
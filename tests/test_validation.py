@@ -0,0 +1,136 @@
+import json
+
+import pytest
+
+from comicking_scrap.notes import NoteWriter
+from comicking_scrap.openapi import load_spec, spec_path
+from comicking_scrap.validation import (
+    ValidationError,
+    Validator,
+    Validators,
+    normalize_host,
+    normalize_reference,
+    normalize_text
+)
+
+def test_normalize_text():
+    assert normalize_text('  Ｂｅｒｓｅｒｋ\x00 ') == 'Ｂｅｒｓｅｒｋ'
+    assert normalize_text('Pokémon\x1f') == 'Pokémon'
+    assert normalize_text('line\nbreak\t') == 'line\nbreak'
+
+def test_normalize_host():
+    assert normalize_host(' CDN.MyAnimeList.net. ') == 'cdn.myanimelist.net'
+    assert normalize_host('ドメイン.example') == 'xn--eckwd4c7c.example'
+
+    for value in ('my_site.com', '-bad.com', 'a..b', ''):
+        with pytest.raises(ValueError):
+            normalize_host(value)
+
+@pytest.mark.parametrize('value, expected', [
+    (None, None),
+    ('', None),
+    ('manga/2/Berserk', '/manga/2/Berserk'),
+    ('/wiki/ベルセルク', '/wiki/%E3%83%99%E3%83%AB%E3%82%BB%E3%83%AB%E3%82%AF'),
+    ('/search?q=a b&x=[1]', '/search?q=a%20b&x=%5B1%5D'),
+    ('/wiki/Berserk_(manga)', '/wiki/Berserk_(manga)'),
+    ('/already%20escaped', '/already%20escaped'),
+    ('?page=1', '?page=1'),
+    ('#top', '#top')
+])
+def test_normalize_reference(value, expected):
+    assert normalize_reference(value) == expected
+
+spec = {'components': {'schemas': {
+    'Length': {'type': 'string', 'minLength': 2, 'maxLength': 4},
+    'NewThing': {
+        'type': 'object',
+        'required': ['code'],
+        'properties': {
+            'code': {'$ref': '#/components/schemas/Length'},
+            'name': {'type': 'string', 'nullable': True},
+            'count': {'type': 'integer', 'minimum': 0, 'maximum': 9},
+            'kind': {'type': 'string', 'enum': ['a', 'b']},
+            'slug': {'type': 'string', 'pattern': '^[a-z]+$'},
+            'at': {'type': 'string', 'format': 'date-time'},
+            'nsfw': {'type': 'boolean'},
+            'host': {'type': 'string'},
+            'relativeReference': {'type': 'string', 'nullable': True}
+        }
+    },
+    'Thing': {'type': 'object'}
+}}}
+
+def test_validator_normalizes():
+    validator = Validator(spec, 'NewThing', spec['components']['schemas']['NewThing'])
+
+    assert validator({'code': ' ab\x00 ', 'name': '  ', 'count': 3, 'at': '2001-01-01T00:00:00+00:00'}) == {
+        'code': 'ab',
+        'name': None,
+        'count': 3,
+        'at': '2001-01-01T00:00:00+00:00'
+    }
+
+@pytest.mark.parametrize('values, field, reason', [
+    ({'name': 'x'}, 'code', 'is required'),
+    ({'code': 'a'}, 'code', 'shorter than 2'),
+    ({'code': 'abcde'}, 'code', 'longer than 4'),
+    ({'code': 'ab', 'unknown': 1}, 'unknown', 'is not a property'),
+    ({'code': 'ab', 'count': 10}, 'count', 'greater than 9'),
+    ({'code': 'ab', 'count': True}, 'count', 'must be an integer'),
+    ({'code': 'ab', 'kind': 'c'}, 'kind', "not one of ['a', 'b']"),
+    ({'code': 'ab', 'slug': 'A1'}, 'slug', 'does not match "^[a-z]+$"'),
+    ({'code': 'ab', 'at': 'yesterday'}, 'at', 'must be a date-time'),
+    ({'code': 'ab', 'nsfw': None}, 'nsfw', 'must not be null'),
+    ({'code': 'ab', 'host': 'CDN.example'}, 'host', 'must be a lowercase ASCII host'),
+    ({'code': 'ab', 'relativeReference': '/a b'}, 'relativeReference', 'must be a percent-encoded relative reference')
+])
+def test_validator_rejects(values, field, reason):
+    validator = Validator(spec, 'NewThing', spec['components']['schemas']['NewThing'])
+
+    with pytest.raises(ValidationError) as e:
+        validator(values)
+
+    assert (e.value.schema, e.value.field, e.value.reason) == ('NewThing', field, reason)
+    assert isinstance(e.value, ValueError)
+
+def test_validators():
+    validators = Validators(spec)
+
+    assert list(validators.validators) == ['NewThing']
+    assert validators.validate('Thing', {'any': 1}) == {'any': 1}
+
+    validators = Validators.load()
+
+    assert validators.validate('NewWebsite', {'host': 'myanimelist.net'}) == {'host': 'myanimelist.net'}
+
+    with pytest.raises(ValidationError):
+        validators.validate('NewWebsite', {'name': 'MyAnimeList'})
+
+def test_invalid_cover_skipped(create_bot, create_bot_jikan, jikan, comicking, tmp_path):
+    # Stricter than the shipped spec, so a long cover path is rejected before it is sent
+    strict = load_spec(spec_path('comicking'))
+    strict['components']['schemas']['NewLink']['properties']['relativeReference']['maxLength'] = 32
+
+    note_file = str(tmp_path / 'bot.jsonl')
+    note_writer = NoteWriter(note_file)
+
+    bot = create_bot(validators=Validators(strict), note_writer=note_writer)
+    bot_jikan = create_bot_jikan(bot=bot)
+
+    jikan.dataset.manga[6]['images']['jpg']['image_url'] = 'https://cdn.myanimelist.net/images/manga/6/a-very-long-cover.jpg'
+
+    results = list(bot_jikan.iter_comics_complete(1))
+    note_writer.close()
+
+    assert [(v.mal_id, v.created, v.error) for v in results] == [(6, True, None)]
+
+    comic_code = results[0].comic_code
+    assert comicking.records(f'/rest/comics/{comic_code}/covers') == {}
+
+    with open(note_file, encoding='utf-8') as f:
+        notes = [json.loads(v) for v in f]
+
+    skipped = [v for v in notes if v['event'] == 'cover-skipped']
+    assert len(skipped) == 1
+    assert skipped[0]['reason'] == 'invalid'
+    assert skipped[0]['comic_code'] == comic_code